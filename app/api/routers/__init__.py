@@ -1,6 +1,17 @@
 from app.api.routers.v1.activities import router as activity_router
 from app.api.routers.v1.buildings import router as building_router
+from app.api.routers.v1.exports import router as export_router
+from app.api.routers.v1.internal import router as internal_router
+from app.api.routers.v1.jobs import router as job_router
 from app.api.routers.v1.organizations import router as orginazation_router
 from app.api.routers.v1.phones import router as phone_router
 
-__all__ = ["activity_router", "orginazation_router", "building_router", "phone_router"]
+__all__ = [
+    "activity_router",
+    "orginazation_router",
+    "building_router",
+    "phone_router",
+    "export_router",
+    "internal_router",
+    "job_router",
+]
@@ -2,13 +2,20 @@
 from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi.responses import Response
 from pydantic import Field
 
+from app.api.routers.v1.jobs import ACCEPTED_RESPONSES, job_accepted
 from app.core import BusinessException, NotFoundException
-from app.core.dependencies.services import ActivityService, get_activity_service
-from app.schemas import Acivity, ActivityCreate
+from app.core.dependencies.conditional import ConditionalGet
+from app.core.dependencies.negotiation import prefers_async
+from app.core.dependencies.services import ActivityService, JobService, get_activity_service, get_job_service
+from app.core.read_routing import read_only
+from app.schemas import Acivity, ActivityCreate, ActivityTree, BatchRequest, BatchResult
 
-router = APIRouter(prefix="/activity", tags=["activity"])
+router = APIRouter(
+    prefix="/activity", tags=["activity"], dependencies=[Depends(ConditionalGet("activities"))]
+)
 
 
 @router.get("/", response_model=list[Acivity], status_code=status.HTTP_200_OK)
@@ -17,6 +24,9 @@ async def get_activities(
 ) -> list[Acivity]:
     """Получает все деятельности
 
+    Список берется из снимка дерева деятельностей, где он уже сериализован в JSON,
+    поэтому ответ не проходит повторную валидацию через response_model.
+
     Args:
         activity_service (Annotated[ActivityService, Depends):
             Получает сервис в котором реализованна бизнес логика
@@ -25,7 +35,26 @@ async def get_activities(
         list[Acivity]:
             Список pydantic схем
     """
-    return await activity_service.get_all_activities()
+    return Response(content=await activity_service.get_all_activities_json(), media_type="application/json")
+
+
+@router.get("/tree", response_model=list[ActivityTree], status_code=status.HTTP_200_OK)
+async def get_activity_tree(
+    activity_service: Annotated[ActivityService, Depends(get_activity_service)],
+) -> list[ActivityTree]:
+    """Получает дерево активных деятельностей
+
+    Дерево собирается из кэша в памяти процесса, без запросов на каждый уровень вложенности.
+
+    Args:
+        activity_service (Annotated[ActivityService, Depends):
+            Получает сервис в котором реализованна бизнес логика
+
+    Returns:
+        list[ActivityTree]:
+            Корневые деятельности с вложенными дочерними деятельностями
+    """
+    return await activity_service.get_activity_tree()
 
 
 @router.get("/{activity_id}", response_model=Optional[Acivity], status_code=status.HTTP_200_OK)
@@ -39,6 +68,16 @@ async def get_activity(
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
 
 
+@router.post("/batch", response_model=BatchResult[Acivity], status_code=status.HTTP_200_OK)
+@read_only
+async def get_activities_batch(
+    batch: BatchRequest,
+    activity_service: Annotated[ActivityService, Depends(get_activity_service)],
+) -> dict:
+    items, missing = await activity_service.get_activities_batch(batch.ids)
+    return {"items": items, "missing": missing}
+
+
 @router.post("/", response_model=Optional[Acivity], status_code=status.HTTP_201_CREATED)
 async def create_activity(
     activity_create: Annotated[ActivityCreate, Field(description="Activity create data")],
@@ -46,17 +85,31 @@ async def create_activity(
 ) -> Acivity | None:
     try:
         return await activity_service.create_activity(activity_create)
-    except NotFoundException as e:
+    except (BusinessException, NotFoundException) as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
 
 
-@router.put("/{activity_id}", response_model=Optional[Acivity], status_code=status.HTTP_200_OK)
+@router.put(
+    "/{activity_id}",
+    response_model=Optional[Acivity],
+    status_code=status.HTTP_200_OK,
+    responses=ACCEPTED_RESPONSES,
+)
 async def update_activity(
     activity_id: Annotated[int, Path(ge=1)],
     activity_update: Annotated[ActivityCreate, Field(description="Activity update data")],
+    respond_async: Annotated[bool, Depends(prefers_async)],
     activity_service: Annotated[ActivityService, Depends(get_activity_service)],
+    job_service: Annotated[JobService, Depends(get_job_service)],
 ) -> Acivity | None:
     try:
+        if respond_async:
+            # Перенос поддерева пересчитывает замыкание и кэш организаций: выполняется в фоне
+            job = await job_service.submit(
+                "activity.update",
+                {"activity_id": activity_id, "activity": activity_update.model_dump(mode="json")},
+            )
+            return job_accepted(job)
         return await activity_service.update_activity(activity_id, activity_update)
     except (BusinessException, NotFoundException) as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
@@ -74,3 +127,14 @@ async def delete_activity(
     if res:
         return {"success": "Activity success deleted"}
     return {"success": "Activity not exists"}
+
+
+@router.post("/{activity_id}/restore", response_model=Acivity, status_code=status.HTTP_200_OK)
+async def restore_activity(
+    activity_id: Annotated[int, Path(ge=1)],
+    activity_service: Annotated[ActivityService, Depends(get_activity_service)],
+) -> Acivity:
+    try:
+        return await activity_service.restore_activity(activity_id)
+    except (BusinessException, NotFoundException) as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
@@ -4,11 +4,15 @@ from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 from pydantic import Field
 
+from app.api.routers.v1.jobs import ACCEPTED_RESPONSES, job_accepted
 from app.core import BusinessException, NotFoundException
-from app.core.dependencies.services import BuildingService, get_building_service
-from app.schemas import Building, BuildingCreate
+from app.core.dependencies.conditional import ConditionalGet
+from app.core.dependencies.negotiation import prefers_async
+from app.core.dependencies.services import BuildingService, JobService, get_building_service, get_job_service
+from app.core.read_routing import read_only
+from app.schemas import BatchRequest, BatchResult, Building, BuildingCreate
 
-router = APIRouter(prefix="/building", tags=["building"])
+router = APIRouter(prefix="/building", tags=["building"], dependencies=[Depends(ConditionalGet("buildings"))])
 
 
 @router.get("/", response_model=list[Building], status_code=status.HTTP_200_OK)
@@ -29,6 +33,16 @@ async def get_building(
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
 
 
+@router.post("/batch", response_model=BatchResult[Building], status_code=status.HTTP_200_OK)
+@read_only
+async def get_buildings_batch(
+    batch: BatchRequest,
+    building_service: Annotated[BuildingService, Depends(get_building_service)],
+) -> dict:
+    items, missing = await building_service.get_buildings_batch(batch.ids)
+    return {"items": items, "missing": missing}
+
+
 @router.post("/", response_model=Optional[Building], status_code=status.HTTP_201_CREATED)
 async def create_building(
     building_create: Annotated[BuildingCreate, Field(description="Building create data")],
@@ -52,15 +66,31 @@ async def update_building(
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
 
 
-@router.delete("/{building_id}", status_code=status.HTTP_200_OK)
+@router.delete("/{building_id}", status_code=status.HTTP_200_OK, responses=ACCEPTED_RESPONSES)
 async def delete_building(
     building_id: Annotated[int, Path(ge=1)],
+    respond_async: Annotated[bool, Depends(prefers_async)],
     building_service: Annotated[BuildingService, Depends(get_building_service)],
+    job_service: Annotated[JobService, Depends(get_job_service)],
 ) -> dict:
     try:
+        if respond_async:
+            # Сброс кэша всех организаций здания выполняется в фоне
+            return job_accepted(await job_service.submit("building.delete", {"building_id": building_id}))
         res = await building_service.delete_building(building_id)
-    except NotFoundException as e:
+    except (BusinessException, NotFoundException) as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
     if res:
         return {"success": "Building success deleted"}
     return {"success": "Building not exists"}
+
+
+@router.post("/{building_id}/restore", response_model=Building, status_code=status.HTTP_200_OK)
+async def restore_building(
+    building_id: Annotated[int, Path(ge=1)],
+    building_service: Annotated[BuildingService, Depends(get_building_service)],
+) -> Building:
+    try:
+        return await building_service.restore_building(building_id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
@@ -0,0 +1,60 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.core import BusinessException
+from app.core.config import settings
+from app.core.dependencies.conditional import ConditionalGet
+from app.core.dependencies.services import ExportService, get_export_service
+from app.schemas import ExportCompression, ExportFormat
+from app.services.exports import FILE_EXTENSIONS, MEDIA_TYPES
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"],
+    dependencies=[Depends(ConditionalGet("organizations", "buildings", "activities", "phones"))],
+)
+
+
+@router.get("/organizations", status_code=status.HTTP_200_OK)
+async def export_organizations(
+    export_service: Annotated[ExportService, Depends(get_export_service)],
+    format: Annotated[ExportFormat, Query(description="ndjson, csv или columnar")] = "ndjson",
+    compression: Annotated[ExportCompression, Query(description="none, gzip или zstd")] = "gzip",
+    after_id: Annotated[int | None, Query(ge=0, description="Продолжить выгрузку после этого id")] = None,
+) -> StreamingResponse:
+    """
+    Потоковая выгрузка всего справочника активных организаций.
+
+    Читает организации серверным курсором плоским JOIN-ом со зданиями и деятельностями,
+    собирает строки одной организации в запись и отдает их порциями, не накапливая выборку
+    в памяти. Формат columnar - строка JSON на порцию с массивом значений на каждую колонку.
+    Каждая сжатая порция является самостоятельным gzip member / zstd frame, поэтому
+    прерванную выгрузку можно продолжить с after_id и дописать в конец того же файла.
+
+    Args:
+        format: Формат записей
+        compression: Сжатие порций
+        after_id: id последней уже выгруженной организации
+        export_service: Сервисный слой выгрузки
+
+    Raises:
+        HTTPException: 400 Bad Request - когда запрошенное сжатие недоступно на сервере
+        HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
+
+    Returns:
+        Поток байтов выгрузки в виде вложения
+    """
+    try:
+        chunks = export_service.export_organizations(
+            format, compression, after_id=after_id, chunk_size=settings.STREAM_CHUNK_SIZE
+        )
+    except BusinessException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    filename = f"organizations{FILE_EXTENSIONS[format]}{FILE_EXTENSIONS[compression]}"
+    return StreamingResponse(
+        (data async for data, _ in chunks),
+        media_type="application/octet-stream" if compression != "none" else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,38 @@
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.core.database import engine, read_engine
+from app.schemas import PoolStatus
+
+router = APIRouter(prefix="/internal", tags=["internal"])
+
+
+@router.get("/pool", response_model=PoolStatus, status_code=status.HTTP_200_OK)
+async def get_pool_status(
+    replica: Annotated[bool, Query(description="Пул реплики для чтения вместо основной БД")] = False,
+) -> PoolStatus:
+    """
+    Состояние пула соединений с БД в текущем процессе.
+
+    Показывает занятые и свободные соединения, переполнение сверх pool_size и время
+    ожидания свободного соединения. Значения относятся к одному воркеру uvicorn: общее
+    число соединений с БД равно (DB_POOL_SIZE + DB_MAX_OVERFLOW) * число воркеров.
+
+    Args:
+        replica: Показать пул реплики для чтения
+
+    Raises:
+        HTTPException: 404 Not Found - когда запрошен пул реплики, а она не настроена
+        HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
+
+    Returns:
+        Счетчики пула соединений
+    """
+    if replica:
+        if read_engine is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Read replica is not configured"
+            )
+        return PoolStatus(**read_engine.pool.stats())
+    return PoolStatus(**engine.pool.stats())
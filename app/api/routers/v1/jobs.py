@@ -0,0 +1,64 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi.responses import Response
+
+from app.core import NotFoundException
+from app.core.dependencies.services import JobService, get_job_service
+from app.core.metrics import TimedORJSONResponse
+from app.models import Job as JobModel
+from app.schemas import Job
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Через сколько секунд клиенту стоит снова запросить статус незавершенной задачи
+POLL_INTERVAL_SECONDS = 1
+
+# Описание ответа 202 для OpenAPI эндпоинтов, принимающих Prefer: respond-async
+ACCEPTED_RESPONSES = {
+    202: {
+        "model": Job,
+        "description": "With Prefer: respond-async - the change is queued as a background job",
+    }
+}
+
+
+def job_accepted(job: JobModel) -> Response:
+    """Ответ 202 на запрос, выполняемый фоновой задачей: статус задачи и ссылка для опроса"""
+    return TimedORJSONResponse(
+        Job.model_validate(job).model_dump(mode="json"),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/jobs/{job.id}", "Preference-Applied": "respond-async"},
+    )
+
+
+@router.get("/{job_id}", response_model=Job, status_code=status.HTTP_200_OK)
+async def get_job(
+    job_id: Annotated[int, Path(ge=1)],
+    job_service: Annotated[JobService, Depends(get_job_service)],
+) -> Response:
+    """
+    Статус фоновой задачи.
+
+    Пока задача в очереди или выполняется, ответ содержит Retry-After с рекомендуемым
+    интервалом опроса. Завершенная задача содержит результат (result) или ошибку (error).
+
+    Args:
+        job_id: Идентификатор задачи из ответа 202 (заголовок Location)
+        job_service: Сервисный слой фоновых задач
+
+    Raises:
+        HTTPException: 404 Not Found - когда задачи с указанным id нет
+        HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
+
+    Returns:
+        Статус задачи, время постановки, начала и завершения, результат или ошибка
+    """
+    try:
+        job = await job_service.get_job(job_id)
+    except NotFoundException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    headers = {"Cache-Control": "no-store"}
+    if job.status in ("queued", "running"):
+        headers["Retry-After"] = str(POLL_INTERVAL_SECONDS)
+    return TimedORJSONResponse(Job.model_validate(job).model_dump(mode="json"), headers=headers)
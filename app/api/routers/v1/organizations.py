@@ -1,66 +1,271 @@
 # ruff:noqa:UP045,B008
+from collections.abc import AsyncIterator
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import Field
 
 from app.core import BusinessException, NotFoundException
-from app.core.dependencies.services import OrganizationService, get_organization_service
+from app.core.config import settings
+from app.core.dependencies.conditional import ConditionalGet
+from app.core.dependencies.fieldset import get_fieldset
+from app.core.dependencies.negotiation import NORMALIZED_MEDIA_TYPE, prefers_normalized
+from app.core.dependencies.pagination import get_pagination
+from app.core.dependencies.services import (
+    ImportService,
+    OrganizationService,
+    get_import_service,
+    get_organization_service,
+)
+from app.core.metrics import serialization_timer
+from app.core.read_routing import read_only
+from app.models import Organization as OrganizationModel
 from app.schemas import (
+    BatchRequest,
+    BatchResult,
     CoordinateRadius,
     CoordinateRectangle,
+    ImportEntity,
+    ImportFormat,
+    ImportReport,
     Organization,
     OrganizationCreate,
+    OrganizationFieldset,
+    OrganizationPage,
+    OrganizationQuery,
+    OrganizationSearchResult,
+    OrganizationWithDistance,
+    Pagination,
+    QueryPlan,
+    sparse_adapter,
+    sparse_schema,
 )
+from app.services.imports import aiter_lines
 
-router = APIRouter(prefix="/organization", tags=["organization"])
+router = APIRouter(
+    prefix="/organization",
+    tags=["organization"],
+    dependencies=[Depends(ConditionalGet("organizations", "buildings", "activities", "phones"))],
+)
 
 
-@router.get("/radius", response_model=list[Organization])
+async def _iter_ndjson(
+    organizations: AsyncIterator[OrganizationModel], fieldset: OrganizationFieldset | None = None
+) -> AsyncIterator[str]:
+    schema = Organization if fieldset is None else sparse_schema(Organization, fieldset)
+    async for organization in organizations:
+        with serialization_timer():
+            line = schema.model_validate(organization).model_dump_json() + "\n"
+        yield line
+
+
+def _sparse_response(
+    organizations: list[OrganizationModel],
+    schema: type[Organization],
+    fieldset: OrganizationFieldset,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Ответ только с выбранными полями, в обход response_model с полной схемой"""
+    adapter = sparse_adapter(schema, fieldset)
+    with serialization_timer():
+        content = adapter.dump_json(adapter.validate_python(organizations, from_attributes=True))
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def _page_headers(request: Request, next_after: int | None) -> dict[str, str]:
+    """Заголовок Link со ссылкой на следующую страницу (RFC 8288); у последней страницы его нет"""
+    if next_after is None:
+        return {}
+    return {"Link": f'<{request.url.include_query_params(after=next_after)}>; rel="next"'}
+
+
+# Описание альтернативного представления для OpenAPI
+NORMALIZED_RESPONSES = {
+    200: {
+        "content": {NORMALIZED_MEDIA_TYPE: {}},
+        "description": "With Accept: " + NORMALIZED_MEDIA_TYPE + " - organizations reference building_id and "
+        "activity_ids; buildings and activities are listed once in side tables",
+    }
+}
+
+
+def _negotiated_response(payload: bytes, normalized: bool, headers: dict[str, str] | None = None) -> Response:
+    """Готовый JSON в форме, выбранной по Accept; Vary сообщает кешам, что форма зависит от Accept"""
+    return Response(
+        content=payload,
+        media_type=NORMALIZED_MEDIA_TYPE if normalized else "application/json",
+        headers={"Vary": "Accept", **(headers or {})},
+    )
+
+
+@router.get("/radius", response_model=list[OrganizationWithDistance])
 async def get_organizations_by_radius(
     lat: Annotated[float, Query(..., description="Latitude")],
     lon: Annotated[float, Query(..., description="Longitude")],
     radius_km: Annotated[float | int, Query(..., description="Radius in km")],
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
+    limit: Annotated[int, Query(ge=1, le=1000, description="Max number of nearest organizations")] = 100,
     organization_service: OrganizationService = Depends(get_organization_service),
-) -> list[Organization]:
+) -> list[OrganizationWithDistance]:
     """
     Поиск организаций в заданном радиусе от географической точки.
 
-    Использует формулу гаверсинуса для расчета расстояния между координатами
-    и возвращает все активные организации, находящиеся в пределах указанного
-    радиуса от заданной точки(погрешность примерно 300-400 метров).
+    Сначала отбирает здания по прямоугольнику, описанному вокруг круга поиска
+    (покрывается индексом по координатам), затем считает точное расстояние по формуле
+    гаверсинуса только для отобранных зданий. Возвращает активные организации,
+    находящиеся в пределах указанного радиуса, отсортированные по расстоянию (поле distance_km).
     Поиск учитывает как точное расположение зданий, так и статус активности организаций.
+    Полный ответ, как и в списке организаций, сериализуется из строк выборки.
 
     Args:
         lat: Географическая широта центра поиска в градусах(от -90 до 90)
         lon: Географическая долгота центра поиска в градусах(от -90 до 90)
         radius_km: Радиус поиска в километрах(радиус землю 6371 км) максимально
+        limit: Максимальное количество ближайших организаций в ответе
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
         organization_service: Сервисный слой для работы с организациями,
                              реализующий геопоиск и аркестрирующий бизнес-логику,
                              управляет конкретными use-cases.
 
     Raises:
+        HTTPException: 400 Bad Request - когда в fields или include указано неизвестное поле
         HTTPException: 404 Not Found - когда в указанном радиусе не найдено
                       ни одной активной организации
         HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
 
     Returns:
-        Список организаций, удовлетворяющих критериям поиска по радиусу,
-        с полной информацией о зданиях и видах деятельности
+        Список организаций, удовлетворяющих критериям поиска по радиусу, от ближайшей
+        к самой дальней, с расстоянием и полной информацией о зданиях и видах деятельности
     """
     try:
         coordinates = CoordinateRadius(lat=lat, lon=lon, radius_km=radius_km)
-        return await organization_service.get_organization_by_radius(coordinates)
+        if fieldset is None:
+            payload = await organization_service.get_organizations_by_radius_json(coordinates, limit)
+            return Response(content=payload, media_type="application/json")
+        organizations = await organization_service.get_organization_by_radius(coordinates, limit, fieldset)
     except NotFoundException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    return _sparse_response(organizations, OrganizationWithDistance, fieldset)
+
+
+@router.get("/query", response_model=OrganizationPage | QueryPlan)
+async def query_organizations(
+    query: Annotated[OrganizationQuery, Query()],
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
+    organization_service: OrganizationService = Depends(get_organization_service),
+) -> OrganizationPage | QueryPlan:
+    """
+    Поиск организаций по любому сочетанию фильтров одним SQL-запросом.
+
+    Фильтры по зданию, деятельности (с потомками), части названия, радиусу вокруг точки
+    и прямоугольнику координат объединяются через AND в один SELECT. Результаты
+    сортируются по id, названию или расстоянию до точки и отдаются страницами
+    с keyset-курсором next_cursor. С параметром explain вместо результатов возвращаются
+    SQL и план выполнения (analyze выполняет запрос и показывает фактическое время).
+
+    Args:
+        query: Фильтры, сортировка, размер страницы, курсор и режим explain
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
+        organization_service: Сервисный слой для работы с организациями
+
+    Raises:
+        HTTPException: 400 Bad Request - когда курсор поврежден или в fields указано неизвестное поле
+        HTTPException: 404 Not Found - когда деятельность с указанным id не найдена
+        HTTPException: 422 Unprocessable Entity - когда группа параметров указана не полностью
+        HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
 
+    Returns:
+        Страница организаций с расстоянием до точки (если она задана) и курсором
+        следующей страницы, либо план запроса
+    """
+    try:
+        if query.explain is not None:
+            return await organization_service.explain_organizations_query(query)
+        page = await organization_service.query_organizations(query, fieldset)
+    except (BusinessException, NotFoundException) as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    if fieldset is not None:
+        with serialization_timer():
+            content = page.model_dump_json()
+        return Response(content=content, media_type="application/json")
+    return page
+
+
+@router.get("/search", response_model=list[OrganizationSearchResult])
+async def search_organizations(
+    q: Annotated[str, Query(min_length=1, max_length=155, description="Часть названия организации")],
+    activity_id: Annotated[
+        Optional[int], Query(ge=1, description="Только организации с этой деятельностью или её потомками")
+    ] = None,
+    lat_min: Annotated[Optional[float], Query(description="Min latitude")] = None,
+    lat_max: Annotated[Optional[float], Query(description="Max latitude")] = None,
+    lon_min: Annotated[Optional[float], Query(description="Min longitude")] = None,
+    lon_max: Annotated[Optional[float], Query(description="Max longitude")] = None,
+    limit: Annotated[int, Query(ge=1, le=100, description="Размер страницы")] = 20,
+    offset: Annotated[int, Query(ge=0, le=10_000, description="Сколько результатов пропустить")] = 0,
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)] = None,
+    organization_service: OrganizationService = Depends(get_organization_service),
+) -> list[OrganizationSearchResult]:
+    """
+    Нечеткий поиск организаций по названию.
 
-@router.get("/area/", response_model=list[Organization])
+    Находит организации, в названии которых есть слово, похожее на запрос по триграммам,
+    или подстрока запроса без учета регистра. Результаты отсортированы по релевантности
+    (поле score), поиск использует GIN-индекс pg_trgm по названию. Фильтры по поддереву
+    деятельности и по прямоугольнику координат применяются в том же запросе.
+
+    Args:
+        q: Строка поиска
+        activity_id: Идентификатор деятельности; учитываются и все её потомки
+        lat_min: Минимальная широта прямоугольника (указывается вместе с остальными границами)
+        lat_max: Максимальная широта прямоугольника
+        lon_min: Минимальная долгота прямоугольника
+        lon_max: Максимальная долгота прямоугольника
+        limit: Размер страницы
+        offset: Смещение от начала выдачи
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
+        organization_service: Сервисный слой для работы с организациями
+
+    Raises:
+        HTTPException: 400 Bad Request - когда границы прямоугольника указаны не все
+                      или в fields или include указано неизвестное поле
+        HTTPException: 404 Not Found - когда деятельность с указанным id не найдена
+        HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
+
+    Returns:
+        Страница организаций, отсортированных по убыванию релевантности
+    """
+    bounds = {"lat_min": lat_min, "lat_max": lat_max, "lon_min": lon_min, "lon_max": lon_max}
+    area = None
+    if any(value is not None for value in bounds.values()):
+        if any(value is None for value in bounds.values()):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="lat_min, lat_max, lon_min and lon_max must be given together",
+            )
+        area = CoordinateRectangle(**bounds)
+    try:
+        organizations = await organization_service.search_organizations(
+            q, activity_id, area, limit, offset, fieldset
+        )
+    except NotFoundException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    if fieldset is not None:
+        return _sparse_response(organizations, OrganizationSearchResult, fieldset)
+    return organizations
+
+
+@router.get("/area/", response_model=list[Organization], responses=NORMALIZED_RESPONSES)
 async def get_organizations_by_rectangle(
     lat_min: Annotated[float, Query(..., description="Min latitude")],
     lat_max: Annotated[float, Query(..., description="Max latitude")],
     lon_min: Annotated[float, Query(..., description="Min longitude")],
     lon_max: Annotated[float, Query(..., description="Max longitude")],
+    request: Request,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
+    normalized: Annotated[bool, Depends(prefers_normalized)],
     organization_service: OrganizationService = Depends(get_organization_service),
 ) -> list[Organization]:
     """
@@ -70,14 +275,25 @@ async def get_organizations_by_rectangle(
     области, ограниченной минимальными и максимальными значениями широты и долготы.
     Поиск оптимизирован для работы с большими наборами географических данных.
 
+    С Accept: application/vnd.organization.normalized+json возвращает нормализованную форму:
+    организации ссылаются на building_id и activity_ids, а здания и деятельности перечислены
+    по одному разу в buildings и activities. Параметры fields и include имеют приоритет.
+
     Args:
         lat_min: Минимальное значение широты для ограничения области поиска(от -90 до 90)
         lat_max: Максимальное значение широты для ограничения области поиска(от -90 до 90)
         lon_min: Минимальное значение долготы для ограничения области поиска(от -90 до 90)
         lon_max: Максимальное значение долготы для ограничения области поиска(от -90 до 90)
+        request: Запрос, из URL которого строится ссылка на следующую страницу
+        pagination: Параметры keyset-пагинации: limit - размер страницы,
+                    after - id последней организации предыдущей страницы; ссылка на следующую
+                    страницу приходит в заголовке Link с rel="next", у последней его нет
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
+        normalized: Клиент запросил нормализованную форму ответа через Accept
         organization_service: Сервисный слой для работы с организациями
 
     Raises:
+        HTTPException: 400 Bad Request - когда в fields или include указано неизвестное поле
         HTTPException: 404 Not Found - когда в указанной области не найдено
                       ни одной активной организации
         HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
@@ -88,32 +304,76 @@ async def get_organizations_by_rectangle(
     """
     try:
         coordinates = CoordinateRectangle(lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max)
-        return await organization_service.get_organization_by_rectangle(coordinates)
+        if fieldset is None:
+            payload, next_after = await organization_service.get_organizations_by_rectangle_json(
+                coordinates, pagination, normalized
+            )
+            return _negotiated_response(payload, normalized, _page_headers(request, next_after))
+        organizations = await organization_service.get_organization_by_rectangle(
+            coordinates, pagination, fieldset
+        )
     except NotFoundException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    headers = _page_headers(request, pagination.next_after(organizations))
+    return _sparse_response(organizations, Organization, fieldset, headers)
 
 
-@router.get("/", response_model=list[Organization], status_code=status.HTTP_200_OK)
+@router.get(
+    "/", response_model=list[Organization], status_code=status.HTTP_200_OK, responses=NORMALIZED_RESPONSES
+)
 async def get_organizations(
+    request: Request,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
+    normalized: Annotated[bool, Depends(prefers_normalized)],
     organization_service: Annotated[OrganizationService, Depends(get_organization_service)],
+    stream: Annotated[bool, Query(description="Stream all organizations as NDJSON")] = False,
 ) -> list[Organization]:
     """
-    Получает полный список всех активных организаций из системы.
+    Получает список активных организаций из системы постранично.
+
+    Возвращает организации с флагом is_active=True(Не удаленные), включая полную информацию
+    о связанных зданиях, видах деятельности и контактных данных. Организации отсортированы
+    по id, следующая страница запрашивается с after равным id последней организации.
+
+    В режиме stream=true отдает все организации после курсора after в формате NDJSON
+    (одна организация на строку), выбирая их из БД порциями, поэтому потребление памяти
+    не зависит от размера справочника. Параметр limit в этом режиме игнорируется.
 
-    Возвращает все организации с флагом is_active=True(Не удаленные), включая полную информацию
-    о связанных зданиях, видах деятельности и контактных данных.
+    Полный ответ собирается из плоских строк выборки (организация со зданием и деятельности
+    вторым запросом) и сериализуется заранее собранным TypeAdapter, без моделей ORM и Pydantic.
+    С Accept: application/vnd.organization.normalized+json страница отдается в нормализованной
+    форме: здания и деятельности вынесены в отдельные списки без повторов.
 
     Args:
+        request: Запрос, из URL которого строится ссылка на следующую страницу
+        pagination: Параметры keyset-пагинации: limit - размер страницы,
+                    after - id последней организации предыдущей страницы; ссылка на следующую
+                    страницу приходит в заголовке Link с rel="next", у последней его нет
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
+        normalized: Клиент запросил нормализованную форму ответа через Accept
         organization_service: Сервисный слой для работы с организациями,
                              инкапсулирующий бизнес-логику и взаимодействие с БД
+        stream: Включает потоковую выдачу в формате application/x-ndjson
     Raises:
+        HTTPException: 400 Bad Request - когда в fields или include указано неизвестное поле
         HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
 
     Returns:
-        Список всех активных организаций в формате Pydantic схем, содержащих
+        Страница активных организаций в формате Pydantic схем, содержащих
         полную информацию о каждой организации и ее связях
     """
-    return await organization_service.get_all_organizations()
+    if stream:
+        organizations = organization_service.stream_all_organizations(
+            after=pagination.after, chunk_size=settings.STREAM_CHUNK_SIZE, fieldset=fieldset
+        )
+        return StreamingResponse(_iter_ndjson(organizations, fieldset), media_type="application/x-ndjson")
+    if fieldset is None:
+        payload, next_after = await organization_service.get_all_organizations_json(pagination, normalized)
+        return _negotiated_response(payload, normalized, _page_headers(request, next_after))
+    organizations = await organization_service.get_all_organizations(pagination, fieldset)
+    headers = _page_headers(request, pagination.next_after(organizations))
+    return _sparse_response(organizations, Organization, fieldset, headers)
 
 
 @router.get(
@@ -123,6 +383,7 @@ async def get_organizations(
 )
 async def get_organization(
     organization_id: Annotated[int, Path(ge=1)],
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
     organization_service: Annotated[OrganizationService, Depends(get_organization_service)],
 ) -> Organization | None:
     """
@@ -131,14 +392,18 @@ async def get_organization(
     Ищет организацию в системе по уникальному числовому идентификатору. Возвращает
     полные данные об организации включая информацию о здании, видах деятельности
     и контактных телефонах. Поиск ограничен только активными организациями.
+    Ответ берется из кэша готовых JSON-ответов, который сбрасывается при изменении
+    организации, ее здания или видов деятельности.
 
     Args:
         organization_id: Уникальный числовой идентификатор организации.
                         Должен быть положительным целым числом больше или равным 1
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
         organization_service: Сервисный слой для работы с организациями,
                              обеспечивающий поиск и валидацию существования
 
     Raises:
+        HTTPException: 400 Bad Request - когда в fields или include указано неизвестное поле
         HTTPException: 404 Not Found - когда организация с указанным ID не существует
                       в системе или была удалена
         HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
@@ -148,9 +413,10 @@ async def get_organization(
         если организация не найдена (с последующим возбуждением исключения)
     """
     try:
-        return await organization_service.get_organization_by_id(organization_id)
+        payload = await organization_service.get_organization_json(organization_id, fieldset)
     except NotFoundException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get(
@@ -160,6 +426,10 @@ async def get_organization(
 )
 async def get_organizations_by_building(
     building_id: Annotated[int, Path(ge=1)],
+    request: Request,
+    response: Response,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
     organization_service: Annotated[OrganizationService, Depends(get_organization_service)],
 ) -> list[Organization]:
     """
@@ -172,10 +442,17 @@ async def get_organizations_by_building(
     Args:
         building_id: Уникальный числовой идентификатор здания.
                     Должен соответствовать существующему активному зданию
+        request: Запрос, из URL которого строится ссылка на следующую страницу
+        response: Ответ, в который добавляется заголовок Link
+        pagination: Параметры keyset-пагинации: limit - размер страницы,
+                    after - id последней организации предыдущей страницы; ссылка на следующую
+                    страницу приходит в заголовке Link с rel="next", у последней его нет
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
         organization_service: Сервисный слой для работы с организациями,
                              аркестрирующий фильтрацию по связанным объектам
 
     Raises:
+        HTTPException: 400 Bad Request - когда в fields или include указано неизвестное поле
         HTTPException: 404 Not Found - когда здание с указанным ID не найдено
                       или в нем нет активных организаций
         HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
@@ -185,9 +462,16 @@ async def get_organizations_by_building(
         информацией о видах деятельности и контактных данных
     """
     try:
-        return await organization_service.get_organization_by_building(building_id)
+        organizations = await organization_service.get_organization_by_building(
+            building_id, pagination, fieldset
+        )
     except NotFoundException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    headers = _page_headers(request, pagination.next_after(organizations))
+    if fieldset is not None:
+        return _sparse_response(organizations, Organization, fieldset, headers)
+    response.headers.update(headers)
+    return organizations
 
 
 @router.get(
@@ -197,6 +481,10 @@ async def get_organizations_by_building(
 )
 async def get_organizations_by_activity(
     activity_id: Annotated[int, Path(ge=1)],
+    request: Request,
+    response: Response,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
     organization_service: Annotated[OrganizationService, Depends(get_organization_service)],
 ) -> list[Organization]:
     """
@@ -209,12 +497,19 @@ async def get_organizations_by_activity(
     Args:
         activity_id: Уникальный числовой идентификатор вида деятельности.
                     Должен соответствовать существующей активной деятельности
+        request: Запрос, из URL которого строится ссылка на следующую страницу
+        response: Ответ, в который добавляется заголовок Link
+        pagination: Параметры keyset-пагинации: limit - размер страницы,
+                    after - id последней организации предыдущей страницы; ссылка на следующую
+                    страницу приходит в заголовке Link с rel="next", у последней его нет
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
         organization_service: Сервисный слой для работы с организациями,
                             аркестрирующий фильтрацию по связанным активностям
 
     Raises:
+        HTTPException: 400 Bad Request - когда в fields или include указано неизвестное поле
         HTTPException: 404 Not Found - когда вид деятельности с указанным ID
-                      не найден или с ним не связано ни одной активной организации
+                      не найден; пустая страница возвращается как []
         HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
 
     Returns:
@@ -222,9 +517,16 @@ async def get_organizations_by_activity(
         с полной информацией о зданиях и контактных данных
     """
     try:
-        return await organization_service.get_organization_by_activity(activity_id)
+        organizations = await organization_service.get_organization_by_activity(
+            activity_id, pagination, fieldset
+        )
     except NotFoundException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    headers = _page_headers(request, pagination.next_after(organizations))
+    if fieldset is not None:
+        return _sparse_response(organizations, Organization, fieldset, headers)
+    response.headers.update(headers)
+    return organizations
 
 
 @router.get(
@@ -234,22 +536,32 @@ async def get_organizations_by_activity(
 )
 async def get_organizations_by_activity_with_children(
     activity_name: str,
+    request: Request,
+    response: Response,
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
     organization_service: Annotated[OrganizationService, Depends(get_organization_service)],
 ) -> list[Organization]:
     """
     Получает список организаций, связанных с видом деятельности и его дочерними элементами.
 
-    Использует рекурсивный поиск по иерархии видов деятельности для нахождения
-    всех организаций, связанных с указанным видом деятельности или любым из
-    его дочерних элементов(cte). Подходит для поиска организаций по категориям
-    с древовидной структурой.
+    Берет вид деятельности и всех его потомков из кэша дерева деятельностей в памяти
+    процесса и одним запросом выбирает организации, связанные с любым из них.
+    Подходит для поиска организаций по категориям с древовидной структурой.
 
     Args:
         activity_name: Название родительского вида деятельности для поиска
+        request: Запрос, из URL которого строится ссылка на следующую страницу
+        response: Ответ, в который добавляется заголовок Link
+        pagination: Параметры keyset-пагинации: limit - размер страницы,
+                    after - id последней организации предыдущей страницы; ссылка на следующую
+                    страницу приходит в заголовке Link с rel="next", у последней его нет
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
         organization_service: Сервисный слой для работы с организациями,
                              реализующий use-case-ом рекурсивного поиска по иерархии активностей
 
     Raises:
+        HTTPException: 400 Bad Request - когда в fields или include указано неизвестное поле
         HTTPException: 404 Not Found - когда вид деятельности с указанным названием
                       не найден или с ним не связано ни одной активной организации
         HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
@@ -259,9 +571,114 @@ async def get_organizations_by_activity_with_children(
         любым из его дочерних элементов в иерархии
     """
     try:
-        return await organization_service.get_organizations_by_name_activity_with_children(activity_name)
+        organizations = await organization_service.get_organizations_by_name_activity_with_children(
+            activity_name, pagination, fieldset
+        )
     except NotFoundException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+    headers = _page_headers(request, pagination.next_after(organizations))
+    if fieldset is not None:
+        return _sparse_response(organizations, Organization, fieldset, headers)
+    response.headers.update(headers)
+    return organizations
+
+
+@router.post(
+    "/bulk",
+    response_model=ImportReport,
+    status_code=status.HTTP_200_OK,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_import(
+    request: Request,
+    import_service: Annotated[ImportService, Depends(get_import_service)],
+    entity: Annotated[
+        Optional[ImportEntity], Query(description="Тип записей; для NDJSON можно указать поле type в строке")
+    ] = None,
+    format: Annotated[
+        Optional[ImportFormat], Query(description="Формат тела запроса, по умолчанию берется из Content-Type")
+    ] = None,
+    batch_size: Annotated[int, Query(ge=1, le=10_000, description="Строк в одной транзакции")] = (
+        settings.IMPORT_BATCH_SIZE
+    ),
+) -> ImportReport:
+    """
+    Массовый импорт зданий, деятельностей, организаций и телефонов из NDJSON или CSV.
+
+    Тело запроса читается потоком и записывается пакетами по batch_size строк:
+    каждый пакет проверяется схемами создания, ссылки на здания, деятельности и организации
+    проверяются одним запросом на пакет, а записи добавляются многострочным
+    INSERT ... ON CONFLICT DO NOTHING. Ошибочные строки не прерывают импорт, а
+    возвращаются в отчете вместе с номером строки.
+
+    Args:
+        request: Запрос, тело которого содержит строки NDJSON или CSV с заголовком
+        entity: Тип записей (building, activity, organization, phone)
+        format: Формат тела запроса (ndjson или csv)
+        batch_size: Количество строк в одной транзакции
+        import_service: Сервисный слой пакетного импорта
+
+    Raises:
+        HTTPException: 400 Bad Request - когда для CSV не указан entity
+        HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
+
+    Returns:
+        Отчет: количество прочитанных, добавленных, пропущенных и ошибочных строк,
+        ошибки по строкам и скорость импорта в строках в секунду
+    """
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    if format == "csv" and entity is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="entity is required for CSV import"
+        )
+    return await import_service.import_lines(aiter_lines(request.stream()), format, entity, batch_size)
+
+
+@router.post("/batch", response_model=BatchResult[Organization], status_code=status.HTTP_200_OK)
+@read_only
+async def get_organizations_batch(
+    batch: BatchRequest,
+    fieldset: Annotated[Optional[OrganizationFieldset], Depends(get_fieldset)],
+    organization_service: Annotated[OrganizationService, Depends(get_organization_service)],
+) -> dict:
+    """
+    Получает организации по списку идентификаторов одним запросом.
+
+    Организации выбираются одним запросом WHERE id = ANY(:ids), здания и виды деятельности
+    догружаются общими запросами на весь список. Найденные организации возвращаются
+    в порядке запрошенных id, отсутствующие и неактивные id перечисляются в missing.
+    Запрос только читает данные: идет на реплику и не закрепляет клиента за основной БД.
+
+    Args:
+        batch: Список id организаций, не больше BATCH_MAX_IDS
+        fieldset: Выбранные поля ответа (параметры fields и include), None - полный ответ
+        organization_service: Сервисный слой для работы с организациями
+
+    Raises:
+        HTTPException: 400 Bad Request - когда в fields или include указано неизвестное поле
+        HTTPException: 422 Unprocessable Entity - когда список id пуст или длиннее BATCH_MAX_IDS
+        HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
+
+    Returns:
+        Найденные организации (items) и id, которых нет среди активных организаций (missing)
+    """
+    items, missing = await organization_service.get_organizations_batch(batch.ids, fieldset)
+    if fieldset is None:
+        return {"items": items, "missing": missing}
+    result = BatchResult[sparse_schema(Organization, fieldset)]
+    with serialization_timer():
+        content = result.model_validate({"items": items, "missing": missing}, from_attributes=True)
+        payload = content.model_dump_json()
+    return Response(content=payload, media_type="application/json")
 
 
 @router.post("/", response_model=Optional[Organization], status_code=status.HTTP_201_CREATED)
@@ -349,10 +766,10 @@ async def delete_organization(
     """
     Выполняет мягкое удаление организации по идентификатору.
 
-    Устанавливает флаг is_active=false для указанной организации, что позволяет
-    сохранить исторические данные и ссылочную целостность, исключив организацию
+    Устанавливает флаг is_active=false для указанной организации и ее телефонов, что
+    позволяет сохранить исторические данные и ссылочную целостность, исключив организацию
     из рабочих процессов. Удаленная организация больше не будет появляться
-    в результатах поиска и списках организаций.
+    в результатах поиска и списках организаций. Вернуть ее можно через POST /{id}/restore.
 
     Args:
         organization_id: Уникальный числовой идентификатор удаляемой организации.
@@ -377,3 +794,33 @@ async def delete_organization(
     if res:
         return {"success": "Organization success deleted"}
     return {"success": "Organization not exists"}
+
+
+@router.post("/{organization_id}/restore", response_model=Organization, status_code=status.HTTP_200_OK)
+async def restore_organization(
+    organization_id: Annotated[int, Path(ge=1)],
+    organization_service: Annotated[OrganizationService, Depends(get_organization_service)],
+) -> Organization:
+    """
+    Восстанавливает мягко удаленную организацию.
+
+    Вместе с организацией возвращаются телефоны, снятые при ее удалении; телефоны,
+    удаленные раньше по отдельности, остаются удаленными.
+
+    Args:
+        organization_id: Уникальный числовой идентификатор удаленной организации
+        organization_service: Сервисный слой, проверяющий, что здание организации активно
+
+    Raises:
+        HTTPException: 404 Not Found - когда удаленной организации с указанным ID нет
+        HTTPException: 409 Conflict - когда здание организации удалено: сначала нужно
+                      восстановить здание
+        HTTPException: 401 Unauthorizated - когда api key не совпадает или не указан
+
+    Returns:
+        Восстановленный объект Organization со зданием, деятельностями и телефонами
+    """
+    try:
+        return await organization_service.restore_organization(organization_id)
+    except (BusinessException, NotFoundException) as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
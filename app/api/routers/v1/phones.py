@@ -5,10 +5,12 @@ from fastapi import APIRouter, Depends, HTTPException, Path, status
 from pydantic import Field
 
 from app.core import BusinessException, NotFoundException
+from app.core.dependencies.conditional import ConditionalGet
 from app.core.dependencies.services import PhoneService, get_phone_service
-from app.schemas import Phone, PhoneCreate
+from app.core.read_routing import read_only
+from app.schemas import BatchRequest, BatchResult, Phone, PhoneCreate
 
-router = APIRouter(prefix="/phone", tags=["phone"])
+router = APIRouter(prefix="/phone", tags=["phone"], dependencies=[Depends(ConditionalGet("phones"))])
 
 
 @router.get("/", response_model=list[Phone], status_code=status.HTTP_200_OK)
@@ -29,6 +31,16 @@ async def get_phone(
         raise HTTPException(status_code=e.status_code, detail=e.detail) from e
 
 
+@router.post("/batch", response_model=BatchResult[Phone], status_code=status.HTTP_200_OK)
+@read_only
+async def get_phones_batch(
+    batch: BatchRequest,
+    phone_service: Annotated[PhoneService, Depends(get_phone_service)],
+) -> dict:
+    items, missing = await phone_service.get_phones_batch(batch.ids)
+    return {"items": items, "missing": missing}
+
+
 @router.post("/", response_model=Optional[Phone], status_code=status.HTTP_201_CREATED)
 async def create_phone(
     phone_create: Annotated[PhoneCreate, Field(description="Phone create data")],
@@ -0,0 +1,131 @@
+"""
+Консольные команды сервиса.
+
+    python -m app.cli import organizations.ndjson
+    python -m app.cli import buildings.csv --entity building --batch-size 5000
+    python -m app.cli export organizations.ndjson.gz --compression gzip --resume
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from app.core import BusinessException
+from app.core.config import settings
+from app.core.database import async_session_maker, engine
+from app.core.spatial_index import building_index
+from app.repositories import ImportRepository, OrganizationRepository
+from app.services import ExportService, ImportService
+from app.services.activity_tree import activity_tree_cache
+
+
+async def _read_lines(path: Path) -> AsyncIterator[str]:
+    with path.open(encoding="utf-8", newline="") as file:
+        for line in file:
+            yield line.rstrip("\r\n")
+
+
+async def run_import(args: argparse.Namespace) -> int:
+    format = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    if format == "csv" and args.entity is None:
+        print("--entity is required for CSV import", file=sys.stderr)
+        return 2
+    async with async_session_maker() as db:
+        import_service = ImportService(
+            import_repo=ImportRepository(db=db),
+            activity_tree=activity_tree_cache,
+            spatial_index=building_index,
+        )
+        report = await import_service.import_lines(
+            _read_lines(args.path), format, args.entity, args.batch_size
+        )
+    await engine.dispose()
+    for error in report.errors:
+        print(f"line {error.line}: [{error.entity or '?'}] {error.error}", file=sys.stderr)
+    print(
+        f"received={report.received} inserted={report.inserted} skipped={report.skipped} "
+        f"failed={report.failed} elapsed={report.elapsed_seconds}s rows/sec={report.rows_per_second}"
+    )
+    return 1 if report.failed else 0
+
+
+async def run_export(args: argparse.Namespace) -> int:
+    """
+    Пишет выгрузку в файл, после каждой порции сохраняя в <файл>.checkpoint
+    id последней записанной организации и длину файла. С --resume файл обрезается
+    до сохраненной длины и выгрузка продолжается с этого id.
+    """
+    checkpoint_path = args.path.with_name(args.path.name + ".checkpoint")
+    after_id, offset = args.after_id, 0
+    if args.resume and checkpoint_path.exists():
+        checkpoint = json.loads(checkpoint_path.read_text())
+        after_id, offset = checkpoint["after_id"], checkpoint["offset"]
+    exported = 0
+    started = time.perf_counter()
+    async with async_session_maker() as db:
+        export_service = ExportService(organization_repo=OrganizationRepository(db=db))
+        try:
+            chunks = export_service.export_organizations(
+                args.format,
+                args.compression,
+                after_id=after_id,
+                chunk_size=args.chunk_size,
+                header=offset == 0,
+            )
+        except BusinessException as e:
+            print(e.detail, file=sys.stderr)
+            return 2
+        with args.path.open("r+b" if offset else "wb") as file:
+            file.truncate(offset)
+            file.seek(offset)
+            async for data, last_id in chunks:
+                file.write(data)
+                file.flush()
+                exported += 1
+                checkpoint_path.write_text(json.dumps({"after_id": last_id, "offset": file.tell()}))
+    await engine.dispose()
+    print(f"chunks={exported} elapsed={time.perf_counter() - started:.3f}s file={args.path}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Пакетный импорт из NDJSON или CSV")
+    import_parser.add_argument("path", type=Path, help="Файл с данными")
+    import_parser.add_argument(
+        "--entity",
+        choices=["building", "activity", "organization", "phone"],
+        help="Тип записей; для NDJSON можно указать поле type в строке",
+    )
+    import_parser.add_argument(
+        "--format", choices=["ndjson", "csv"], help="Формат файла, по умолчанию определяется по расширению"
+    )
+    import_parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    import_parser.set_defaults(handler=run_import)
+
+    export_parser = commands.add_parser("export", help="Потоковая выгрузка организаций в файл")
+    export_parser.add_argument("path", type=Path, help="Файл для выгрузки")
+    export_parser.add_argument("--format", choices=["ndjson", "csv", "columnar"], default="ndjson")
+    export_parser.add_argument("--compression", choices=["none", "gzip", "zstd"], default="none")
+    export_parser.add_argument("--after-id", type=int, default=None, help="Начать после этого id")
+    export_parser.add_argument(
+        "--resume", action="store_true", help="Продолжить с сохраненной контрольной точки"
+    )
+    export_parser.add_argument("--chunk-size", type=int, default=settings.STREAM_CHUNK_SIZE)
+    export_parser.set_defaults(handler=run_export)
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
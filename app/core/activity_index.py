@@ -0,0 +1,80 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable
+
+from app.core.config import settings
+
+EMPTY = array("i")
+
+
+class ActivityPostingIndex:
+    """Инвертированный индекс деятельность -> организации в памяти процесса.
+
+    Для каждой деятельности хранится отсортированный массив array('i') id активных
+    организаций, напрямую связанных с ней. Списки для деятельности с потомками
+    собираются объединением списков поддерева и кэшируются до ближайшего изменения.
+    Индекс собирается при старте приложения и поддерживается в актуальном состоянии
+    сервисами организаций, зданий и импорта. Сервисы меняют его только после commit записи,
+    поэтому откаченная транзакция не оставляет в индексе следов.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._postings: dict[int, array] = {}
+        self._activities: dict[int, tuple[int, ...]] = {}
+        self._unions: dict[frozenset[int], array] = {}
+
+    def __len__(self) -> int:
+        return len(self._activities)
+
+    def load(self, links: Iterable[tuple[int, int]]) -> None:
+        """Полностью пересобирает индекс из пар (id организации, id деятельности)"""
+        postings: dict[int, list[int]] = {}
+        activities: dict[int, list[int]] = {}
+        for organization_id, activity_id in links:
+            postings.setdefault(activity_id, []).append(organization_id)
+            activities.setdefault(organization_id, []).append(activity_id)
+        self._reset()
+        self._postings = {activity_id: array("i", sorted(ids)) for activity_id, ids in postings.items()}
+        self._activities = {organization_id: tuple(ids) for organization_id, ids in activities.items()}
+        self.ready = True
+
+    def set_organization(self, organization_id: int, activity_ids: Iterable[int]) -> None:
+        """Заменяет деятельности активной организации"""
+        self.remove_organization(organization_id)
+        activity_ids = tuple(set(activity_ids))
+        for activity_id in activity_ids:
+            insort(self._postings.setdefault(activity_id, array("i")), organization_id)
+        self._activities[organization_id] = activity_ids
+
+    def remove_organization(self, organization_id: int) -> None:
+        for activity_id in self._activities.pop(organization_id, ()):
+            postings = self._postings[activity_id]
+            position = bisect_left(postings, organization_id)
+            if position < len(postings) and postings[position] == organization_id:
+                del postings[position]
+        self._unions.clear()
+
+    def organizations(self, activity_ids: Iterable[int]) -> array:
+        """Отсортированные id организаций, связанных хотя бы с одной из деятельностей"""
+        key = frozenset(activity_ids)
+        if len(key) == 1:
+            return self._postings.get(next(iter(key)), EMPTY)
+        union = self._unions.get(key)
+        if union is None:
+            lists = [self._postings[activity_id] for activity_id in key if activity_id in self._postings]
+            union = self._unions[key] = array("i", sorted(set().union(*lists)))
+        return union
+
+    @staticmethod
+    def page(postings: array, after: int | None = None, limit: int | None = None) -> list[int]:
+        """Страница keyset-пагинации по id: до limit id после курсора after"""
+        start = bisect_right(postings, after) if after is not None else 0
+        end = start + limit if limit is not None else len(postings)
+        return postings[start:end].tolist()
+
+
+activity_index = ActivityPostingIndex() if settings.ACTIVITY_INDEX_ENABLED else None
@@ -0,0 +1,153 @@
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any, Protocol
+
+from app.core.config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """
+    Кэш готовых ответов со сбросом по ключам.
+
+    Заполнение защищено от гонки со сбросом: поколение ключа берется до чтения данных
+    (generation) и передается в set. Если за время чтения ключ сбросили, поколение выросло,
+    и ответ, прочитанный до записи, в кэш не попадет.
+    """
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def generation(self, key: str) -> int: ...
+
+    async def set(self, key: str, value: bytes, generation: int) -> None: ...
+
+    async def delete_many(self, keys: Iterable[str]) -> None: ...
+
+
+class MemoryCache:
+    """
+    LRU-кэш с TTL в памяти процесса.
+
+    Сброс при записи очищает только кэш процесса, выполнившего запись: при нескольких
+    воркерах остальные отдают старые ответы до истечения TTL. Для них нужен RedisCache.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def generation(self, key: str) -> int:
+        return self._generations.get(key, 0)
+
+    async def set(self, key: str, value: bytes, generation: int) -> None:
+        if generation != self._generations.get(key, 0):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.pop(key, None)
+
+
+class RedisCache:
+    """
+    Кэш поверх клиента с интерфейсом redis.asyncio.Redis (get/mget/set/incr/delete, pipeline).
+
+    Значение хранится с поколением, при котором оно прочитано ("<поколение>:<ответ>"), а поколение
+    ключа - в отдельном счетчике без TTL, который увеличивает сброс. get отдает значение, только
+    если поколения совпадают, поэтому запоздавший set с ответом до сброса не будет прочитан.
+    """
+
+    def __init__(self, client: Any, ttl_seconds: int = 300, prefix: str = "organization-service:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl_seconds: int = 300) -> "RedisCache":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package") from e
+        return cls(redis_asyncio.from_url(url), ttl_seconds=ttl_seconds)
+
+    def _generation_key(self, key: str) -> str:
+        return f"{self.prefix}generation:{key}"
+
+    async def get(self, key: str) -> bytes | None:
+        value, generation = await self.client.mget(self.prefix + key, self._generation_key(key))
+        if value is None:
+            return None
+        value_generation, _, payload = value.partition(b":")
+        if int(value_generation) != int(generation or 0):
+            return None
+        return payload
+
+    async def generation(self, key: str) -> int:
+        return int(await self.client.get(self._generation_key(key)) or 0)
+
+    async def set(self, key: str, value: bytes, generation: int) -> None:
+        await self.client.set(self.prefix + key, b"%d:%b" % (generation, value), ex=self.ttl_seconds)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(self._generation_key(key))
+            pipe.delete(*(self.prefix + key for key in keys))
+            await pipe.execute()
+
+
+def organization_cache_key(organization_id: int) -> str:
+    return f"organization:{organization_id}"
+
+
+async def invalidate_organizations(cache: CacheBackend | None, organization_ids: Iterable[int]) -> None:
+    if cache is not None:
+        await cache.delete_many(
+            organization_cache_key(organization_id) for organization_id in organization_ids
+        )
+
+
+def build_cache(settings: Settings) -> CacheBackend | None:
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES, ttl_seconds=settings.CACHE_TTL_SECONDS)
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache.from_url(settings.REDIS_URL, ttl_seconds=settings.CACHE_TTL_SECONDS)
+    return None
+
+
+def warn_if_process_local(cache: CacheBackend | None) -> None:
+    """Предупреждает при старте, что кэш в памяти процесса не сбрасывается в других воркерах"""
+    if isinstance(cache, MemoryCache):
+        logger.warning(
+            "CACHE_BACKEND=memory: cached responses are invalidated only in the process that made "
+            "the write, other workers serve stale data for up to %s s; use CACHE_BACKEND=redis "
+            "when running more than one worker",
+            cache.ttl_seconds,
+        )
+
+
+response_cache = build_cache(settings)
@@ -0,0 +1,149 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Уже сжатые или потоковые ответы: выгрузки с собственным сжатием, события
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/octet-stream",
+    "application/gzip",
+    "application/zstd",
+)
+
+
+def parse_quality_values(value: str) -> dict[str, float]:
+    """Значения заголовка вида Accept-Encoding или Accept с их весами q"""
+    values = {}
+    for item in value.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, number = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        values[name.lower()] = quality
+    return values
+
+
+class _GzipEncoder:
+    content_encoding = "gzip"
+
+    def __init__(self, level: int) -> None:
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, *, more_body: bool) -> bytes:
+        # В потоковом ответе каждая порция дожимается до границы блока, чтобы клиент
+        # получал строки NDJSON сразу, а не после заполнения внутреннего буфера
+        data = self.compressor.compress(body)
+        return data + self.compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    content_encoding = "br"
+
+    def __init__(self, quality: int) -> None:
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class _CompressionResponder:
+    """
+    Обертка send одного ответа: по первой порции тела решает, сжимать ли ответ.
+
+    encoder=None - клиент не принимает поддерживаемых кодировок, тело отдается как есть.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int, encoder: _GzipEncoder | _BrotliEncoder | None
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoder = encoder
+        self.send: Send | None = None
+        self.start_message: Message | None = None
+        self.compressing = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Заголовки уходят вместе с первой порцией тела, когда ясно, как их менять
+            self.start_message = message
+            return
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            if message["type"] == "http.response.body":
+                message = self.start_body(start_message, message)
+            await self.send(start_message)
+        elif self.compressing and message["type"] == "http.response.body":
+            body = self.encoder.compress(message.get("body", b""), more_body=message.get("more_body", False))
+            message = {**message, "body": body}
+        await self.send(message)
+
+    def start_body(self, start_message: Message, message: Message) -> Message:
+        """Правит заголовки ответа по первой порции тела и возвращает ее в нужной кодировке"""
+        headers = MutableHeaders(raw=start_message["headers"])
+        if "content-encoding" in headers or headers.get("content-type", "").startswith(
+            EXCLUDED_CONTENT_TYPES
+        ):
+            return message
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if len(body) < self.minimum_size and not more_body:
+            return message
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoder is None:
+            return message
+        self.compressing = True
+        body = self.encoder.compress(body, more_body=more_body)
+        headers["Content-Encoding"] = self.encoder.content_encoding
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(body))
+        return {**message, "body": body}
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы brotli или gzip по Accept-Encoding, начиная с minimum_size байт.
+
+    brotli выбирается, если установлен пакет brotli и клиент принимает br, иначе gzip.
+    Ответы с Content-Encoding и уже сжатые выгрузки отдаются как есть.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accepted = parse_quality_values(Headers(scope=scope).get("accept-encoding", ""))
+        encoder: _GzipEncoder | _BrotliEncoder | None = None
+        if brotli is not None and accepted.get("br", 0) > 0:
+            encoder = _BrotliEncoder(self.brotli_quality)
+        elif accepted.get("gzip", 0) > 0:
+            encoder = _GzipEncoder(self.gzip_level)
+        await _CompressionResponder(self.app, self.minimum_size, encoder)(scope, receive, send)
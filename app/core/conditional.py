@@ -0,0 +1,92 @@
+import hashlib
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Ключ в scope["state"], под которым зависимость оставляет заголовки для успешного ответа
+VALIDATOR_HEADERS_STATE = "validator_headers"
+
+
+def make_etag(connection: HTTPConnection, versions: Iterable[tuple[str, int]]) -> str:
+    """
+    Слабый ETag из пути, строки запроса, Accept и версий таблиц, от которых зависит ответ.
+
+    Accept входит в ключ, потому что по нему выбирается форма ответа (см. prefers_normalized).
+    """
+    key = "|".join(
+        [
+            connection.url.path,
+            connection.url.query,
+            connection.headers.get("accept", ""),
+            *(f"{table}:{version}" for table, version in versions),
+        ]
+    )
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+def format_http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(UTC), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Для If-None-Match используется слабое сравнение: префикс W/ не учитывается
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def is_not_modified(connection: HTTPConnection, etag: str, last_modified: datetime | None) -> bool:
+    """
+    Проверяет условные заголовки запроса по RFC 9110.
+
+    If-None-Match имеет приоритет: если он указан, If-Modified-Since не рассматривается.
+    """
+    if_none_match = connection.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = connection.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    # HTTP-дата с точностью до секунды
+    return last_modified.replace(microsecond=0) <= since
+
+
+class ValidatorHeadersMiddleware:
+    """
+    Добавляет к успешным ответам ETag, Last-Modified и Cache-Control.
+
+    Заголовки вычисляет зависимость ConditionalGet до выполнения эндпоинта и оставляет
+    в scope["state"], поэтому они попадают и в ответы, которые эндпоинт вернул сам
+    (готовый JSON, потоковая выдача), минуя response_model.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+
+        async def send_with_validators(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                validator_headers = state.get(VALIDATOR_HEADERS_STATE)
+                if validator_headers:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in validator_headers.items():
+                        headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -8,7 +9,48 @@ class Settings(BaseSettings):
     POSTGRES_USER_NAME: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB_URL: str
+    POSTGRES_READ_DB_URL: str | None = None
+    READ_YOUR_WRITES_SECONDS: int = 5
     API_KEY: str
+    # Ключ администратора для профилирования запросов (X-Profile); без него профилирование выключено
+    ADMIN_API_KEY: str | None = None
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_SLOW_QUERY_MS: int = 500
+    STREAM_CHUNK_SIZE: int = 500
+    SPATIAL_INDEX_ENABLED: bool = False
+    SPATIAL_INDEX_CELL_DEGREES: float = 0.01
+    SPATIAL_INDEX_REFRESH_SECONDS: int = 300
+    ACTIVITY_TREE_TTL_SECONDS: int = 60
+    ACTIVITY_INDEX_ENABLED: bool = False
+    ACTIVITY_INDEX_REFRESH_SECONDS: int = 300
+    CACHE_BACKEND: Literal["memory", "redis", "none"] = "none"
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 10_000
+    REDIS_URL: str = "redis://localhost:6379/0"
+    IMPORT_BATCH_SIZE: int = 1000
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_SIZE: int = 1000
+    JOB_HEARTBEAT_SECONDS: int = 15
+    JOB_LEASE_SECONDS: int = 120
+    JOB_RECOVERY_SECONDS: int = 30
+    BATCH_MAX_IDS: int = 1000
+    SEARCH_SIMILARITY_THRESHOLD: float = 0.5
+    CACHE_CONTROL_DEFAULT: str = "no-cache"
+    # Cache-Control по шаблону пути эндпоинта, например {"/activity/tree": "max-age=60"}
+    CACHE_CONTROL: dict[str, str] = {}
+    TABLE_VERSIONS_COMPACT_SECONDS: int = 60
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    METRICS_ENABLED: bool = True
+    METRICS_LOOP_LAG_INTERVAL_SECONDS: float = 1.0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
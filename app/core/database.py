@@ -1,12 +1,44 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
-from app.core.config import settings
+from app.core.config import Settings, settings
+from app.core.pool import InstrumentedAsyncPool
 
 DATABASE_URL = settings.POSTGRES_DB_URL
 
-engine = create_async_engine(url=DATABASE_URL, echo=True)
+
+def build_engine(url: str, settings: Settings) -> AsyncEngine:
+    """Создает движок с настройками пула и драйвера из Settings"""
+    connect_args = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        # Порог оператора <% для нечеткого поиска по названию организаций
+        server_settings = {"pg_trgm.word_similarity_threshold": str(settings.SEARCH_SIMILARITY_THRESHOLD)}
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        connect_args["server_settings"] = server_settings
+    return create_async_engine(
+        url=url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args=connect_args,
+    )
+
+
+engine = build_engine(DATABASE_URL, settings)
 async_session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+# Необязательная реплика только для чтения со своим пулом соединений
+read_engine = build_engine(settings.POSTGRES_READ_DB_URL, settings) if settings.POSTGRES_READ_DB_URL else None
+async_read_session_maker = (
+    async_sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False) if read_engine else None
+)
+
 
 class Base(DeclarativeBase): ...
@@ -0,0 +1,44 @@
+# ruff:noqa:B008
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.conditional import VALIDATOR_HEADERS_STATE, format_http_date, is_not_modified, make_etag
+from app.core.config import settings
+from app.core.dependencies.db import get_async_read_db
+from app.core.read_routing import READ_METHODS
+from app.repositories import TableVersionRepository
+
+
+class ConditionalGet:
+    """
+    Условные GET-запросы по версиям таблиц.
+
+    Одним запросом к версиям таблиц вычисляет ETag и Last-Modified ответа. Если клиент
+    прислал совпадающий If-None-Match (или If-Modified-Since не раньше последнего изменения),
+    отвечает 304 Not Modified, не обращаясь к основным таблицам. Версии читаются до данных
+    в той же сессии, поэтому ETag никогда не бывает новее отданных данных.
+    Cache-Control берется из settings.CACHE_CONTROL по шаблону пути эндпоинта,
+    иначе settings.CACHE_CONTROL_DEFAULT.
+    """
+
+    def __init__(self, *tables: str):
+        self.tables = tables
+
+    async def __call__(self, request: Request, read_db: AsyncSession = Depends(get_async_read_db)) -> None:
+        if request.method not in READ_METHODS:
+            return
+        versions = await TableVersionRepository(db=read_db).get_versions(self.tables)
+        etag = make_etag(request, [(version.table_name, version.version) for version in versions])
+        last_modified = max((version.updated_at for version in versions), default=None)
+        route = request.scope.get("route")
+        headers = {
+            "ETag": etag,
+            "Cache-Control": settings.CACHE_CONTROL.get(
+                getattr(route, "path", request.url.path), settings.CACHE_CONTROL_DEFAULT
+            ),
+        }
+        if last_modified is not None:
+            headers["Last-Modified"] = format_http_date(last_modified)
+        if is_not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        setattr(request.state, VALIDATOR_HEADERS_STATE, headers)
@@ -1,10 +1,29 @@
+# ruff:noqa:B008
 from collections.abc import AsyncGenerator
 
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import async_session_maker
+from app.core.database import async_read_session_maker, async_session_maker
+from app.core.read_routing import is_pinned_to_primary, is_read_request
 
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as db:
         yield db
+
+
+async def get_async_read_db(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для чтения: реплика для GET/HEAD и read_only запросов, если она настроена.
+
+    Изменяющие запросы и клиенты, закрепленные за основной БД после записи,
+    читают через ту же сессию, что и пишут.
+    """
+    if async_read_session_maker is None or not is_read_request(request) or is_pinned_to_primary(request):
+        yield db
+        return
+    async with async_read_session_maker() as read_db:
+        yield read_db
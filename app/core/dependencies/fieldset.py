@@ -0,0 +1,23 @@
+from typing import Annotated
+
+from fastapi import HTTPException, Query, status
+
+from app.schemas import OrganizationFieldset
+
+
+def get_fieldset(
+    fields: Annotated[
+        str | None,
+        Query(
+            description="Fields to return, comma separated: id, name, building, building.latitude, ...",
+            examples=["id,name,building.latitude,building.longitude"],
+        ),
+    ] = None,
+    include: Annotated[
+        str | None, Query(description="Nested objects to embed in full: building, activities, phones")
+    ] = None,
+) -> OrganizationFieldset | None:
+    try:
+        return OrganizationFieldset.parse(fields, include)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
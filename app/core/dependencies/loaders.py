@@ -0,0 +1,31 @@
+# ruff:noqa:B008
+import logging
+from collections.abc import AsyncGenerator
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies.db import get_async_db, get_async_read_db
+from app.repositories import RequestLoaders
+
+logger = logging.getLogger(__name__)
+
+
+async def get_loaders(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+) -> AsyncGenerator[RequestLoaders, None]:
+    """Загрузчики по первичному ключу на время запроса; в лог пишется, сколько запросов сэкономлено"""
+    loaders = RequestLoaders(db=db, read_db=read_db)
+    yield loaders
+    stats = loaders.stats
+    if stats.lookups:
+        logger.info(
+            "%s %s: %d primary key lookups in %d queries, %d saved",
+            request.method,
+            request.url.path,
+            stats.lookups,
+            stats.queries,
+            stats.saved,
+        )
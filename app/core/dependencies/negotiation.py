@@ -0,0 +1,39 @@
+from typing import Annotated
+
+from fastapi import Header
+
+from app.core.compression import parse_quality_values
+
+NORMALIZED_MEDIA_TYPE = "application/vnd.organization.normalized+json"
+
+
+def prefers_normalized(
+    accept: Annotated[
+        str | None, Header(description=f"{NORMALIZED_MEDIA_TYPE} - normalized response shape")
+    ] = None,
+) -> bool:
+    """
+    Нормализованная форма ответа выбирается, если клиент принимает ее с весом не ниже JSON.
+
+    При равных весах предпочтение отдается нормализованной форме: клиент, перечисливший ее
+    явно, ее понимает.
+    """
+    if not accept:
+        return False
+    accepted = parse_quality_values(accept)
+    normalized = accepted.get(NORMALIZED_MEDIA_TYPE, 0)
+    json = max(accepted.get(media_type, 0) for media_type in ("application/json", "application/*", "*/*"))
+    return normalized > 0 and normalized >= json
+
+
+def prefers_async(
+    prefer: Annotated[
+        str | None, Header(description="respond-async - run the change as a background job")
+    ] = None,
+) -> bool:
+    """Prefer: respond-async (RFC 7240): клиент согласен получить 202 и опрашивать статус задачи"""
+    if not prefer:
+        return False
+    return any(
+        preference.split(";")[0].strip().lower() == "respond-async" for preference in prefer.split(",")
+    )
@@ -0,0 +1,12 @@
+from typing import Annotated
+
+from fastapi import Query
+
+from app.schemas import Pagination
+
+
+def get_pagination(
+    limit: Annotated[int, Query(ge=1, le=1000, description="Page size")] = 100,
+    after: Annotated[int | None, Query(ge=0, description="Id of the last item of the previous page")] = None,
+) -> Pagination:
+    return Pagination(limit=limit, after=after)
@@ -2,39 +2,107 @@
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies.db import get_async_db
+from app.core.activity_index import activity_index
+from app.core.cache import response_cache
+from app.core.dependencies.db import get_async_db, get_async_read_db
+from app.core.dependencies.loaders import get_loaders
+from app.core.spatial_index import building_index
 from app.repositories import (
     ActivityRepository,
     BuildingRepository,
+    ImportRepository,
+    JobRepository,
     OrganizationRepository,
     PhoneRepository,
+    RequestLoaders,
 )
 from app.services import (
     ActivityService,
     BuildingService,
+    ExportService,
+    ImportService,
+    JobService,
     OrganizationService,
     PhoneService,
 )
+from app.services.activity_tree import activity_tree_cache
+from app.services.jobs import job_queue
 
 
-def get_activity_service(db: AsyncSession = Depends(get_async_db)) -> ActivityService:
-    return ActivityService(activity_repo=ActivityRepository(db=db))
+def get_activity_service(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+    loaders: RequestLoaders = Depends(get_loaders),
+) -> ActivityService:
+    return ActivityService(
+        activity_repo=ActivityRepository(db=db, read_db=read_db),
+        organization_repo=OrganizationRepository(db=db, read_db=read_db),
+        activity_tree=activity_tree_cache,
+        cache=response_cache,
+        loaders=loaders,
+    )
 
 
-def get_building_service(db: AsyncSession = Depends(get_async_db)) -> BuildingService:
-    return BuildingService(building_repo=BuildingRepository(db=db))
+def get_building_service(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+    loaders: RequestLoaders = Depends(get_loaders),
+) -> BuildingService:
+    return BuildingService(
+        building_repo=BuildingRepository(db=db, read_db=read_db),
+        organization_repo=OrganizationRepository(db=db, read_db=read_db),
+        spatial_index=building_index,
+        cache=response_cache,
+        loaders=loaders,
+        activity_index=activity_index,
+    )
 
 
-def get_organization_service(db: AsyncSession = Depends(get_async_db)):
+def get_organization_service(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+    loaders: RequestLoaders = Depends(get_loaders),
+):
     return OrganizationService(
-        organization_repo=OrganizationRepository(db=db),
-        building_repo=BuildingRepository(db=db),
-        activity_repo=ActivityRepository(db=db),
+        organization_repo=OrganizationRepository(db=db, read_db=read_db),
+        building_repo=BuildingRepository(db=db, read_db=read_db),
+        activity_repo=ActivityRepository(db=db, read_db=read_db),
+        activity_tree=activity_tree_cache,
+        spatial_index=building_index,
+        cache=response_cache,
+        loaders=loaders,
+        activity_index=activity_index,
     )
 
 
-def get_phone_service(db: AsyncSession = Depends(get_async_db)):
+def get_phone_service(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+    loaders: RequestLoaders = Depends(get_loaders),
+):
     return PhoneService(
-        phone_repo=PhoneRepository(db=db),
-        organization_repo=OrganizationRepository(db=db),
+        phone_repo=PhoneRepository(db=db, read_db=read_db),
+        organization_repo=OrganizationRepository(db=db, read_db=read_db),
+        loaders=loaders,
+    )
+
+
+def get_import_service(
+    db: AsyncSession = Depends(get_async_db), read_db: AsyncSession = Depends(get_async_read_db)
+) -> ImportService:
+    return ImportService(
+        import_repo=ImportRepository(db=db),
+        activity_tree=activity_tree_cache,
+        spatial_index=building_index,
+        activity_index=activity_index,
     )
+
+
+def get_export_service(
+    db: AsyncSession = Depends(get_async_db), read_db: AsyncSession = Depends(get_async_read_db)
+) -> ExportService:
+    return ExportService(organization_repo=OrganizationRepository(db=db, read_db=read_db))
+
+
+def get_job_service(db: AsyncSession = Depends(get_async_db)) -> JobService:
+    return JobService(job_repo=JobRepository(db=db), queue=job_queue)
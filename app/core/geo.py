@@ -0,0 +1,35 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float]:
+    """Возвращает (lat_min, lat_max, lon_min, lon_max) прямоугольника, описанного вокруг круга поиска.
+
+    Если круг накрывает полюс или пересекает 180-й меридиан, долгота не ограничивается.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    lat_min, lat_max = lat - delta_lat, lat + delta_lat
+    if lat_min <= -90.0 or lat_max >= 90.0:
+        return max(lat_min, -90.0), min(lat_max, 90.0), -180.0, 180.0
+
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))
+    if ratio >= 1.0:
+        return lat_min, lat_max, -180.0, 180.0
+    delta_lon = math.degrees(math.asin(ratio))
+    lon_min, lon_max = lon - delta_lon, lon + delta_lon
+    if lon_min < -180.0 or lon_max > 180.0:
+        return lat_min, lat_max, -180.0, 180.0
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние между двумя точками на сфере по формуле гаверсинуса, в километрах"""
+    half_d_lat = math.radians(lat2 - lat1) / 2
+    half_d_lon = math.radians(lon2 - lon1) / 2
+    hav = (
+        math.sin(half_d_lat) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(half_d_lon) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(hav)))
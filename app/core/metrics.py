@@ -0,0 +1,286 @@
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.query_counter import current_query_stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "<unmatched>"
+
+Sample = tuple[str, dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    if labels:
+        name += "{" + ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items()) + "}"
+    if math.isinf(value):
+        return f"{name} {'+Inf' if value > 0 else '-Inf'}"
+    return f"{name} {int(value) if float(value).is_integer() else value}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in self._values.items():
+            yield self.name, dict(zip(self.labelnames, key, strict=True)), value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Для каждого набора меток: попадания в корзины (не накопленные), сумма и количество
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self) -> Iterator[Sample]:
+        for key, (counts, total, count) in self._values.items():
+            labels = dict(zip(self.labelnames, key, strict=True))
+            cumulative = 0
+            for bound, hits in zip(self.buckets, counts, strict=True):
+                cumulative += hits
+                yield f"{self.name}_bucket", {**labels, "le": str(bound)}, cumulative
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class CallbackMetric:
+    """Метрика, значения которой читаются в момент выдачи /metrics (состояние пула и т.п.)"""
+
+    def __init__(self, name: str, documentation: str, type: str, callback: Callable[[], Iterable[Sample]]):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.callback = callback
+
+    def samples(self) -> Iterator[Sample]:
+        yield from self.callback()
+
+
+class MetricsRegistry:
+    """Метрики процесса в текстовом формате Prometheus; у каждого воркера uvicorn свои значения"""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | CallbackMetric] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(_format_sample(*sample) for sample in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route", "status")
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    "http_request_db_queries", "SQL queries per request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request", ("method", "route")
+)
+REQUEST_SERIALIZATION_SECONDS = registry.histogram(
+    "http_request_serialization_seconds", "Time spent serializing the response body", ("method", "route")
+)
+CACHE_REQUESTS = registry.counter("cache_requests_total", "Cache lookups by result", ("cache", "result"))
+EVENT_LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay of a scheduled wakeup behind its deadline",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+_serialization_seconds: ContextVar[list[float] | None] = ContextVar("serialization_seconds", default=None)
+
+
+@contextmanager
+def serialization_timer() -> Iterator[None]:
+    """Добавляет время блока к времени сериализации текущего запроса"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        accumulated = _serialization_seconds.get()
+        if accumulated is not None:
+            accumulated[0] += time.perf_counter() - started
+
+
+def current_serialization_seconds() -> float | None:
+    """Время сериализации текущего запроса на данный момент; None вне MetricsMiddleware"""
+    accumulated = _serialization_seconds.get()
+    return accumulated[0] if accumulated is not None else None
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """ORJSONResponse, учитывающий кодирование тела во времени сериализации запроса"""
+
+    def render(self, content) -> bytes:
+        with serialization_timer():
+            return super().render(content)
+
+
+def route_template(scope: Scope) -> str:
+    """Шаблон пути сработавшего маршрута, чтобы метки не зависели от id в пути"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Маршруты Starlette без параметров (/metrics, /docs) не кладут себя в scope
+    if scope.get("endpoint") is not None:
+        return scope["path"]
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Гистограммы задержки, числа и времени SQL-запросов и времени сериализации по маршрутам.
+
+    Должен располагаться внутри QueryCountMiddleware: счетчики SQL-запросов берутся из него.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        serialization = [0.0]
+        token = _serialization_seconds.set(serialization)
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _serialization_seconds.reset(token)
+            labels = {"method": scope["method"], "route": route_template(scope)}
+            REQUEST_DURATION.observe(elapsed, status=str(status_code), **labels)
+            REQUEST_SERIALIZATION_SECONDS.observe(serialization[0], **labels)
+            queries = current_query_stats()
+            if queries is not None:
+                REQUEST_DB_QUERIES.observe(queries.count, **labels)
+                REQUEST_DB_SECONDS.observe(queries.seconds, **labels)
+
+
+def install_pool_metrics(engines: dict[str, AsyncEngine | None]) -> None:
+    """Состояние пулов соединений (см. InstrumentedAsyncPool) с меткой pool"""
+    pools = {name: engine.pool for name, engine in engines.items() if engine is not None}
+
+    def connections() -> Iterator[Sample]:
+        for name, pool in pools.items():
+            yield "db_pool_connections", {"pool": name, "state": "checked_out"}, pool.checkedout()
+            yield "db_pool_connections", {"pool": name, "state": "idle"}, pool.checkedin()
+            yield "db_pool_connections", {"pool": name, "state": "overflow"}, max(pool.overflow(), 0)
+
+    def capacity() -> Iterator[Sample]:
+        for name, pool in pools.items():
+            yield "db_pool_capacity", {"pool": name}, pool.size() + max(pool._max_overflow, 0)
+
+    def counters(metric: str, attribute: str) -> Callable[[], Iterator[Sample]]:
+        def samples() -> Iterator[Sample]:
+            for name, pool in pools.items():
+                yield metric, {"pool": name}, getattr(pool, attribute)
+
+        return samples
+
+    registry.register(
+        CallbackMetric("db_pool_connections", "Pool connections by state", "gauge", connections)
+    )
+    registry.register(CallbackMetric("db_pool_capacity", "pool_size plus max_overflow", "gauge", capacity))
+    for metric, attribute, documentation in (
+        ("db_pool_checkouts_total", "checkouts", "Connection checkouts"),
+        ("db_pool_timeouts_total", "timeouts", "Checkout timeouts"),
+        ("db_pool_wait_seconds_total", "wait_total", "Time spent waiting for a free connection"),
+    ):
+        registry.register(CallbackMetric(metric, documentation, "counter", counters(metric, attribute)))
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Измеряет, насколько позже срока просыпается задача: занятость event loop синхронным кодом"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(loop.time() - started - interval, 0.0))
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,217 @@
+import hmac
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.conditional import VALIDATOR_HEADERS_STATE
+from app.core.metrics import current_serialization_seconds, route_template
+from app.core.query_counter import current_query_stats
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+ADMIN_KEY_HEADER = "x-admin-key"
+PROFILE_MODES = ("timing", "explain")
+
+
+class RequestProfile:
+    """Маршрут запроса для журнала медленных запросов и, в режиме explain, трасса его SQL-запросов"""
+
+    __slots__ = ("scope", "mode", "queries")
+
+    def __init__(self, scope: Scope, mode: str | None = None):
+        self.scope = scope
+        self.mode = mode
+        self.queries: list[dict] = []
+
+
+_profile: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def redact_parameters(parameters, executemany: bool = False):
+    """Параметры запроса без значений: только их типы"""
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, list | tuple):
+        return [type(value).__name__ for value in parameters]
+    return parameters
+
+
+EXPLAIN_SAVEPOINT = "sql_profiler_explain"
+
+
+def _explain(conn, statement: str, parameters) -> list | str:
+    """
+    План EXPLAIN ANALYZE повторным выполнением запроса на том же соединении.
+
+    Вызывается только для SELECT: ANALYZE выполняет запрос по-настоящему.
+    Запрос идет мимо SQLAlchemy, поэтому не попадает ни в счетчики, ни в трассу.
+    EXPLAIN выполняется в точке сохранения: его ошибка (statement_timeout, отмена)
+    откатывается до нее и не прерывает транзакцию самого запроса.
+    """
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+            plan = cursor.fetchone()[0]
+        except Exception as e:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            return f"EXPLAIN failed: {e}"
+        cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.close()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def install_sql_profiler(engine: AsyncEngine, slow_query_ms: int) -> None:
+    """
+    Журнал медленных запросов и трасса запросов для профилирования по заголовку X-Profile.
+
+    Запрос длительностью от slow_query_ms пишется в лог одной JSON-строкой: текст, типы
+    параметров (без значений), длительность, число строк и шаблон маршрута.
+    slow_query_ms=0 выключает журнал.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def finish_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("profiler_started")
+        if not started:
+            return
+        duration_ms = (time.perf_counter() - started.pop()) * 1000
+        profile = _profile.get()
+        slow = 0 < slow_query_ms <= duration_ms
+        if not slow and (profile is None or profile.mode != "explain"):
+            return
+        record = {
+            "statement": statement,
+            "parameters": redact_parameters(parameters, executemany),
+            "duration_ms": round(duration_ms, 3),
+            "rowcount": cursor.rowcount,
+            "route": route_template(profile.scope) if profile is not None else None,
+        }
+        if slow:
+            logger.warning("slow query %s", json.dumps(record, ensure_ascii=False, default=str))
+        if profile is not None and profile.mode == "explain":
+            # Серверные курсоры (потоковая выдача) еще не дочитаны, их не перезапускаем
+            if not executemany and not getattr(cursor, "server_side", False):
+                if statement.lstrip().upper().startswith("SELECT"):
+                    record["plan"] = _explain(conn, statement, parameters)
+            profile.queries.append(record)
+
+
+def server_timing(started: float) -> str:
+    """Server-Timing: время SQL-запросов, сериализации и всего запроса в мс"""
+    entries = []
+    stats = current_query_stats()
+    if stats is not None:
+        entries.append(f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+    serialization = current_serialization_seconds()
+    if serialization is not None:
+        entries.append(f"serialization;dur={serialization * 1000:.1f}")
+    entries.append(f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class SQLProfilerMiddleware:
+    """
+    Профилирование отдельного запроса по заголовку X-Profile с ключом администратора X-Admin-Key.
+
+    X-Profile: timing - добавляет к ответу Server-Timing (SQL, сериализация, весь запрос).
+    X-Profile: explain - вместо тела ответа отдает JSON-трассу: исходный статус, Server-Timing
+    и каждый SQL-запрос с длительностью и планом EXPLAIN ANALYZE для SELECT.
+    Без ADMIN_API_KEY профилирование недоступно. Должен располагаться внутри
+    QueryCountMiddleware и MetricsMiddleware: время SQL и сериализации берется из них.
+    """
+
+    def __init__(self, app: ASGIApp, admin_api_key: str | None = None):
+        self.app = app
+        self.admin_api_key = admin_api_key
+
+    def _authorized(self, headers: Headers) -> bool:
+        admin_key = headers.get(ADMIN_KEY_HEADER)
+        return (
+            self.admin_api_key is not None
+            and admin_key is not None
+            and hmac.compare_digest(admin_key.encode(), self.admin_api_key.encode())
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        mode = headers.get(PROFILE_HEADER)
+        if mode is not None:
+            if not self._authorized(headers):
+                response = JSONResponse({"detail": "Profiling requires a valid X-Admin-Key"}, status_code=403)
+                await response(scope, receive, send)
+                return
+            if mode not in PROFILE_MODES:
+                response = JSONResponse(
+                    {"detail": f"X-Profile must be one of: {', '.join(PROFILE_MODES)}"}, status_code=400
+                )
+                await response(scope, receive, send)
+                return
+        profile = RequestProfile(scope, mode)
+        token = _profile.set(profile)
+        started = time.perf_counter()
+        try:
+            if mode == "explain":
+                await self._trace(scope, receive, send, profile, started)
+            elif mode == "timing":
+
+                async def send_with_timing(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        MutableHeaders(scope=message)["Server-Timing"] = server_timing(started)
+                    await send(message)
+
+                await self.app(scope, receive, send_with_timing)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            _profile.reset(token)
+
+    async def _trace(
+        self, scope: Scope, receive: Receive, send: Send, profile: RequestProfile, started: float
+    ) -> None:
+        status_code = 500
+        body_size = 0
+
+        async def discard_body(message: Message) -> None:
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+
+        await self.app(scope, receive, discard_body)
+        timing = server_timing(started)
+        # Трасса не является представлением ресурса: без ETag и кеширования
+        scope.get("state", {}).pop(VALIDATOR_HEADERS_STATE, None)
+        response = JSONResponse(
+            {
+                "status_code": status_code,
+                "body_size": body_size,
+                "server_timing": timing,
+                "queries": profile.queries,
+            },
+            headers={"Server-Timing": timing, "Cache-Control": "no-store"},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,81 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Число и суммарное время SQL-запросов одного HTTP-запроса"""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def install_query_counter(engine: AsyncEngine) -> None:
+    """Считает SQL-запросы, выполненные в рамках текущего HTTP-запроса, и время их выполнения"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def time_query(conn, cursor, statement, parameters, context, executemany):
+        stats = _query_stats.get()
+        started = conn.info.get("query_started")
+        if stats is not None and started:
+            stats.seconds += time.perf_counter() - started.pop()
+
+
+def current_query_stats() -> QueryStats | None:
+    return _query_stats.get()
+
+
+def current_query_count() -> int:
+    stats = _query_stats.get()
+    return stats.count if stats is not None else 0
+
+
+class QueryCountMiddleware:
+    """Добавляет количество SQL-запросов в заголовок X-DB-Query-Count и в лог"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+
+        async def send_with_count(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-DB-Query-Count"] = str(stats.count)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _query_stats.reset(token)
+            logger.info(
+                "%s %s: %d SQL queries, %.1f ms",
+                scope["method"],
+                scope["path"],
+                stats.count,
+                stats.seconds * 1000,
+            )
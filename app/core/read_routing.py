@@ -0,0 +1,78 @@
+import time
+from collections.abc import Callable
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PRIMARY_COOKIE = "primary_until"
+PRIMARY_HEADER = "X-Primary-Until"
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+# Эндпоинты не-GET методов, которые только читают (пакетные выборки по id в теле POST)
+_read_only_endpoints: set[Callable] = set()
+
+
+def read_only(endpoint: Callable) -> Callable:
+    """Помечает эндпоинт как чтение: реплика для сессии чтения и без закрепления за основной БД"""
+    _read_only_endpoints.add(endpoint)
+    return endpoint
+
+
+def is_read_request(connection: HTTPConnection) -> bool:
+    """GET/HEAD или маршрут, помеченный read_only; маршрут известен только после роутинга"""
+    if connection.scope["method"] in READ_METHODS:
+        return True
+    route = connection.scope.get("route")
+    return getattr(route, "endpoint", None) in _read_only_endpoints
+
+
+def _parse_deadline(value: str | None) -> float:
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+def is_pinned_to_primary(connection: HTTPConnection) -> bool:
+    """Клиент недавно что-то записал и должен читать с основной БД, пока реплика догоняет"""
+    deadline = max(
+        _parse_deadline(connection.cookies.get(PRIMARY_COOKIE)),
+        _parse_deadline(connection.headers.get(PRIMARY_HEADER)),
+    )
+    return deadline > time.time()
+
+
+class ReadYourWritesMiddleware:
+    """
+    После успешного изменяющего запроса закрепляет клиента за основной БД на window_seconds.
+
+    Срок (unix time) отдается в cookie primary_until и в заголовке X-Primary-Until;
+    клиенты без cookie могут возвращать его в одноименном заголовке запроса.
+    """
+
+    def __init__(self, app: ASGIApp, window_seconds: int):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or self.window_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+                and not is_read_request(HTTPConnection(scope))
+            ):
+                deadline = f"{time.time() + self.window_seconds:.3f}"
+                headers = MutableHeaders(scope=message)
+                headers[PRIMARY_HEADER] = deadline
+                headers.append(
+                    "Set-Cookie",
+                    f"{PRIMARY_COOKIE}={deadline}; Max-Age={self.window_seconds}; Path=/; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
@@ -0,0 +1,101 @@
+import math
+from array import array
+from collections.abc import Iterable
+
+from app.core.config import settings
+from app.core.geo import bounding_box, haversine_km
+
+
+class BuildingGridIndex:
+    """Сеточный индекс координат активных зданий в памяти процесса.
+
+    Координаты хранятся в массивах array('d'), ячейка сетки размером cell_degrees
+    хранит позиции зданий в этих массивах. Индекс собирается при старте приложения
+    и поддерживается в актуальном состоянии сервисом зданий.
+    """
+
+    def __init__(self, cell_degrees: float = 0.01):
+        self.cell_degrees = cell_degrees
+        self.ready = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ids = array("i")
+        self._lat = array("d")
+        self._lon = array("d")
+        self._positions: dict[int, int] = {}
+        self._cells: dict[tuple[int, int], list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def load(self, buildings: Iterable[tuple[int, float, float]]) -> None:
+        """Полностью пересобирает индекс из троек (id, latitude, longitude)"""
+        self._reset()
+        for building_id, lat, lon in buildings:
+            self.upsert(building_id, lat, lon)
+        self.ready = True
+
+    def upsert(self, building_id: int, lat: float, lon: float) -> None:
+        lat, lon = float(lat), float(lon)
+        position = self._positions.get(building_id)
+        if position is None:
+            position = len(self._ids)
+            self._ids.append(building_id)
+            self._lat.append(lat)
+            self._lon.append(lon)
+            self._positions[building_id] = position
+        else:
+            self._cells[self._cell(self._lat[position], self._lon[position])].remove(position)
+            self._lat[position] = lat
+            self._lon[position] = lon
+        self._cells.setdefault(self._cell(lat, lon), []).append(position)
+
+    def remove(self, building_id: int) -> None:
+        position = self._positions.pop(building_id, None)
+        if position is None:
+            return
+        cell = self._cell(self._lat[position], self._lon[position])
+        self._cells[cell].remove(position)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def _candidates(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> Iterable[int]:
+        row_min, col_min = self._cell(lat_min, lon_min)
+        row_max, col_max = self._cell(lat_max, lon_max)
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self._cells):
+            for (row, col), positions in self._cells.items():
+                if row_min <= row <= row_max and col_min <= col <= col_max:
+                    yield from positions
+            return
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                yield from self._cells.get((row, col), ())
+
+    def query_rectangle(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> list[int]:
+        """id зданий внутри прямоугольника"""
+        return [
+            self._ids[position]
+            for position in self._candidates(lat_min, lat_max, lon_min, lon_max)
+            if lat_min <= self._lat[position] <= lat_max and lon_min <= self._lon[position] <= lon_max
+        ]
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> list[tuple[int, float]]:
+        """Пары (id здания, расстояние в км) внутри круга, от ближайшего здания к дальнему"""
+        hits = []
+        for position in self._candidates(*bounding_box(lat, lon, radius_km)):
+            distance = haversine_km(lat, lon, self._lat[position], self._lon[position])
+            if distance <= radius_km:
+                hits.append((self._ids[position], distance))
+        hits.sort(key=lambda hit: (hit[1], hit[0]))
+        return hits
+
+
+building_index = (
+    BuildingGridIndex(cell_degrees=settings.SPATIAL_INDEX_CELL_DEGREES)
+    if settings.SPATIAL_INDEX_ENABLED
+    else None
+)
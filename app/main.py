@@ -1,19 +1,157 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import Depends, FastAPI
 
 from app.api.routers import (
     activity_router,
     building_router,
+    export_router,
+    internal_router,
+    job_router,
     orginazation_router,
     phone_router,
 )
+from app.core.activity_index import activity_index
+from app.core.cache import response_cache, warn_if_process_local
+from app.core.compression import CompressionMiddleware
+from app.core.conditional import ValidatorHeadersMiddleware
+from app.core.config import settings
+from app.core.database import async_session_maker, engine, read_engine
 from app.core.dependencies.auth import verify_apikey
+from app.core.metrics import (
+    MetricsMiddleware,
+    TimedORJSONResponse,
+    install_pool_metrics,
+    metrics_endpoint,
+    monitor_event_loop_lag,
+)
+from app.core.profiling import SQLProfilerMiddleware, install_sql_profiler
+from app.core.query_counter import QueryCountMiddleware, install_query_counter
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.spatial_index import building_index
+from app.repositories import BuildingRepository, OrganizationRepository, TableVersionRepository
+from app.services import BuildingService
+from app.services.jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_building_index() -> None:
+    async with async_session_maker() as db:
+        building_service = BuildingService(
+            building_repo=BuildingRepository(db=db),
+            organization_repo=OrganizationRepository(db=db),
+            spatial_index=building_index,
+        )
+        await building_service.rebuild_spatial_index()
+
+
+async def rebuild_activity_index() -> None:
+    async with async_session_maker() as db:
+        activity_index.load(await OrganizationRepository(db=db).get_activity_links())
+
+
+async def compact_table_versions() -> None:
+    async with async_session_maker() as db:
+        await TableVersionRepository(db=db).compact()
 
-app = FastAPI(title="Organization app - API", version="0.1.0", dependencies=[Depends(verify_apikey)])
+
+async def run_periodically(run: Callable[[], Awaitable[None]], interval: int) -> None:
+    """
+    Периодически выполняет run: пересборку индексов из изменений других воркеров, свертку версий,
+    возврат потерянных фоновых задач
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run()
+        except Exception:
+            logger.exception("periodic task %s failed", run.__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warn_if_process_local(response_cache)
+    background_tasks = []
+    if building_index is not None:
+        await rebuild_building_index()
+        if settings.SPATIAL_INDEX_REFRESH_SECONDS > 0:
+            background_tasks.append(
+                asyncio.create_task(
+                    run_periodically(rebuild_building_index, settings.SPATIAL_INDEX_REFRESH_SECONDS)
+                )
+            )
+    if activity_index is not None:
+        await rebuild_activity_index()
+        if settings.ACTIVITY_INDEX_REFRESH_SECONDS > 0:
+            background_tasks.append(
+                asyncio.create_task(
+                    run_periodically(rebuild_activity_index, settings.ACTIVITY_INDEX_REFRESH_SECONDS)
+                )
+            )
+    if settings.TABLE_VERSIONS_COMPACT_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_periodically(compact_table_versions, settings.TABLE_VERSIONS_COMPACT_SECONDS)
+            )
+        )
+    if settings.METRICS_ENABLED and settings.METRICS_LOOP_LAG_INTERVAL_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(monitor_event_loop_lag(settings.METRICS_LOOP_LAG_INTERVAL_SECONDS))
+        )
+    await job_queue.start()
+    if settings.JOB_RECOVERY_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(run_periodically(job_queue.recover, settings.JOB_RECOVERY_SECONDS))
+        )
+    yield
+    await job_queue.stop()
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+app = FastAPI(
+    title="Organization app - API",
+    version="0.1.0",
+    dependencies=[Depends(verify_apikey)],
+    lifespan=lifespan,
+    default_response_class=TimedORJSONResponse,
+)
+
+# Счетчик регистрируется раньше профилировщика: время EXPLAIN ANALYZE не входит во время запросов
+install_query_counter(engine)
+install_sql_profiler(engine, settings.DB_SLOW_QUERY_MS)
+if read_engine is not None:
+    install_query_counter(read_engine)
+    install_sql_profiler(read_engine, settings.DB_SLOW_QUERY_MS)
+app.add_middleware(SQLProfilerMiddleware, admin_api_key=settings.ADMIN_API_KEY)
+if settings.METRICS_ENABLED:
+    install_pool_metrics({"primary": engine, "replica": read_engine})
+    # Вне dependencies приложения: /metrics доступен сборщику метрик без API-ключа
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryCountMiddleware)
+app.add_middleware(ValidatorHeadersMiddleware)
+app.add_middleware(ReadYourWritesMiddleware, window_seconds=settings.READ_YOUR_WRITES_SECONDS)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
 
 app.include_router(building_router)
 app.include_router(phone_router)
 app.include_router(activity_router)
 app.include_router(orginazation_router)
+app.include_router(export_router)
+app.include_router(internal_router)
+app.include_router(job_router)
 
 
 @app.get("/", tags=["greet"])
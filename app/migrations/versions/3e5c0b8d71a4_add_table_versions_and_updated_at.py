@@ -0,0 +1,46 @@
+"""add table versions and updated_at
+
+Revision ID: 3e5c0b8d71a4
+Revises: 9672810435f6
+Create Date: 2026-10-17 15:20:11.482913
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3e5c0b8d71a4"
+down_revision: str | Sequence[str] | None = "9672810435f6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+VERSIONED_TABLES = ("activities", "buildings", "organizations", "phones")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "table_versions",
+        sa.Column("table_name", sa.String(length=63), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("table_name"),
+    )
+    for table_name in VERSIONED_TABLES:
+        op.add_column(
+            table_name,
+            sa.Column(
+                "updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False
+            ),
+        )
+        op.execute(f"INSERT INTO table_versions (table_name, version) VALUES ('{table_name}', 1)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in VERSIONED_TABLES:
+        op.drop_column(table_name, "updated_at")
+    op.drop_table("table_versions")
@@ -0,0 +1,78 @@
+"""add activity closure table
+
+Revision ID: 5b17ed7e0904
+Revises: 66f389956b23
+Create Date: 2026-10-17 12:31:08.207593
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b17ed7e0904"
+down_revision: str | Sequence[str] | None = "66f389956b23"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "activity_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["ancestor_id"],
+            ["activities.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["descendant_id"],
+            ["activities.id"],
+        ),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index(
+        op.f("ix_activity_closure_descendant_id"), "activity_closure", ["descendant_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_organization_activities_activity_id"),
+        "organization_activities",
+        ["activity_id"],
+        unique=False,
+    )
+    # Связи через удаленные деятельности не строятся: их поддеревья отсоединены от предков
+    op.execute(
+        """
+        INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM activities
+            UNION ALL
+            SELECT tree.ancestor_id, child.id, tree.depth + 1
+            FROM tree JOIN activities AS child ON child.parent_id = tree.descendant_id
+            WHERE child.is_active
+        )
+        SELECT ancestor_id, descendant_id, depth FROM tree
+        """
+    )
+    op.execute(
+        """
+        WITH RECURSIVE levels (id, level) AS (
+            SELECT id, 1 FROM activities WHERE parent_id IS NULL
+            UNION ALL
+            SELECT child.id, levels.level + 1
+            FROM levels JOIN activities AS child ON child.parent_id = levels.id
+        )
+        UPDATE activities SET level = levels.level FROM levels WHERE activities.id = levels.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_organization_activities_activity_id"), table_name="organization_activities")
+    op.drop_index(op.f("ix_activity_closure_descendant_id"), table_name="activity_closure")
+    op.drop_table("activity_closure")
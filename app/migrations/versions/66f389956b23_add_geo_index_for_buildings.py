@@ -0,0 +1,38 @@
+"""add geo index for buildings
+
+Revision ID: 66f389956b23
+Revises: 5af0ee4e4b96
+Create Date: 2026-10-17 10:12:41.518204
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "66f389956b23"
+down_revision: str | Sequence[str] | None = "5af0ee4e4b96"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_buildings_active_lat_lon",
+        "buildings",
+        ["latitude", "longitude"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+    op.create_index(op.f("ix_organizations_building_id"), "organizations", ["building_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_organizations_building_id"), table_name="organizations")
+    op.drop_index(
+        "ix_buildings_active_lat_lon", table_name="buildings", postgresql_where=sa.text("is_active")
+    )
@@ -0,0 +1,35 @@
+"""add trigram index for organization names
+
+Revision ID: 9672810435f6
+Revises: 5b17ed7e0904
+Create Date: 2026-10-17 13:02:44.106392
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9672810435f6"
+down_revision: str | Sequence[str] | None = "5b17ed7e0904"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_organizations_name_trgm",
+        "organizations",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_organizations_name_trgm", table_name="organizations", postgresql_using="gin")
@@ -0,0 +1,114 @@
+"""add deleted_at for cascade soft delete
+
+Revision ID: d2a7c4f9e316
+Revises: 8b4f2d6e1a57
+Create Date: 2026-10-17 20:05:37.640192
+
+Снятые до этой миграции записи приводятся к инвариантам каскадного удаления:
+активные организации снятых зданий и активные телефоны снятых организаций снимаются,
+активные деятельности под снятым родителем становятся корнями. Понижение версии
+удаляет колонки и индексы, но не возвращает снятые миграцией записи.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d2a7c4f9e316"
+down_revision: str | Sequence[str] | None = "8b4f2d6e1a57"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SOFT_DELETE_TABLES = ("activities", "buildings", "organizations", "phones")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in SOFT_DELETE_TABLES:
+        op.add_column(table_name, sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Снятые ранее здания получают метку этой миграции, ее же получают снимаемые с ними организации.
+    # Снятые ранее организации получают свой updated_at: он отличается от метки миграции,
+    # поэтому восстановление здания не вернет организации, снятые до него по отдельности
+    op.execute("UPDATE buildings SET deleted_at = now() WHERE NOT is_active")
+    op.execute("UPDATE organizations SET deleted_at = updated_at WHERE NOT is_active")
+    op.execute(
+        """
+        UPDATE organizations o SET is_active = false, deleted_at = b.deleted_at
+        FROM buildings b
+        WHERE b.id = o.building_id AND NOT b.is_active AND o.is_active
+        """
+    )
+    op.execute(
+        """
+        UPDATE phones p SET is_active = false, deleted_at = o.deleted_at
+        FROM organizations o
+        WHERE o.id = p.organization_id AND NOT o.is_active AND p.is_active
+        """
+    )
+
+    # Прежнее удаление деятельности отсоединяло поддерево от предков только по корню снятого узла:
+    # дети оставались активными, с parent_id на снятого родителя и связями с ним в замыкании
+    op.execute(
+        """
+        DELETE FROM activity_closure c
+        USING activities a, activities p, activity_closure s
+        WHERE a.parent_id = p.id AND a.is_active AND NOT p.is_active
+            AND s.ancestor_id = a.id AND c.descendant_id = s.descendant_id
+            AND NOT EXISTS (
+                SELECT 1 FROM activity_closure i
+                WHERE i.ancestor_id = a.id AND i.descendant_id = c.ancestor_id
+            )
+        """
+    )
+    op.execute(
+        """
+        UPDATE activities a SET parent_id = NULL
+        FROM activities p
+        WHERE a.parent_id = p.id AND a.is_active AND NOT p.is_active
+        """
+    )
+    op.execute(
+        """
+        UPDATE activities a SET level = d.depth + 1
+        FROM (
+            SELECT descendant_id, max(depth) AS depth FROM activity_closure GROUP BY descendant_id
+        ) d
+        WHERE d.descendant_id = a.id AND a.level <> d.depth + 1
+        """
+    )
+    op.execute(
+        "UPDATE table_versions SET version = version + 1, updated_at = now() "
+        f"WHERE table_name IN ({', '.join(repr(table_name) for table_name in SOFT_DELETE_TABLES)})"
+    )
+
+    op.create_index(
+        "ix_organizations_active_building_id",
+        "organizations",
+        ["building_id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+    op.create_index(
+        "ix_phones_active_organization_id",
+        "phones",
+        ["organization_id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_phones_active_organization_id", table_name="phones", postgresql_where=sa.text("is_active")
+    )
+    op.drop_index(
+        "ix_organizations_active_building_id",
+        table_name="organizations",
+        postgresql_where=sa.text("is_active"),
+    )
+    for table_name in SOFT_DELETE_TABLES:
+        op.drop_column(table_name, "deleted_at")
@@ -0,0 +1,32 @@
+"""add heartbeat_at to jobs
+
+Revision ID: e5b8c3a1f742
+Revises: d2a7c4f9e316
+Create Date: 2026-10-17 21:14:52.306418
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b8c3a1f742"
+down_revision: str | Sequence[str] | None = "d2a7c4f9e316"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("jobs", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_jobs_running", "jobs", ["id"], unique=False, postgresql_where=sa.text("status = 'running'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_jobs_running", table_name="jobs", postgresql_where=sa.text("status = 'running'"))
+    op.drop_column("jobs", "heartbeat_at")
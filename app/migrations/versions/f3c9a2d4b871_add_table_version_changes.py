@@ -0,0 +1,52 @@
+"""add table version changes
+
+Revision ID: f3c9a2d4b871
+Revises: e5b8c3a1f742
+Create Date: 2026-10-17 22:03:18.524907
+
+Записи больше не увеличивают table_versions.version под блокировкой строки, а добавляют
+строки в table_version_changes; фоновая задача сворачивает их в table_versions.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c9a2d4b871"
+down_revision: str | Sequence[str] | None = "e5b8c3a1f742"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "table_version_changes",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("table_name", sa.String(length=63), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_table_version_changes_table_name"), "table_version_changes", ["table_name"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Несвернутые изменения учитываются в версиях, чтобы ETag не вернулись к прежним значениям
+    op.execute(
+        """
+        UPDATE table_versions v
+        SET version = v.version + c.changes, updated_at = greatest(v.updated_at, c.changed_at)
+        FROM (
+            SELECT table_name, count(*) AS changes, max(changed_at) AS changed_at
+            FROM table_version_changes GROUP BY table_name
+        ) c
+        WHERE c.table_name = v.table_name
+        """
+    )
+    op.drop_index(op.f("ix_table_version_changes_table_name"), table_name="table_version_changes")
+    op.drop_table("table_version_changes")
@@ -1,7 +1,19 @@
 from app.models.activity import Activity
-from app.models.associations_tables import organization_activities
+from app.models.associations_tables import activity_closure, organization_activities
 from app.models.building import Building
+from app.models.job import Job
 from app.models.organization import Organization
 from app.models.phone import Phone
+from app.models.table_version import TableVersion, TableVersionChange
 
-__all__ = ["Activity", "Building", "Organization", "Phone", "organization_activities"]
+__all__ = [
+    "Activity",
+    "Building",
+    "Job",
+    "Organization",
+    "Phone",
+    "TableVersion",
+    "TableVersionChange",
+    "activity_closure",
+    "organization_activities",
+]
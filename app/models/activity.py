@@ -1,7 +1,8 @@
 # ruff:noqa:F821
+from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -15,6 +16,10 @@ class Activity(Base):
     name: Mapped[str] = mapped_column(String(155), nullable=False)
     level: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
     parent_id: Mapped[int | None] = mapped_column(ForeignKey("activities.id"), nullable=True)
 
     organizations: Mapped[list["Organization"]] = relationship(
@@ -6,5 +6,16 @@ organization_activities = Table(
     "organization_activities",
     Base.metadata,
     Column("organization_id", Integer, ForeignKey("organizations.id"), primary_key=True),
-    Column("activity_id", Integer, ForeignKey("activities.id"), primary_key=True),
+    Column("activity_id", Integer, ForeignKey("activities.id"), primary_key=True, index=True),
+)
+
+# Таблица замыкания дерева деятельностей: строка на каждую пару (предок, потомок),
+# включая саму деятельность с depth=0. Поддеревья удаленных деятельностей отсоединяются
+# от предков, поэтому выборка по ancestor_id возвращает только достижимых активных потомков.
+activity_closure = Table(
+    "activity_closure",
+    Base.metadata,
+    Column("ancestor_id", Integer, ForeignKey("activities.id"), primary_key=True),
+    Column("descendant_id", Integer, ForeignKey("activities.id"), primary_key=True, index=True),
+    Column("depth", Integer, nullable=False),
 )
@@ -1,5 +1,7 @@
 # ruff:noqa:F821
-from sqlalchemy import Boolean, Integer, Numeric, String
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Index, Integer, Numeric, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -7,11 +9,18 @@ from app.core.database import Base
 
 class Building(Base):
     __tablename__ = "buildings"
+    __table_args__ = (
+        Index("ix_buildings_active_lat_lon", "latitude", "longitude", postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     address: Mapped[str] = mapped_column(String(155), nullable=False, unique=True)
     latitude: Mapped[float] = mapped_column(Numeric(9, 6))
     longitude: Mapped[float] = mapped_column(Numeric(9, 6))
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     organizations: Mapped[list["Organization"]] = relationship("Organization", back_populates="building")
@@ -1,5 +1,7 @@
 # ruff:noqa:F821
-from sqlalchemy import Boolean, ForeignKey, Integer, String
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -8,12 +10,25 @@ from app.models.associations_tables import organization_activities
 
 class Organization(Base):
     __tablename__ = "organizations"
+    __table_args__ = (
+        Index(
+            "ix_organizations_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index("ix_organizations_active_building_id", "building_id", postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(155), nullable=False, unique=True)
     phones: Mapped[list["Phone"]] = relationship("Phone", back_populates="organization")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
-    building_id: Mapped[int] = mapped_column(Integer, ForeignKey("buildings.id"), nullable=False)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+    building_id: Mapped[int] = mapped_column(Integer, ForeignKey("buildings.id"), nullable=False, index=True)
     building: Mapped["Building"] = relationship("Building", back_populates="organizations")
     activities: Mapped[list["Activity"]] = relationship(
         "Activity", secondary=organization_activities, back_populates="organizations"
@@ -1,11 +1,22 @@
 from app.repositories.activities import ActivityRepository
 from app.repositories.buildings import BuildingRepository
+from app.repositories.imports import ImportRepository
+from app.repositories.jobs import JobRepository
+from app.repositories.loaders import EntityLoader, LoaderStats, RequestLoaders
 from app.repositories.organizations import OrganizationRepository
 from app.repositories.phones import PhoneRepository
+from app.repositories.versions import TableVersionRepository, bump_table_versions
 
 __all__ = [
     "ActivityRepository",
     "BuildingRepository",
     "PhoneRepository",
     "OrganizationRepository",
+    "ImportRepository",
+    "JobRepository",
+    "EntityLoader",
+    "LoaderStats",
+    "RequestLoaders",
+    "TableVersionRepository",
+    "bump_table_versions",
 ]
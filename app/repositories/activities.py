@@ -1,54 +1,232 @@
 # ruff:noqa:E712
-from sqlalchemy import select, update
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    any_,
+    bindparam,
+    delete,
+    exists,
+    func,
+    insert,
+    or_,
+    select,
+    true,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.models import (
     Activity as ActivityModel,
 )
+from app.models import (
+    activity_closure,
+)
+from app.repositories.soft_delete import deactivate, reactivate, restore_row
+from app.repositories.versions import bump_table_versions
 from app.schemas import ActivityCreate
 
 
 class ActivityRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
         self.db = db
+        self.read_db = read_db or db
 
-    async def get_all(self) -> list[ActivityModel]:
-        result = await self.db.scalars(select(ActivityModel).where(ActivityModel.is_active == True))
+    async def get_all(self, primary: bool = False) -> list[ActivityModel]:
+        """primary=True - чтение с основной БД, даже если для запроса выбрана реплика"""
+        db = self.db if primary else self.read_db
+        result = await db.scalars(select(ActivityModel).where(ActivityModel.is_active == True))
         return result.all()
 
     async def get_by_id(self, activity_id: int) -> ActivityModel | None:
-        result = await self.db.scalars(
+        result = await self.read_db.scalars(
             select(ActivityModel).where(ActivityModel.id == activity_id, ActivityModel.is_active == True)
         )
         return result.first()
 
+    async def get_by_ids(self, activity_ids: list[int]) -> list[ActivityModel]:
+        """Активные записи с id из списка одним запросом, в произвольном порядке"""
+        ids = bindparam("activity_ids", activity_ids, type_=ARRAY(Integer))
+        result = await self.read_db.scalars(
+            select(ActivityModel).where(ActivityModel.id == any_(ids), ActivityModel.is_active == True)
+        )
+        return result.all()
+
     async def get_by_name(self, name: str) -> ActivityModel | None:
-        result = await self.db.scalars(
+        result = await self.read_db.scalars(
             select(ActivityModel).where(ActivityModel.name == name, ActivityModel.is_active == True)
         )
         return result.first()
 
+    async def is_descendant(self, ancestor_id: int, descendant_id: int) -> bool:
+        result = await self.read_db.scalar(
+            select(
+                select(activity_closure)
+                .where(
+                    activity_closure.c.ancestor_id == ancestor_id,
+                    activity_closure.c.descendant_id == descendant_id,
+                )
+                .exists()
+            )
+        )
+        return bool(result)
+
+    async def get_subtree_height(self, activity_id: int) -> int:
+        """Количество уровней под деятельностью (0 для листа)"""
+        result = await self.read_db.scalar(
+            select(func.coalesce(func.max(activity_closure.c.depth), 0)).where(
+                activity_closure.c.ancestor_id == activity_id
+            )
+        )
+        return result
+
+    async def _attach_subtree(self, activity_id: int, parent_id: int) -> None:
+        """Связывает всё поддерево activity_id со всеми предками parent_id (включая его самого)"""
+        ancestors = (
+            select(activity_closure.c.ancestor_id, activity_closure.c.depth)
+            .where(activity_closure.c.descendant_id == parent_id)
+            .subquery()
+        )
+        subtree = (
+            select(activity_closure.c.descendant_id, activity_closure.c.depth)
+            .where(activity_closure.c.ancestor_id == activity_id)
+            .subquery()
+        )
+        await self.db.execute(
+            insert(activity_closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    ancestors.c.ancestor_id,
+                    subtree.c.descendant_id,
+                    ancestors.c.depth + subtree.c.depth + 1,
+                ).select_from(ancestors.join(subtree, true())),
+            )
+        )
+
+    async def _detach_subtree(self, activity_id: int) -> None:
+        """Удаляет связи поддерева activity_id с предками, внутренние связи поддерева сохраняются"""
+        subtree = select(activity_closure.c.descendant_id).where(
+            activity_closure.c.ancestor_id == activity_id
+        )
+        await self.db.execute(
+            delete(activity_closure).where(
+                activity_closure.c.descendant_id.in_(subtree),
+                activity_closure.c.ancestor_id.not_in(subtree),
+            )
+        )
+
+    async def _sync_levels(self, activity_id: int) -> None:
+        """Пересчитывает level поддерева activity_id по таблице замыкания"""
+        ancestors = activity_closure.alias("ancestors")
+        ancestors_count = (
+            select(func.max(ancestors.c.depth))
+            .where(ancestors.c.descendant_id == activity_id)
+            .scalar_subquery()
+        )
+        await self.db.execute(
+            update(ActivityModel)
+            .where(
+                ActivityModel.id == activity_closure.c.descendant_id,
+                activity_closure.c.ancestor_id == activity_id,
+            )
+            .values(level=ancestors_count + activity_closure.c.depth + 1)
+            .execution_options(synchronize_session="fetch")
+        )
+
     async def create(self, activity_create: ActivityCreate) -> ActivityModel:
         activity_db = ActivityModel(**activity_create.model_dump())
         self.db.add(activity_db)
+        await self.db.flush()
+        await self.db.execute(
+            insert(activity_closure).values(ancestor_id=activity_db.id, descendant_id=activity_db.id, depth=0)
+        )
+        if activity_db.parent_id is not None:
+            await self._attach_subtree(activity_db.id, activity_db.parent_id)
+            await self._sync_levels(activity_db.id)
+        await bump_table_versions(self.db, ["activities"])
         await self.db.commit()
         await self.db.refresh(activity_db)
         return activity_db
 
     async def update(self, activity_id: int, activity_update: ActivityCreate) -> ActivityModel:
+        old_parent_id = await self.db.scalar(
+            select(ActivityModel.parent_id).where(ActivityModel.id == activity_id)
+        )
         result = await self.db.execute(
             update(ActivityModel)
             .where(ActivityModel.id == activity_id)
             .values(**activity_update.model_dump())
         )
+        if result.rowcount > 0 and old_parent_id != activity_update.parent_id:
+            await self._detach_subtree(activity_id)
+            if activity_update.parent_id is not None:
+                await self._attach_subtree(activity_id, activity_update.parent_id)
+            await self._sync_levels(activity_id)
+        if result.rowcount > 0:
+            await bump_table_versions(self.db, ["activities"])
         await self.db.commit()
         if result.rowcount > 0:
             return await self.get_by_id(activity_id)
         return None
 
-    async def delete(self, activity_id: int) -> bool:
+    async def delete(self, activity_id: int) -> list[int]:
+        """
+        Снимает деятельность вместе с поддеревом, возвращает id снятых деятельностей.
+
+        Связи поддерева в таблице замыкания сохраняются: при восстановлении поддерево
+        возвращается на прежнее место.
+        """
+        subtree = select(activity_closure.c.descendant_id).where(
+            activity_closure.c.ancestor_id == activity_id
+        )
+        activity_ids = (await self.db.scalars(deactivate(ActivityModel, ActivityModel.id.in_(subtree)))).all()
+        if activity_ids:
+            await bump_table_versions(self.db, ["activities"])
+        await self.db.commit()
+        return activity_ids
+
+    async def get_deleted(self, activity_id: int) -> ActivityModel | None:
+        result = await self.db.scalars(
+            select(ActivityModel).where(ActivityModel.id == activity_id, ActivityModel.is_active == False)
+        )
+        return result.first()
+
+    async def restore(self, activity_id: int) -> list[int] | None:
+        """
+        Восстанавливает деятельность и поддерево, снятое вместе с ней; возвращает id восстановленных.
+
+        Деятельность под снятым родителем не восстанавливается. Возвращает None, если
+        восстанавливать нечего.
+        """
+        parent = aliased(ActivityModel, name="parent")
+        parent_active = or_(
+            ActivityModel.parent_id.is_(None),
+            exists().where(parent.id == ActivityModel.parent_id, parent.is_active == True),
+        )
         result = await self.db.execute(
-            update(ActivityModel).where(ActivityModel.id == activity_id).values(is_active=False)
+            restore_row(ActivityModel, activity_id, parent_active).returning(ActivityModel.parent_id)
+        )
+        row = result.first()
+        if row is None:
+            await self.db.commit()
+            return None
+        activity_ids = [activity_id]
+        if row.deleted_at is not None:
+            subtree = select(activity_closure.c.descendant_id).where(
+                activity_closure.c.ancestor_id == activity_id
+            )
+            activity_ids += (
+                await self.db.scalars(
+                    reactivate(ActivityModel, row.deleted_at, ActivityModel.id.in_(subtree))
+                )
+            ).all()
+        linked = exists().where(
+            activity_closure.c.ancestor_id == row.parent_id, activity_closure.c.descendant_id == activity_id
         )
+        if row.parent_id is not None and not await self.db.scalar(select(linked)):
+            # Удаление до каскада отсоединяло поддерево от предков в таблице замыкания
+            await self._attach_subtree(activity_id, row.parent_id)
+            await self._sync_levels(activity_id)
+        await bump_table_versions(self.db, ["activities"])
         await self.db.commit()
-        return result.rowcount > 0
+        return activity_ids
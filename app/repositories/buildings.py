@@ -1,30 +1,49 @@
 # ruff:noqa:E712
-from sqlalchemy import select, update
+from sqlalchemy import ARRAY, Integer, any_, bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import (
     Building as BuildingModel,
 )
+from app.models import (
+    Organization as OrganizationModel,
+)
+from app.models import (
+    Phone as PhoneModel,
+)
+from app.repositories.organizations import select_activity_ids
+from app.repositories.soft_delete import deactivate, reactivate, restore_row
+from app.repositories.versions import bump_table_versions
 from app.schemas import BuildingCreate
 
 
 class BuildingRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
         self.db = db
+        self.read_db = read_db or db
 
     async def get_all(self) -> list[BuildingModel]:
-        result = await self.db.scalars(select(BuildingModel).where(BuildingModel.is_active == True))
+        result = await self.read_db.scalars(select(BuildingModel).where(BuildingModel.is_active == True))
         return result.all()
 
     async def get_by_id(self, building_id: int) -> BuildingModel | None:
-        result = await self.db.scalars(
+        result = await self.read_db.scalars(
             select(BuildingModel).where(BuildingModel.id == building_id, BuildingModel.is_active == True)
         )
         return result.first()
 
+    async def get_by_ids(self, building_ids: list[int]) -> list[BuildingModel]:
+        """Активные записи с id из списка одним запросом, в произвольном порядке"""
+        ids = bindparam("building_ids", building_ids, type_=ARRAY(Integer))
+        result = await self.read_db.scalars(
+            select(BuildingModel).where(BuildingModel.id == any_(ids), BuildingModel.is_active == True)
+        )
+        return result.all()
+
     async def create(self, bulding_create: BuildingCreate) -> BuildingModel:
         building_db = BuildingModel(**bulding_create.model_dump())
         self.db.add(building_db)
+        await bump_table_versions(self.db, ["buildings"])
         await self.db.commit()
         await self.db.refresh(building_db)
         return building_db
@@ -35,14 +54,58 @@ class BuildingRepository:
             .where(BuildingModel.id == building_id)
             .values(**building_update.model_dump())
         )
+        if result.rowcount > 0:
+            await bump_table_versions(self.db, ["buildings"])
         await self.db.commit()
         if result.rowcount > 0:
             return await self.get_by_id(building_id)
         return None
 
-    async def delete(self, building_id: int) -> bool:
-        result = await self.db.execute(
-            update(BuildingModel).where(BuildingModel.id == building_id).values(is_active=False)
-        )
+    async def delete(self, building_id: int) -> list[int] | None:
+        """
+        Снимает здание вместе с его организациями и их телефонами.
+
+        Возвращает id снятых с ним организаций или None, если активного здания нет.
+        """
+        result = await self.db.execute(deactivate(BuildingModel, BuildingModel.id == building_id))
+        if result.first() is None:
+            await self.db.commit()
+            return None
+        in_building = OrganizationModel.building_id == building_id
+        organization_ids = (await self.db.scalars(deactivate(OrganizationModel, in_building))).all()
+        tables = ["buildings"]
+        if organization_ids:
+            ids = bindparam("organization_ids", organization_ids, type_=ARRAY(Integer))
+            await self.db.execute(deactivate(PhoneModel, PhoneModel.organization_id == any_(ids)))
+            tables += ["organizations", "phones"]
+        await bump_table_versions(self.db, tables)
+        await self.db.commit()
+        return organization_ids
+
+    async def restore(self, building_id: int) -> dict[int, list[int]] | None:
+        """
+        Восстанавливает здание и организации с телефонами, снятые вместе с ним.
+
+        Возвращает id деятельностей каждой восстановленной организации
+        или None, если снятого здания нет.
+        """
+        row = (await self.db.execute(restore_row(BuildingModel, building_id))).first()
+        if row is None:
+            await self.db.commit()
+            return None
+        organization_ids = []
+        if row.deleted_at is not None:
+            in_building = OrganizationModel.building_id == building_id
+            organization_ids = (
+                await self.db.scalars(reactivate(OrganizationModel, row.deleted_at, in_building))
+            ).all()
+        tables = ["buildings"]
+        if organization_ids:
+            ids = bindparam("organization_ids", organization_ids, type_=ARRAY(Integer))
+            of_organizations = PhoneModel.organization_id == any_(ids)
+            await self.db.execute(reactivate(PhoneModel, row.deleted_at, of_organizations))
+            tables += ["organizations", "phones"]
+        activity_ids = await select_activity_ids(self.db, organization_ids)
+        await bump_table_versions(self.db, tables)
         await self.db.commit()
-        return result.rowcount > 0
+        return activity_ids
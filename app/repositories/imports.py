@@ -0,0 +1,189 @@
+# ruff:noqa:E712
+from sqlalchemy import ARRAY, Integer, String, any_, bindparam, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncSessionTransaction
+
+from app.models import (
+    Activity as ActivityModel,
+)
+from app.models import (
+    Building as BuildingModel,
+)
+from app.models import (
+    Organization as OrganizationModel,
+)
+from app.models import (
+    Phone as PhoneModel,
+)
+from app.models import (
+    activity_closure,
+    organization_activities,
+)
+from app.repositories.versions import bump_table_versions
+from app.schemas import ActivityCreate, BuildingCreate, OrganizationCreate, PhoneCreate
+
+
+class ImportRepository:
+    """
+    Пакетная запись для импорта: методы не фиксируют транзакцию, ей управляет вызывающий.
+
+    Таблицы, в которые что-то добавлено, запоминаются, и их версии увеличиваются при commit.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._changed_tables: set[str] = set()
+
+    async def commit(self) -> None:
+        await bump_table_versions(self.db, self._changed_tables)
+        await self.db.commit()
+        self._changed_tables.clear()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
+        self._changed_tables.clear()
+
+    def savepoint(self) -> AsyncSessionTransaction:
+        """Точка сохранения: ошибка внутри откатывает только сделанное в ней, не весь пакет"""
+        return self.db.begin_nested()
+
+    async def _get_active_ids(self, model, ids: set[int]) -> set[int]:
+        if not ids:
+            return set()
+        result = await self.db.scalars(
+            select(model.id).where(
+                model.id == any_(bindparam("ids", list(ids), type_=ARRAY(Integer))),
+                model.is_active == True,
+            )
+        )
+        return set(result.all())
+
+    async def get_active_building_ids(self, building_ids: set[int]) -> set[int]:
+        return await self._get_active_ids(BuildingModel, building_ids)
+
+    async def get_active_activity_ids(self, activity_ids: set[int]) -> set[int]:
+        return await self._get_active_ids(ActivityModel, activity_ids)
+
+    async def get_active_organization_ids(self, organization_ids: set[int]) -> set[int]:
+        return await self._get_active_ids(OrganizationModel, organization_ids)
+
+    async def insert_buildings(self, buildings: list[BuildingCreate]) -> list[BuildingModel]:
+        """Добавляет здания одним INSERT, адреса, которые уже есть в базе, пропускаются"""
+        result = await self.db.scalars(
+            pg_insert(BuildingModel)
+            .values([building.model_dump() for building in buildings])
+            .on_conflict_do_nothing(index_elements=[BuildingModel.address])
+            .returning(BuildingModel)
+        )
+        buildings = list(result.all())
+        if buildings:
+            self._changed_tables.add("buildings")
+        return buildings
+
+    async def insert_organizations(self, organizations: list[OrganizationCreate]) -> dict[str, int]:
+        """Добавляет организации и их связи с деятельностями, возвращает id добавленных по имени"""
+        result = await self.db.execute(
+            pg_insert(OrganizationModel)
+            .values(
+                [
+                    {"name": organization.name, "building_id": organization.building_id}
+                    for organization in organizations
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[OrganizationModel.name])
+            .returning(OrganizationModel.name, OrganizationModel.id)
+        )
+        inserted = dict(result.all())
+        if inserted:
+            self._changed_tables.add("organizations")
+        links = {
+            (inserted[organization.name], activity_id)
+            for organization in organizations
+            if organization.name in inserted
+            for activity_id in organization.activity_ids
+        }
+        if links:
+            organization_ids, activity_ids = zip(*links, strict=True)
+            await self.db.execute(
+                pg_insert(organization_activities)
+                .from_select(
+                    ["organization_id", "activity_id"],
+                    select(
+                        func.unnest(
+                            bindparam("organization_ids", list(organization_ids), type_=ARRAY(Integer))
+                        ),
+                        func.unnest(bindparam("activity_ids", list(activity_ids), type_=ARRAY(Integer))),
+                    ),
+                )
+                .on_conflict_do_nothing()
+            )
+        return inserted
+
+    async def insert_phones(self, phones: list[PhoneCreate]) -> set[str]:
+        """Добавляет телефоны одним INSERT, возвращает номера, которых ещё не было в базе"""
+        result = await self.db.scalars(
+            pg_insert(PhoneModel)
+            .values([phone.model_dump() for phone in phones])
+            .on_conflict_do_nothing(index_elements=[PhoneModel.phone_number])
+            .returning(PhoneModel.phone_number)
+        )
+        phone_numbers = set(result.all())
+        if phone_numbers:
+            self._changed_tables.add("phones")
+        return phone_numbers
+
+    async def activity_exists(self, activity: ActivityCreate) -> bool:
+        """Есть ли активная деятельность с тем же названием у того же родителя"""
+        result = await self.db.scalar(
+            select(
+                select(ActivityModel)
+                .where(
+                    ActivityModel.name == activity.name,
+                    ActivityModel.parent_id.is_not_distinct_from(activity.parent_id),
+                    ActivityModel.is_active == True,
+                )
+                .exists()
+            )
+        )
+        return bool(result)
+
+    async def insert_activity(self, activity: ActivityCreate, max_level: int) -> int | None:
+        """
+        Добавляет деятельность вместе со строками таблицы замыкания.
+
+        Уровень берется от родителя в том же запросе; если родитель не найден или уже
+        находится на уровне max_level, ничего не добавляется и возвращается None.
+        """
+        if activity.parent_id is None:
+            activity_id = await self.db.scalar(
+                insert(ActivityModel).values(name=activity.name, level=1).returning(ActivityModel.id)
+            )
+        else:
+            activity_id = await self.db.scalar(
+                insert(ActivityModel)
+                .from_select(
+                    ["name", "parent_id", "level"],
+                    select(literal(activity.name, String), ActivityModel.id, ActivityModel.level + 1).where(
+                        ActivityModel.id == activity.parent_id,
+                        ActivityModel.is_active == True,
+                        ActivityModel.level < max_level,
+                    ),
+                )
+                .returning(ActivityModel.id)
+            )
+            if activity_id is None:
+                return None
+        await self.db.execute(
+            insert(activity_closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(literal(activity_id), literal(activity_id), literal(0)).union_all(
+                    select(
+                        activity_closure.c.ancestor_id,
+                        literal(activity_id),
+                        activity_closure.c.depth + 1,
+                    ).where(activity_closure.c.descendant_id == activity.parent_id)
+                ),
+            )
+        )
+        self._changed_tables.add("activities")
+        return activity_id
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Job as JobModel
+
+
+class JobRepository:
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.db = db
+        self.read_db = read_db or db
+
+    async def get_by_id(self, job_id: int) -> JobModel | None:
+        # Статус меняют воркеры в других сессиях: читаем с основной БД и без кэша сессии
+        return await self.db.get(JobModel, job_id, populate_existing=True)
+
+    async def create(self, kind: str, payload: dict) -> JobModel:
+        job = await self.db.scalar(
+            insert(JobModel).values(kind=kind, status="queued", payload=payload).returning(JobModel)
+        )
+        await self.db.commit()
+        return job
+
+    async def get_queued_ids(self) -> list[int]:
+        result = await self.db.scalars(
+            select(JobModel.id).where(JobModel.status == "queued").order_by(JobModel.id)
+        )
+        return result.all()
+
+    async def claim(self, job_id: int) -> JobModel | None:
+        """
+        Переводит задачу из queued в running.
+
+        Условие на статус делает захват атомарным: из нескольких процессов, поставивших
+        задачу в очередь при старте, ее выполнит только один.
+        """
+        job = await self.db.scalar(
+            update(JobModel)
+            .where(JobModel.id == job_id, JobModel.status == "queued")
+            .values(status="running", started_at=func.now(), heartbeat_at=func.now())
+            .returning(JobModel)
+        )
+        await self.db.commit()
+        return job
+
+    async def heartbeat(self, job_id: int) -> None:
+        """Продлевает аренду выполняемой задачи"""
+        await self.db.execute(
+            update(JobModel)
+            .where(JobModel.id == job_id, JobModel.status == "running")
+            .values(heartbeat_at=func.now())
+        )
+        await self.db.commit()
+
+    async def requeue_expired(self, lease_seconds: int) -> list[int]:
+        """
+        Возвращает в queued задачи running, аренда которых истекла.
+
+        Аренду продлевает воркер, выполняющий задачу; не продленная дольше lease_seconds задача
+        осталась от процесса, завершившегося аварийно, и ее транзакция откатилась.
+        """
+        last_seen = func.coalesce(JobModel.heartbeat_at, JobModel.started_at)
+        result = await self.db.scalars(
+            update(JobModel)
+            .where(JobModel.status == "running", last_seen < func.now() - timedelta(seconds=lease_seconds))
+            .values(status="queued", started_at=None, heartbeat_at=None)
+            .returning(JobModel.id)
+        )
+        job_ids = result.all()
+        await self.db.commit()
+        return job_ids
+
+    async def finish(self, job_id: int, result: dict | None) -> None:
+        await self.db.execute(
+            update(JobModel)
+            .where(JobModel.id == job_id)
+            .values(status="succeeded", result=result, finished_at=func.now())
+        )
+        await self.db.commit()
+
+    async def fail(self, job_id: int, error: str) -> None:
+        await self.db.execute(
+            update(JobModel)
+            .where(JobModel.id == job_id)
+            .values(status="failed", error=error, finished_at=func.now())
+        )
+        await self.db.commit()
+
+    async def release(self, job_id: int) -> None:
+        """Возвращает прерванную задачу в очередь: ее транзакция откатилась, задачу можно повторить"""
+        await self.db.execute(
+            update(JobModel)
+            .where(JobModel.id == job_id, JobModel.status == "running")
+            .values(status="queued", started_at=None, heartbeat_at=None)
+        )
+        await self.db.commit()
@@ -0,0 +1,156 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from typing import Generic, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    Activity as ActivityModel,
+)
+from app.models import (
+    Building as BuildingModel,
+)
+from app.models import (
+    Organization as OrganizationModel,
+)
+from app.models import (
+    Phone as PhoneModel,
+)
+from app.repositories.activities import ActivityRepository
+from app.repositories.buildings import BuildingRepository
+from app.repositories.organizations import OrganizationRepository
+from app.repositories.phones import PhoneRepository
+
+V = TypeVar("V")
+
+
+class LoaderStats:
+    """Обращения к загрузчикам запроса по ключу и фактически выполненные пакетные запросы"""
+
+    __slots__ = ("lookups", "queries")
+
+    def __init__(self):
+        self.lookups = 0
+        self.queries = 0
+
+    @property
+    def saved(self) -> int:
+        """Запросов сэкономлено по сравнению с отдельным get_by_id на каждое обращение"""
+        return self.lookups - self.queries
+
+
+class EntityLoader(Generic[V]):
+    """
+    Загрузка записей одного типа по id в рамках одного HTTP-запроса.
+
+    Ключи, запрошенные за один оборот event loop, выбираются одним запросом batch_load
+    (WHERE id = ANY(:ids)); повторное обращение к ключу отдается из кэша загрузчика.
+    Отсутствующая или неактивная запись - None. Пакет выполняет первый из ожидающих
+    его вызовов, под общей для загрузчиков запроса блокировкой: сессия не допускает
+    параллельных запросов.
+    """
+
+    def __init__(
+        self,
+        batch_load: Callable[[list[int]], Awaitable[Sequence[V]]],
+        stats: LoaderStats,
+        lock: asyncio.Lock,
+        on_load: Callable[[V], None] | None = None,
+    ):
+        self._batch_load = batch_load
+        self._stats = stats
+        self._lock = lock
+        self._on_load = on_load
+        self._futures: dict[int, asyncio.Future] = {}
+        self._pending: list[int] = []
+
+    async def load(self, key: int) -> V | None:
+        return (await self.load_many([key]))[0]
+
+    async def load_many(self, keys: Iterable[int]) -> list[V | None]:
+        keys = list(keys)
+        self._stats.lookups += len(keys)
+        loop = asyncio.get_running_loop()
+        for key in keys:
+            if key not in self._futures:
+                self._futures[key] = loop.create_future()
+                self._pending.append(key)
+        if self._pending:
+            # Один оборот event loop: ключи параллельных вызовов попадут в тот же пакет
+            await asyncio.sleep(0)
+            await self._dispatch()
+        return [await self._futures[key] for key in keys]
+
+    def prime(self, key: int, value: V) -> None:
+        """Кладет в кэш запись, уже загруженную другим запросом (например, связью организации)"""
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def clear(self, key: int) -> None:
+        """Забывает запись после ее изменения: следующее обращение снова пойдет в БД"""
+        self._futures.pop(key, None)
+
+    async def _dispatch(self) -> None:
+        async with self._lock:
+            keys, self._pending = self._pending, []
+            if not keys:
+                return
+            futures = [self._futures[key] for key in keys]
+            self._stats.queries += 1
+            try:
+                records = await self._batch_load(keys)
+            except asyncio.CancelledError:
+                for key, future in zip(keys, futures, strict=True):
+                    self._futures.pop(key, None)
+                    future.cancel()
+                raise
+            except Exception as e:
+                # Ошибку получат все ожидающие; повторное обращение выполнит запрос заново
+                for key, future in zip(keys, futures, strict=True):
+                    self._futures.pop(key, None)
+                    future.set_exception(e)
+                return
+            found = {record.id: record for record in records}
+            for key, future in zip(keys, futures, strict=True):
+                future.set_result(found.get(key))
+            if self._on_load is not None:
+                for record in records:
+                    self._on_load(record)
+
+
+class RequestLoaders:
+    """
+    Загрузчики по первичному ключу, общие для всех сервисов одного HTTP-запроса.
+
+    Организации загружаются с зданием и деятельностями (COMMON_OPTIONS), и эти связи
+    сразу попадают в кэш загрузчиков зданий и деятельностей.
+    """
+
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.stats = LoaderStats()
+        lock = asyncio.Lock()
+        self.activities: EntityLoader[ActivityModel] = EntityLoader(
+            ActivityRepository(db=db, read_db=read_db).get_by_ids, self.stats, lock
+        )
+        self.buildings: EntityLoader[BuildingModel] = EntityLoader(
+            BuildingRepository(db=db, read_db=read_db).get_by_ids, self.stats, lock
+        )
+        self.phones: EntityLoader[PhoneModel] = EntityLoader(
+            PhoneRepository(db=db, read_db=read_db).get_by_ids, self.stats, lock
+        )
+        self.organizations: EntityLoader[OrganizationModel] = EntityLoader(
+            OrganizationRepository(db=db, read_db=read_db).get_by_ids,
+            self.stats,
+            lock,
+            on_load=self._prime_relations,
+        )
+
+    def _prime_relations(self, organization: OrganizationModel) -> None:
+        # Загрузчики отдают только активные записи, неактивные связи в кэш не кладем
+        if organization.building is not None and organization.building.is_active:
+            self.buildings.prime(organization.building.id, organization.building)
+        for activity in organization.activities:
+            if activity.is_active:
+                self.activities.prime(activity.id, activity)
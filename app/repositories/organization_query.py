@@ -0,0 +1,169 @@
+# ruff:noqa:E712
+from typing import Any, Self
+
+from sqlalchemy import (
+    ARRAY,
+    ColumnElement,
+    Integer,
+    Select,
+    any_,
+    bindparam,
+    exists,
+    func,
+    literal,
+    null,
+    or_,
+    select,
+    tuple_,
+)
+
+from app.core.geo import EARTH_RADIUS_KM, bounding_box
+from app.models import (
+    Building as BuildingModel,
+)
+from app.models import (
+    Organization as OrganizationModel,
+)
+from app.models import (
+    organization_activities,
+)
+
+
+def distance_km(lat: float, lon: float) -> ColumnElement[float]:
+    """Расстояние от точки до здания по формуле гаверсинуса, в километрах"""
+    half_d_lat = func.radians(BuildingModel.latitude - lat) / 2
+    half_d_lon = func.radians(BuildingModel.longitude - lon) / 2
+    hav = func.power(func.sin(half_d_lat), 2) + func.cos(func.radians(lat)) * func.cos(
+        func.radians(BuildingModel.latitude)
+    ) * func.power(func.sin(half_d_lon), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(hav)))
+
+
+def name_matches(query: str) -> list[ColumnElement[bool]]:
+    """Условия по словам запроса: слово похоже по триграммам на слово названия или входит в него"""
+    return [
+        or_(
+            literal(word).op("<%")(OrganizationModel.name),
+            OrganizationModel.name.icontains(word, autoescape=True),
+        )
+        for word in query.split() or [query]
+    ]
+
+
+class OrganizationQueryBuilder:
+    """
+    Собирает выборку организаций из произвольного набора фильтров в один SELECT.
+
+    Каждый метод добавляет условие и возвращает сам построитель. Выборка отдает пары
+    (организация, расстояние в км или NULL), отсортированные по выбранному полю и id,
+    что позволяет продолжать её keyset-курсором (значение поля, id).
+    """
+
+    def __init__(self):
+        self._conditions: list[ColumnElement[bool]] = []
+        self._join_building = False
+        self._distance: ColumnElement[float] | None = None
+        self._sort = "id"
+        self._after: tuple[Any, int] | None = None
+        self._limit: int | None = None
+
+    def building(self, building_id: int) -> Self:
+        self._conditions.append(OrganizationModel.building_id == building_id)
+        return self
+
+    def activities(self, activity_ids: list[int]) -> Self:
+        ids = bindparam("activity_ids", activity_ids, type_=ARRAY(Integer))
+        self._conditions.append(
+            exists().where(
+                organization_activities.c.organization_id == OrganizationModel.id,
+                organization_activities.c.activity_id == any_(ids),
+            )
+        )
+        return self
+
+    def name(self, query: str) -> Self:
+        self._conditions.extend(name_matches(query))
+        return self
+
+    def near(self, lat: float, lon: float) -> Self:
+        """Считает расстояние до точки, чтобы по нему фильтровать и сортировать"""
+        self._join_building = True
+        self._distance = distance_km(lat, lon)
+        return self
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> Self:
+        self.near(lat, lon)
+        lat_min, lat_max, lon_min, lon_max = bounding_box(lat, lon, radius_km)
+        self._conditions.extend(
+            [
+                BuildingModel.latitude.between(lat_min, lat_max),
+                BuildingModel.longitude.between(lon_min, lon_max),
+                self._distance <= radius_km,
+                # Не фильтр, а условие частичного индекса ix_buildings_active_lat_lon
+                BuildingModel.is_active == True,
+            ]
+        )
+        return self
+
+    def within_rectangle(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> Self:
+        self._join_building = True
+        self._conditions.extend(
+            [
+                BuildingModel.latitude.between(lat_min, lat_max),
+                BuildingModel.longitude.between(lon_min, lon_max),
+                BuildingModel.is_active == True,
+            ]
+        )
+        return self
+
+    def order_by(self, sort: str) -> Self:
+        if sort == "distance" and self._distance is None:
+            raise ValueError("Sorting by distance requires a point, call near() first")
+        self._sort = sort
+        return self
+
+    def after(self, value: Any, organization_id: int) -> Self:
+        self._after = (value, organization_id)
+        return self
+
+    def limit(self, limit: int) -> Self:
+        self._limit = limit
+        return self
+
+    def _sort_column(self) -> ColumnElement:
+        if self._sort == "name":
+            return OrganizationModel.name
+        if self._sort == "distance":
+            return self._distance
+        return OrganizationModel.id
+
+    def sort_value(self, organization: OrganizationModel, distance: float | None) -> Any:
+        """Значение поля сортировки для курсора следующей страницы"""
+        if self._sort == "name":
+            return organization.name
+        if self._sort == "distance":
+            return distance
+        return organization.id
+
+    def build(self) -> Select:
+        distance = self._distance if self._distance is not None else null()
+        stmt = select(OrganizationModel, distance.label("distance_km")).where(
+            OrganizationModel.is_active == True, *self._conditions
+        )
+        if self._join_building:
+            # Активная организация всегда находится в активном здании (каскадное удаление)
+            stmt = stmt.join(BuildingModel, BuildingModel.id == OrganizationModel.building_id)
+        sort_column = self._sort_column()
+        if self._after is not None:
+            value, organization_id = self._after
+            if self._sort == "id":
+                stmt = stmt.where(OrganizationModel.id > organization_id)
+            else:
+                stmt = stmt.where(tuple_(sort_column, OrganizationModel.id) > tuple_(value, organization_id))
+        if self._sort == "id":
+            stmt = stmt.order_by(OrganizationModel.id)
+        else:
+            stmt = stmt.order_by(sort_column, OrganizationModel.id)
+        if self._limit is not None:
+            stmt = stmt.limit(self._limit)
+        return stmt
@@ -1,8 +1,31 @@
 # ruff:noqa:E712
-from sqlalchemy import select, text, update
+from collections.abc import AsyncIterator
+from typing import NamedTuple
+
+from sqlalchemy import (
+    ARRAY,
+    Float,
+    Integer,
+    Row,
+    Select,
+    and_,
+    any_,
+    bindparam,
+    cast,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.geo import bounding_box
 from app.models import (
     Activity as ActivityModel,
 )
@@ -12,117 +35,578 @@ from app.models import (
 from app.models import (
     Organization as OrganizationModel,
 )
+from app.models import (
+    Phone as PhoneModel,
+)
 from app.models import (
     organization_activities,
 )
-from app.schemas import OrganizationCreate
+from app.repositories.organization_query import OrganizationQueryBuilder, distance_km, name_matches
+from app.repositories.soft_delete import deactivate, reactivate, restore_row
+from app.repositories.versions import bump_table_versions
+from app.schemas import CoordinateRectangle, OrganizationCreate, OrganizationFieldset, Pagination
+
+
+class ReferenceCheck(NamedTuple):
+    organization_exists: bool
+    building_exists: bool
+    missing_activity_ids: list[int]
+
+
+async def select_activity_ids(db: AsyncSession, organization_ids: list[int]) -> dict[int, list[int]]:
+    """
+    id деятельностей каждой организации из organization_ids, в транзакции сессии db.
+
+    Вызывается до commit восстановления: сервис применяет результат к индексу деятельностей
+    сразу после commit, без чтений, которые могут упасть или прийти с отстающей реплики.
+    """
+    activity_ids: dict[int, list[int]] = {organization_id: [] for organization_id in organization_ids}
+    if organization_ids:
+        ids = bindparam("organization_ids", organization_ids, type_=ARRAY(Integer))
+        result = await db.execute(
+            select(organization_activities.c.organization_id, organization_activities.c.activity_id).where(
+                organization_activities.c.organization_id == any_(ids)
+            )
+        )
+        for organization_id, activity_id in result:
+            activity_ids[organization_id].append(activity_id)
+    return activity_ids
 
 
 class OrganizationRepository:
     COMMON_OPTIONS = [
         selectinload(OrganizationModel.activities),
         selectinload(OrganizationModel.building),
-        selectinload(OrganizationModel.phones),
     ]
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
         self.db = db
+        self.read_db = read_db or db
 
-    async def get_all(self):
-        result = await self.db.scalars(
-            select(OrganizationModel).where(OrganizationModel.is_active == True).options(*self.COMMON_OPTIONS)
+    @classmethod
+    def _options(cls, fieldset: OrganizationFieldset | None = None) -> list:
+        """
+        Опции загрузки под выбранные поля ответа.
+
+        Без fieldset - полная организация (COMMON_OPTIONS). Иначе выбираются только нужные
+        колонки, здание присоединяется JOIN-ом в том же запросе, а деятельности и телефоны
+        догружаются отдельным запросом, только если они запрошены.
+        """
+        if fieldset is None:
+            return cls.COMMON_OPTIONS
+        # building_id нужен для связи со зданием и расстояний из пространственного индекса
+        options = [
+            load_only(
+                *(getattr(OrganizationModel, name) for name in fieldset.columns | {"id", "building_id"})
+            )
+        ]
+        if fieldset.building is not None:
+            options.append(
+                joinedload(OrganizationModel.building, innerjoin=True).load_only(
+                    *(getattr(BuildingModel, name) for name in fieldset.building)
+                )
+            )
+        if fieldset.activities is not None:
+            options.append(
+                selectinload(OrganizationModel.activities).load_only(
+                    *(getattr(ActivityModel, name) for name in fieldset.activities)
+                )
+            )
+        if fieldset.phones is not None:
+            options.append(
+                selectinload(OrganizationModel.phones.and_(PhoneModel.is_active == True)).load_only(
+                    *(getattr(PhoneModel, name) for name in fieldset.phones)
+                )
+            )
+        return options
+
+    @staticmethod
+    def _paginate(stmt: Select, pagination: Pagination | None) -> Select:
+        """Keyset-пагинация по id: сортирует выборку и отрезает страницу после курсора"""
+        stmt = stmt.order_by(OrganizationModel.id)
+        if pagination is None:
+            return stmt
+        if pagination.after is not None:
+            stmt = stmt.where(OrganizationModel.id > pagination.after)
+        return stmt.limit(pagination.limit)
+
+    async def get_all(
+        self, pagination: Pagination | None = None, fieldset: OrganizationFieldset | None = None
+    ) -> list[OrganizationModel]:
+        result = await self.read_db.scalars(
+            self._paginate(
+                select(OrganizationModel)
+                .where(OrganizationModel.is_active == True)
+                .options(*self._options(fieldset)),
+                pagination,
+            )
         )
         organizations = result.all()
         return organizations
 
-    async def get_by_building(self, building_id: int) -> list[OrganizationModel]:
-        result = await self.db.scalars(
+    async def stream_all(
+        self,
+        after: int | None = None,
+        chunk_size: int = 500,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> AsyncIterator[OrganizationModel]:
+        """Отдает активные организации по одной, выбирая их из БД порциями по chunk_size строк"""
+        stmt = (
             select(OrganizationModel)
-            .where(
-                OrganizationModel.building_id == building_id,
-                OrganizationModel.is_active == True,
+            .where(OrganizationModel.is_active == True)
+            .options(*self._options(fieldset))
+            .order_by(OrganizationModel.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        if after is not None:
+            stmt = stmt.where(OrganizationModel.id > after)
+        result = await self.read_db.stream_scalars(stmt)
+        async for organization in result:
+            yield organization
+
+    async def stream_flat(self, after: int | None = None, chunk_size: int = 500) -> AsyncIterator[Row]:
+        """
+        Отдает активные организации плоскими строками через серверный курсор.
+
+        Строка на каждую пару (организация, деятельность), упорядоченные по id организации,
+        так что строки одной организации идут подряд. Телефоны собираются в массив
+        подзапросом, чтобы не умножать число строк.
+        """
+        phones = (
+            select(func.array_agg(aggregate_order_by(PhoneModel.phone_number, PhoneModel.id)))
+            .where(PhoneModel.organization_id == OrganizationModel.id, PhoneModel.is_active == True)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                OrganizationModel.id,
+                OrganizationModel.name,
+                OrganizationModel.building_id,
+                BuildingModel.address,
+                BuildingModel.latitude,
+                BuildingModel.longitude,
+                ActivityModel.id.label("activity_id"),
+                ActivityModel.name.label("activity_name"),
+                phones.label("phones"),
+            )
+            .join(BuildingModel, BuildingModel.id == OrganizationModel.building_id)
+            .outerjoin(
+                organization_activities, organization_activities.c.organization_id == OrganizationModel.id
+            )
+            .outerjoin(
+                ActivityModel,
+                and_(
+                    ActivityModel.id == organization_activities.c.activity_id, ActivityModel.is_active == True
+                ),
+            )
+            .where(OrganizationModel.is_active == True)
+            .order_by(OrganizationModel.id, ActivityModel.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        if after is not None:
+            stmt = stmt.where(OrganizationModel.id > after)
+        result = await self.read_db.stream(stmt)
+        async for row in result:
+            yield row
+
+    @staticmethod
+    def _select_rows(*columns) -> Select:
+        """Плоская выборка колонок организации и ее здания, без ORM-объектов и догрузки связей"""
+        return select(
+            OrganizationModel.id,
+            OrganizationModel.name,
+            OrganizationModel.is_active,
+            BuildingModel.id.label("building_id"),
+            BuildingModel.address,
+            # float8 вместо numeric: драйвер отдает float, а не Decimal
+            cast(BuildingModel.latitude, Float).label("latitude"),
+            cast(BuildingModel.longitude, Float).label("longitude"),
+            BuildingModel.is_active.label("building_is_active"),
+            *columns,
+        ).join(BuildingModel, BuildingModel.id == OrganizationModel.building_id)
+
+    async def get_all_rows(self, pagination: Pagination | None = None) -> list[Row]:
+        result = await self.read_db.execute(
+            self._paginate(self._select_rows().where(OrganizationModel.is_active == True), pagination)
+        )
+        return result.all()
+
+    async def get_rows_by_radius(
+        self, lat: float, lon: float, radius_km: float | int, limit: int | None = None
+    ) -> list[Row]:
+        """Строки get_by_radius с колонкой distance_km"""
+        distance = distance_km(lat, lon)
+        stmt = (
+            self._select_rows(distance.label("distance_km"))
+            .where(*self._radius_conditions(lat, lon, radius_km), OrganizationModel.is_active == True)
+            .order_by(distance, OrganizationModel.id)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.read_db.execute(stmt)
+        return result.all()
+
+    async def get_nearest_rows_by_building_ids(
+        self, building_ids: list[int], limit: int | None = None
+    ) -> list[Row]:
+        """Строки get_nearest_by_building_ids"""
+        ids = bindparam("building_ids", building_ids, type_=ARRAY(Integer))
+        stmt = (
+            self._select_rows()
+            .where(OrganizationModel.building_id == any_(ids), OrganizationModel.is_active == True)
+            .order_by(func.array_position(ids, OrganizationModel.building_id), OrganizationModel.id)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.read_db.execute(stmt)
+        return result.all()
+
+    async def get_rows_by_rectangle(
+        self,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        pagination: Pagination | None = None,
+    ) -> list[Row]:
+        """Строки get_by_rectangle"""
+        result = await self.read_db.execute(
+            self._paginate(
+                self._select_rows().where(
+                    BuildingModel.latitude.between(lat_min, lat_max),
+                    BuildingModel.longitude.between(lon_min, lon_max),
+                    OrganizationModel.is_active == True,
+                    BuildingModel.is_active == True,
+                ),
+                pagination,
+            )
+        )
+        return result.all()
+
+    async def get_rows_by_building_ids(
+        self, building_ids: list[int], pagination: Pagination | None = None
+    ) -> list[Row]:
+        """Строки get_by_building_ids"""
+        ids = bindparam("building_ids", building_ids, type_=ARRAY(Integer))
+        result = await self.read_db.execute(
+            self._paginate(
+                self._select_rows().where(
+                    OrganizationModel.building_id == any_(ids), OrganizationModel.is_active == True
+                ),
+                pagination,
+            )
+        )
+        return result.all()
+
+    async def get_activity_rows(self, organization_ids: list[int]) -> list[Row]:
+        """Деятельности организаций одним запросом: строки (organization_id, колонки деятельности)"""
+        ids = bindparam("organization_ids", organization_ids, type_=ARRAY(Integer))
+        result = await self.read_db.execute(
+            select(
+                organization_activities.c.organization_id,
+                ActivityModel.id,
+                ActivityModel.name,
+                ActivityModel.parent_id,
+                ActivityModel.is_active,
+                ActivityModel.level,
+            )
+            .join(ActivityModel, ActivityModel.id == organization_activities.c.activity_id)
+            .where(organization_activities.c.organization_id == any_(ids))
+            .order_by(organization_activities.c.organization_id, ActivityModel.id)
+        )
+        return result.all()
+
+    async def get_by_building(
+        self,
+        building_id: int,
+        pagination: Pagination | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        result = await self.read_db.scalars(
+            self._paginate(
+                select(OrganizationModel)
+                .where(
+                    OrganizationModel.building_id == building_id,
+                    OrganizationModel.is_active == True,
+                )
+                .options(*self._options(fieldset)),
+                pagination,
             )
-            .options(*self.COMMON_OPTIONS)
         )
         organizations = result.all()
         return organizations
 
-    async def get_by_activity(self, activity_id: int) -> list[OrganizationModel]:
-        result = await self.db.scalars(
-            select(OrganizationModel)
-            .join(
-                organization_activities,
-                OrganizationModel.id == organization_activities.c.organization_id,
-            )
-            .join(ActivityModel, organization_activities.c.activity_id == ActivityModel.id)
-            .where(
-                ActivityModel.id == activity_id,
-                OrganizationModel.is_active == True,
-                ActivityModel.is_active == True,
+    async def get_by_activity(
+        self,
+        activity_id: int,
+        pagination: Pagination | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        result = await self.read_db.scalars(
+            self._paginate(
+                select(OrganizationModel)
+                .join(
+                    organization_activities,
+                    OrganizationModel.id == organization_activities.c.organization_id,
+                )
+                .join(ActivityModel, organization_activities.c.activity_id == ActivityModel.id)
+                .where(
+                    ActivityModel.id == activity_id,
+                    OrganizationModel.is_active == True,
+                    ActivityModel.is_active == True,
+                )
+                .options(*self._options(fieldset)),
+                pagination,
             )
-            .options(*self.COMMON_OPTIONS)
         )
         organizations = result.all()
         return organizations
 
-    async def get_by_radius(self, lat: float, lon: float, radius_km: float | int) -> list[OrganizationModel]:
-        table_name = BuildingModel.__tablename__  # "buildings"
-        result = await self.db.scalars(
-            select(OrganizationModel)
-            .join(BuildingModel)
-            .where(
-                OrganizationModel.is_active == True,
-                BuildingModel.is_active == True,
-                text(
-                    f"""
-                    6371 * acos(
-                        cos(radians(:lat)) * cos(radians({table_name}.latitude)) *
-                        cos(radians({table_name}.longitude) - radians(:lon)) +
-                        sin(radians(:lat)) * sin(radians({table_name}.latitude))
-                    ) <= :radius
-                """
-                ),
+    @staticmethod
+    def _radius_conditions(lat: float, lon: float, radius_km: float | int) -> list:
+        """
+        Условия на здания в радиусе: описанный прямоугольник и точное расстояние.
+
+        is_active здания избыточен для активных организаций (каскадное удаление), но нужен
+        планировщику, чтобы прямоугольник искался по частичному индексу ix_buildings_active_lat_lon.
+        """
+        lat_min, lat_max, lon_min, lon_max = bounding_box(lat, lon, radius_km)
+        return [
+            BuildingModel.latitude.between(lat_min, lat_max),
+            BuildingModel.longitude.between(lon_min, lon_max),
+            distance_km(lat, lon) <= radius_km,
+            BuildingModel.is_active == True,
+        ]
+
+    async def get_by_radius(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float | int,
+        limit: int | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        """Организации в радиусе от точки, отсортированные по расстоянию.
+
+        Кандидаты сначала отбираются по описанному прямоугольнику (использует индекс
+        ix_buildings_active_lat_lon), точное расстояние считается только для них.
+        Каждой организации проставляется атрибут distance_km.
+        """
+        distance = distance_km(lat, lon)
+        stmt = (
+            select(OrganizationModel, distance.label("distance_km"))
+            .join(BuildingModel, BuildingModel.id == OrganizationModel.building_id)
+            .where(*self._radius_conditions(lat, lon, radius_km), OrganizationModel.is_active == True)
+            .options(*self._options(fieldset))
+            .order_by(distance, OrganizationModel.id)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.read_db.execute(stmt)
+        organizations = []
+        for organization, organization_distance in result.all():
+            organization.distance_km = float(organization_distance)
+            organizations.append(organization)
+        return organizations
+
+    async def get_ids_by_building(self, building_id: int) -> list[int]:
+        result = await self.read_db.scalars(
+            select(OrganizationModel.id).where(OrganizationModel.building_id == building_id)
+        )
+        return result.all()
+
+    async def get_ids_by_activities(self, activity_ids: list[int]) -> list[int]:
+        ids = bindparam("activity_ids", activity_ids, type_=ARRAY(Integer))
+        result = await self.read_db.scalars(
+            select(organization_activities.c.organization_id)
+            .where(organization_activities.c.activity_id == any_(ids))
+            .distinct()
+        )
+        return result.all()
+
+    async def get_activity_links(self, organization_ids: list[int] | None = None) -> list[Row]:
+        """Пары (id организации, id деятельности) активных организаций, всех или из organization_ids"""
+        stmt = (
+            select(organization_activities.c.organization_id, organization_activities.c.activity_id)
+            .join(OrganizationModel, OrganizationModel.id == organization_activities.c.organization_id)
+            .where(OrganizationModel.is_active == True)
+        )
+        if organization_ids is not None:
+            ids = bindparam("organization_ids", organization_ids, type_=ARRAY(Integer))
+            stmt = stmt.where(organization_activities.c.organization_id == any_(ids))
+        result = await self.read_db.execute(stmt)
+        return result.all()
+
+    async def get_by_building_ids(
+        self,
+        building_ids: list[int],
+        pagination: Pagination | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        ids = bindparam("building_ids", building_ids, type_=ARRAY(Integer))
+        result = await self.read_db.scalars(
+            self._paginate(
+                select(OrganizationModel)
+                .where(OrganizationModel.building_id == any_(ids), OrganizationModel.is_active == True)
+                .options(*self._options(fieldset)),
+                pagination,
             )
-            .params(lat=lat, lon=lon, radius=radius_km)
-            .options(*self.COMMON_OPTIONS)
         )
         return result.all()
 
+    async def get_nearest_by_building_ids(
+        self,
+        building_ids: list[int],
+        limit: int | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        """Организации зданий building_ids в порядке следования зданий в списке"""
+        ids = bindparam("building_ids", building_ids, type_=ARRAY(Integer))
+        stmt = (
+            select(OrganizationModel)
+            .where(OrganizationModel.building_id == any_(ids), OrganizationModel.is_active == True)
+            .options(*self._options(fieldset))
+            .order_by(func.array_position(ids, OrganizationModel.building_id), OrganizationModel.id)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await self.read_db.scalars(stmt)
+        return result.all()
+
     async def get_by_rectangle(
         self,
         lat_min: float,
         lat_max: float,
         lon_min: float,
         lon_max: float,
+        pagination: Pagination | None = None,
+        fieldset: OrganizationFieldset | None = None,
     ) -> list[OrganizationModel]:
-        result = await self.db.scalars(
-            select(OrganizationModel)
-            .join(BuildingModel, BuildingModel.id == OrganizationModel.building_id)
-            .where(
-                BuildingModel.latitude.between(lat_min, lat_max),
-                BuildingModel.longitude.between(lon_min, lon_max),
-                OrganizationModel.is_active == True,
-                BuildingModel.is_active == True,
+        result = await self.read_db.scalars(
+            self._paginate(
+                select(OrganizationModel)
+                .join(BuildingModel, BuildingModel.id == OrganizationModel.building_id)
+                .where(
+                    BuildingModel.latitude.between(lat_min, lat_max),
+                    BuildingModel.longitude.between(lon_min, lon_max),
+                    OrganizationModel.is_active == True,
+                    BuildingModel.is_active == True,
+                )
+                .options(*self._options(fieldset)),
+                pagination,
             )
-            .options(*self.COMMON_OPTIONS)
         )
         organizations = result.all()
         return organizations
 
-    async def get_by_id(self, organization_id: int) -> OrganizationModel | None:
-        result = await self.db.scalars(
+    async def query(
+        self, builder: OrganizationQueryBuilder, fieldset: OrganizationFieldset | None = None
+    ) -> list[OrganizationModel]:
+        """Выполняет собранную построителем выборку, проставляя атрибут distance_km"""
+        result = await self.read_db.execute(builder.build().options(*self._options(fieldset)))
+        organizations = []
+        for organization, distance in result.all():
+            organization.distance_km = float(distance) if distance is not None else None
+            organizations.append(organization)
+        return organizations
+
+    async def explain(
+        self, builder: OrganizationQueryBuilder, analyze: bool = False
+    ) -> tuple[str, list[str]]:
+        """План выборки построителя: текст SQL и строки EXPLAIN (ANALYZE выполняет запрос)"""
+        connection = await self.read_db.connection()
+        compiled = builder.build().compile(dialect=connection.dialect)
+        params = compiled.construct_params()
+        sql = str(compiled)
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        result = await connection.exec_driver_sql(
+            prefix + sql, tuple(params[name] for name in compiled.positiontup)
+        )
+        return sql, [row[0] for row in result]
+
+    async def search(
+        self,
+        query: str,
+        activity_ids: list[int] | None = None,
+        area: CoordinateRectangle | None = None,
+        limit: int = 20,
+        offset: int = 0,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        """Нечеткий поиск по названию, отсортированный по релевантности.
+
+        Каждое слово запроса должно найтись в названии: как близкое по триграммам слово
+        (оператор <% из pg_trgm) или как подстрока. Условия по словам объединяются через AND,
+        так что редкое слово сужает выборку по индексу ix_organizations_name_trgm до ранжирования.
+        Фильтры по деятельностям и прямоугольнику применяются в том же запросе.
+        Каждой организации проставляется атрибут score от 0 до 1.
+        """
+        score = func.word_similarity(query, OrganizationModel.name)
+        stmt = (
+            select(OrganizationModel, score.label("score"))
+            .where(*name_matches(query), OrganizationModel.is_active == True)
+            .options(*self._options(fieldset))
+            .order_by(
+                score.desc(), func.similarity(query, OrganizationModel.name).desc(), OrganizationModel.id
+            )
+            .limit(limit)
+            .offset(offset)
+        )
+        if activity_ids is not None:
+            ids = bindparam("activity_ids", activity_ids, type_=ARRAY(Integer))
+            stmt = stmt.where(
+                exists().where(
+                    organization_activities.c.organization_id == OrganizationModel.id,
+                    organization_activities.c.activity_id == any_(ids),
+                )
+            )
+        if area is not None:
+            stmt = stmt.join(BuildingModel, BuildingModel.id == OrganizationModel.building_id).where(
+                BuildingModel.latitude.between(area.lat_min, area.lat_max),
+                BuildingModel.longitude.between(area.lon_min, area.lon_max),
+                BuildingModel.is_active == True,
+            )
+        result = await self.read_db.execute(stmt)
+        organizations = []
+        for organization, organization_score in result.all():
+            organization.score = float(organization_score)
+            organizations.append(organization)
+        return organizations
+
+    async def get_by_id(
+        self, organization_id: int, fieldset: OrganizationFieldset | None = None, primary: bool = False
+    ) -> OrganizationModel | None:
+        """primary=True - чтение с основной БД, даже если для запроса выбрана реплика"""
+        db = self.db if primary else self.read_db
+        result = await db.scalars(
             select(OrganizationModel)
             .where(
                 OrganizationModel.id == organization_id,
                 OrganizationModel.is_active == True,
             )
-            .options(*self.COMMON_OPTIONS)
+            .options(*self._options(fieldset))
         )
         organization = result.first()
         return organization
 
+    async def get_by_ids(
+        self, organization_ids: list[int], fieldset: OrganizationFieldset | None = None
+    ) -> list[OrganizationModel]:
+        """
+        Активные организации с id из списка, в произвольном порядке.
+
+        Один запрос по ANY(:ids); связи догружаются общими selectin-запросами на весь список.
+        """
+        ids = bindparam("organization_ids", organization_ids, type_=ARRAY(Integer))
+        result = await self.read_db.scalars(
+            select(OrganizationModel)
+            .where(OrganizationModel.id == any_(ids), OrganizationModel.is_active == True)
+            .options(*self._options(fieldset))
+        )
+        return result.all()
+
     async def get_by_name(self, name: str) -> OrganizationModel | None:
-        result = await self.db.scalars(
+        result = await self.read_db.scalars(
             select(OrganizationModel)
             .where(OrganizationModel.name == name, OrganizationModel.is_active == True)
             .options(*self.COMMON_OPTIONS)
@@ -130,83 +614,164 @@ class OrganizationRepository:
         organization = result.first()
         return organization
 
-    async def get_by_name_activity_with_children(self, activity: ActivityModel) -> list[OrganizationModel]:
-        cte = (
-            select(ActivityModel)
-            .where(ActivityModel.id == activity.id, ActivityModel.is_active == True)
-            .cte(name="activity_tree", recursive=True)
-        )
-        children = (
-            select(ActivityModel)
-            .join(cte, ActivityModel.parent_id == cte.c.id)
-            .where(ActivityModel.is_active == True)
+    async def get_by_activity_ids(
+        self,
+        activity_ids: list[int],
+        pagination: Pagination | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        """Организации, связанные хотя бы с одной из деятельностей activity_ids"""
+        ids = bindparam("activity_ids", activity_ids, type_=ARRAY(Integer))
+        organization_ids = select(organization_activities.c.organization_id).where(
+            organization_activities.c.activity_id == any_(ids)
         )
-        cte = cte.union_all(children)
-        stmt = (
+        stmt = self._paginate(
             select(OrganizationModel)
-            .join(organization_activities, OrganizationModel.id == organization_activities.c.organization_id)
-            .join(cte, cte.c.id == organization_activities.c.activity_id)
-            .where(OrganizationModel.is_active == True)
-            .options(*self.COMMON_OPTIONS)
-            .distinct(OrganizationModel.id)
+            .where(OrganizationModel.id.in_(organization_ids), OrganizationModel.is_active == True)
+            .options(*self._options(fieldset)),
+            pagination,
         )
-        organizations = await self.db.scalars(stmt)
+        organizations = await self.read_db.scalars(stmt)
         return organizations.all()
 
-    async def create(self, organization_create: OrganizationCreate):
-        organization_db = OrganizationModel(
-            name=organization_create.name, building_id=organization_create.building_id
+    async def check_references(
+        self, building_id: int, activity_ids: list[int], organization_id: int | None = None
+    ) -> ReferenceCheck:
+        """Одним запросом проверяет организацию, здание и деятельности перед записью"""
+        ids = bindparam("activity_ids", activity_ids, type_=ARRAY(Integer))
+        requested = select(func.unnest(ids).label("activity_id")).subquery("requested")
+        missing_activity_ids = (
+            select(func.array_agg(requested.c.activity_id))
+            .where(
+                ~exists().where(ActivityModel.id == requested.c.activity_id, ActivityModel.is_active == True)
+            )
+            .scalar_subquery()
+        )
+        organization_exists = (
+            exists().where(OrganizationModel.id == organization_id, OrganizationModel.is_active == True)
+            if organization_id is not None
+            else true()
+        )
+        building_exists = exists().where(BuildingModel.id == building_id, BuildingModel.is_active == True)
+        row = (
+            await self.db.execute(select(organization_exists, building_exists, missing_activity_ids))
+        ).one()
+        return ReferenceCheck(
+            organization_exists=row[0],
+            building_exists=row[1],
+            missing_activity_ids=sorted(set(row[2] or [])),
         )
-        self.db.add(organization_db)
-        await self.db.commit()
-        await self.db.refresh(organization_db)
 
-        for activity_id in organization_create.activity_ids:
-            await self.db.execute(
-                organization_activities.insert().values(
-                    organization_id=organization_db.id,
-                    activity_id=activity_id,
-                )
+    async def _link_activities(self, organization_id: int, activity_ids: list[int]) -> list[ActivityModel]:
+        """Связывает организацию с деятельностями одним INSERT ... SELECT unnest(:ids)"""
+        ids = bindparam("activity_ids", activity_ids, type_=ARRAY(Integer))
+        requested = select(func.unnest(ids).label("activity_id")).distinct().subquery("requested")
+        inserted = (
+            insert(organization_activities)
+            .from_select(
+                ["organization_id", "activity_id"],
+                select(literal(organization_id), requested.c.activity_id),
             )
+            .returning(organization_activities.c.activity_id)
+            .cte("inserted")
+        )
+        result = await self.db.scalars(
+            select(ActivityModel)
+            .join(inserted, inserted.c.activity_id == ActivityModel.id)
+            .order_by(ActivityModel.id)
+        )
+        return result.all()
+
+    async def _attach_relations(
+        self, organization: OrganizationModel, activities: list[ActivityModel]
+    ) -> OrganizationModel:
+        """Проставляет связи из уже выбранных строк, без повторной выборки организации"""
+        set_committed_value(organization, "activities", activities)
+        set_committed_value(
+            organization, "building", await self.db.get(BuildingModel, organization.building_id)
+        )
+        return organization
+
+    async def create(self, organization_create: OrganizationCreate) -> OrganizationModel:
+        organization_db = await self.db.scalar(
+            insert(OrganizationModel)
+            .values(name=organization_create.name, building_id=organization_create.building_id)
+            .returning(OrganizationModel)
+        )
+        activities = await self._link_activities(organization_db.id, organization_create.activity_ids)
+        await self._attach_relations(organization_db, activities)
+        await bump_table_versions(self.db, ["organizations"])
         await self.db.commit()
-        return await self.get_by_id(organization_db.id)
+        return organization_db
 
     async def update(
         self, organization_id: int, organization_update: OrganizationCreate
-    ) -> OrganizationModel:
-        result = await self.db.execute(
+    ) -> OrganizationModel | None:
+        organization_db = await self.db.scalar(
             update(OrganizationModel)
-            .where(OrganizationModel.id == organization_id)
+            .where(OrganizationModel.id == organization_id, OrganizationModel.is_active == True)
             .values(
                 name=organization_update.name,
                 building_id=organization_update.building_id,
             )
+            .returning(OrganizationModel)
+            .execution_options(populate_existing=True)
         )
-        await self.db.commit()
+        if organization_db is None:
+            await self.db.rollback()
+            return None
 
         await self.db.execute(
             organization_activities.delete().where(
                 organization_activities.c.organization_id == organization_id
             )
         )
+        activities = await self._link_activities(organization_id, organization_update.activity_ids)
+        await self._attach_relations(organization_db, activities)
+        await bump_table_versions(self.db, ["organizations"])
+        await self.db.commit()
+        return organization_db
 
-        for activity_id in organization_update.activity_ids:
-            await self.db.execute(
-                organization_activities.insert().values(
-                    organization_id=organization_id,
-                    activity_id=activity_id,
-                )
-            )
-
+    async def delete(self, organization_id: int) -> bool:
+        """Снимает организацию вместе с ее телефонами"""
+        result = await self.db.execute(deactivate(OrganizationModel, OrganizationModel.id == organization_id))
+        deleted = result.first() is not None
+        if deleted:
+            await self.db.execute(deactivate(PhoneModel, PhoneModel.organization_id == organization_id))
+            await bump_table_versions(self.db, ["organizations", "phones"])
         await self.db.commit()
+        return deleted
+
+    async def get_deleted(self, organization_id: int) -> OrganizationModel | None:
+        """Снятая организация, без связей"""
+        result = await self.db.scalars(
+            select(OrganizationModel).where(
+                OrganizationModel.id == organization_id, OrganizationModel.is_active == False
+            )
+        )
+        return result.first()
 
-        if result.rowcount > 0:
-            return await self.get_by_id(organization_id)
-        return None
+    async def restore(self, organization_id: int) -> list[int] | None:
+        """
+        Восстанавливает организацию и телефоны, снятые вместе с ней.
 
-    async def delete(self, organization_id: int) -> bool:
-        result = await self.db.execute(
-            update(OrganizationModel).where(OrganizationModel.id == organization_id).values(is_active=False)
+        Возвращает id деятельностей восстановленной организации или None, если она не восстановлена.
+        Организация снятого здания не восстанавливается: активные организации всегда
+        находятся в активных зданиях.
+        """
+        building_active = exists().where(
+            BuildingModel.id == OrganizationModel.building_id, BuildingModel.is_active == True
         )
+        row = (
+            await self.db.execute(restore_row(OrganizationModel, organization_id, building_active))
+        ).first()
+        if row is None:
+            await self.db.commit()
+            return None
+        if row.deleted_at is not None:
+            of_organization = PhoneModel.organization_id == organization_id
+            await self.db.execute(reactivate(PhoneModel, row.deleted_at, of_organization))
+        activity_ids = await select_activity_ids(self.db, [organization_id])
+        await bump_table_versions(self.db, ["organizations", "phones"])
         await self.db.commit()
-        return result.rowcount > 0
+        return activity_ids[organization_id]
@@ -1,30 +1,41 @@
 # ruff:noqa:E712
-from sqlalchemy import select, update
+from sqlalchemy import ARRAY, Integer, any_, bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import (
     Phone as PhoneModel,
 )
+from app.repositories.versions import bump_table_versions
 from app.schemas import PhoneCreate
 
 
 class PhoneRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
         self.db = db
+        self.read_db = read_db or db
 
     async def get_all(self) -> list[PhoneModel]:
-        result = await self.db.scalars(select(PhoneModel).where(PhoneModel.is_active == True))
+        result = await self.read_db.scalars(select(PhoneModel).where(PhoneModel.is_active == True))
         return result.all()
 
     async def get_by_id(self, phone_id: int) -> PhoneModel | None:
-        result = await self.db.scalars(
+        result = await self.read_db.scalars(
             select(PhoneModel).where(PhoneModel.id == phone_id, PhoneModel.is_active == True)
         )
         return result.first()
 
+    async def get_by_ids(self, phone_ids: list[int]) -> list[PhoneModel]:
+        """Активные записи с id из списка одним запросом, в произвольном порядке"""
+        ids = bindparam("phone_ids", phone_ids, type_=ARRAY(Integer))
+        result = await self.read_db.scalars(
+            select(PhoneModel).where(PhoneModel.id == any_(ids), PhoneModel.is_active == True)
+        )
+        return result.all()
+
     async def create(self, phone_create: PhoneCreate) -> PhoneModel:
         phone_db = PhoneModel(**phone_create.model_dump())
         self.db.add(phone_db)
+        await bump_table_versions(self.db, ["phones"])
         await self.db.commit()
         await self.db.refresh(phone_db)
         return phone_db
@@ -33,6 +44,8 @@ class PhoneRepository:
         result = await self.db.execute(
             update(PhoneModel).where(PhoneModel.id == phone_id).values(**phone_update.model_dump())
         )
+        if result.rowcount > 0:
+            await bump_table_versions(self.db, ["phones"])
         await self.db.commit()
         if result.rowcount > 0:
             return await self.get_by_id(phone_id)
@@ -42,5 +55,7 @@ class PhoneRepository:
         result = await self.db.execute(
             update(PhoneModel).where(PhoneModel.id == phone_id).values(is_active=False)
         )
+        if result.rowcount > 0:
+            await bump_table_versions(self.db, ["phones"])
         await self.db.commit()
         return result.rowcount > 0
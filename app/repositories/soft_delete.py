@@ -0,0 +1,56 @@
+# ruff:noqa:E712
+"""
+Каскадное мягкое удаление и восстановление.
+
+Запись снимается вместе с зависимыми строками: здание с организациями, организация с
+телефонами, деятельность с поддеревом. Каждая таблица обновляется одним запросом в одной
+транзакции, и все снятые строки получают одну метку deleted_at - время начала транзакции
+(now()). По этой метке восстановление возвращает ровно то, что было снято вместе с записью:
+зависимые строки, снятые раньше по отдельности, имеют другую метку и остаются снятыми.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, Update, func, update
+from sqlalchemy.orm import aliased
+
+
+def deactivate(model, *criteria: ColumnElement[bool]) -> Update:
+    """UPDATE, снимающий активные строки model по условиям; возвращает их id"""
+    return (
+        update(model)
+        .where(model.is_active == True, *criteria)
+        .values(is_active=False, deleted_at=func.now())
+        .returning(model.id)
+    )
+
+
+def reactivate(model, deleted_at: datetime, *criteria: ColumnElement[bool]) -> Update:
+    """
+    UPDATE, возвращающий строки model, снятые с меткой deleted_at; возвращает их id.
+
+    Записи, снятые до появления меток, имеют deleted_at NULL и зависимые строки не возвращают:
+    для них запрос не строится, сравнение с None дало бы IS NULL.
+    """
+    return (
+        update(model)
+        .where(model.is_active == False, model.deleted_at == deleted_at, *criteria)
+        .values(is_active=True, deleted_at=None)
+        .returning(model.id)
+    )
+
+
+def restore_row(model, record_id: int, *criteria: ColumnElement[bool]) -> Update:
+    """
+    UPDATE, восстанавливающий снятую запись model; возвращает ее метку deleted_at до восстановления.
+
+    Прежнее значение читается из той же таблицы под псевдонимом: в PostgreSQL строки из
+    FROM видны такими, какими были до выполнения запроса.
+    """
+    previous = aliased(model, name="previous")
+    return (
+        update(model)
+        .where(model.id == record_id, previous.id == model.id, model.is_active == False, *criteria)
+        .values(is_active=True, deleted_at=None)
+        .returning(previous.deleted_at)
+    )
@@ -0,0 +1,88 @@
+from collections.abc import Iterable
+
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import TableVersion as TableVersionModel
+from app.models import TableVersionChange as TableVersionChangeModel
+
+
+async def bump_table_versions(db: AsyncSession, tables: Iterable[str]) -> None:
+    """
+    Отмечает изменение таблиц в текущей транзакции, до ее фиксации.
+
+    В table_version_changes добавляется по строке на таблицу; они становятся видны вместе
+    с данными при commit. Вставка не блокирует общих строк, поэтому параллельные записи
+    в одну таблицу не ждут друг друга до конца транзакций.
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    await db.execute(insert(TableVersionChangeModel).values([{"table_name": table} for table in tables]))
+
+
+class TableVersionRepository:
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.db = db
+        self.read_db = read_db or db
+
+    async def get_versions(self, tables: Iterable[str]) -> list[Row]:
+        """
+        Версии таблиц (table_name, version, updated_at) одним запросом.
+
+        Версия - свернутый счетчик из table_versions плюс число еще не свернутых изменений.
+        Она растет с каждой зафиксированной записью независимо от порядка фиксации транзакций.
+        """
+        tables = list(tables)
+        changes = (
+            select(
+                TableVersionChangeModel.table_name,
+                func.count().label("changes"),
+                func.max(TableVersionChangeModel.changed_at).label("changed_at"),
+            )
+            .where(TableVersionChangeModel.table_name.in_(tables))
+            .group_by(TableVersionChangeModel.table_name)
+            .subquery()
+        )
+        result = await self.read_db.execute(
+            select(
+                TableVersionModel.table_name,
+                (TableVersionModel.version + func.coalesce(changes.c.changes, 0)).label("version"),
+                func.greatest(TableVersionModel.updated_at, changes.c.changed_at).label("updated_at"),
+            )
+            .outerjoin(changes, changes.c.table_name == TableVersionModel.table_name)
+            .where(TableVersionModel.table_name.in_(tables))
+            .order_by(TableVersionModel.table_name)
+        )
+        return result.all()
+
+    async def compact(self) -> None:
+        """
+        Сворачивает накопленные изменения в table_versions одним запросом.
+
+        Удаление изменений и прибавление их числа к версии становятся видны одновременно,
+        поэтому версии, которые видят читатели, не меняются. Изменения незафиксированных
+        транзакций запросу не видны и сворачиваются следующим вызовом.
+        """
+        moved = delete(TableVersionChangeModel).returning(
+            TableVersionChangeModel.table_name, TableVersionChangeModel.changed_at
+        )
+        moved = moved.cte("moved")
+        changes = (
+            select(
+                moved.c.table_name,
+                func.count().label("changes"),
+                func.max(moved.c.changed_at).label("changed_at"),
+            )
+            .group_by(moved.c.table_name)
+            .subquery()
+        )
+        await self.db.execute(
+            update(TableVersionModel)
+            .where(TableVersionModel.table_name == changes.c.table_name)
+            .values(
+                version=TableVersionModel.version + changes.c.changes,
+                updated_at=func.greatest(TableVersionModel.updated_at, changes.c.changed_at),
+            )
+        )
+        await self.db.commit()
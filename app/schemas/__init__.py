@@ -1,18 +1,88 @@
-from app.schemas.activity import Acivity, ActivityCreate
+from app.schemas.activity import Acivity, ActivityCreate, ActivityTree
+from app.schemas.batch import BatchRequest, BatchResult
 from app.schemas.building import Building, BuildingCreate
 from app.schemas.coordinate import CoordinateRadius, CoordinateRectangle
-from app.schemas.organization import Organization, OrganizationCreate
+from app.schemas.exports import ExportCompression, ExportFormat
+from app.schemas.imports import ImportEntity, ImportFormat, ImportReport, ImportRowError
+from app.schemas.job import Job, JobStatus
+from app.schemas.organization import (
+    Organization,
+    OrganizationCreate,
+    OrganizationSearchResult,
+    OrganizationWithDistance,
+)
+from app.schemas.organization_query import (
+    OrganizationPage,
+    OrganizationQuery,
+    OrganizationQueryItem,
+    OrganizationSort,
+    QueryPlan,
+)
+from app.schemas.pagination import Pagination
 from app.schemas.phone import Phone, PhoneCreate
+from app.schemas.pool import PoolStatus
+from app.schemas.projection import (
+    OrganizationFieldset,
+    sparse_adapter,
+    sparse_page_schema,
+    sparse_schema,
+)
+from app.schemas.rows import (
+    ACTIVITY_LIST,
+    NORMALIZED_ORGANIZATIONS,
+    ORGANIZATION_ROWS,
+    ORGANIZATION_WITH_DISTANCE_ROWS,
+    ActivityRow,
+    BuildingRow,
+    NormalizedOrganizationsRow,
+    OrganizationRefRow,
+    OrganizationRow,
+    OrganizationWithDistanceRow,
+)
 
 __all__ = [
     "Acivity",
     "ActivityCreate",
+    "ActivityTree",
     "Building",
     "BuildingCreate",
     "Organization",
     "OrganizationCreate",
+    "OrganizationWithDistance",
+    "OrganizationSearchResult",
+    "OrganizationPage",
+    "OrganizationQuery",
+    "OrganizationQueryItem",
+    "OrganizationSort",
+    "QueryPlan",
+    "OrganizationFieldset",
+    "sparse_adapter",
+    "sparse_page_schema",
+    "sparse_schema",
+    "ActivityRow",
+    "BuildingRow",
+    "OrganizationRow",
+    "OrganizationWithDistanceRow",
+    "OrganizationRefRow",
+    "NormalizedOrganizationsRow",
+    "ACTIVITY_LIST",
+    "NORMALIZED_ORGANIZATIONS",
+    "ORGANIZATION_ROWS",
+    "ORGANIZATION_WITH_DISTANCE_ROWS",
     "Phone",
     "PhoneCreate",
     "CoordinateRadius",
     "CoordinateRectangle",
+    "Pagination",
+    "BatchRequest",
+    "BatchResult",
+    "PoolStatus",
+    "ExportCompression",
+    "ExportFormat",
+    "ImportEntity",
+    "ImportFormat",
+    "ImportReport",
+    "ImportRowError",
+    "Job",
+    "JobStatus",
 ]
@@ -16,3 +16,7 @@ class Acivity(BaseModel):
     level: int = Field(..., ge=1, le=3)
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ActivityTree(Acivity):
+    children: list["ActivityTree"] = Field(default_factory=list)
@@ -0,0 +1,21 @@
+from typing import Annotated, Generic, TypeVar
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class BatchRequest(BaseModel):
+    ids: Annotated[
+        list[Annotated[int, Field(ge=1)]],
+        Field(min_length=1, max_length=settings.BATCH_MAX_IDS, description="id в нужном порядке ответа"),
+    ]
+
+
+class BatchResult(BaseModel, Generic[T]):
+    """Найденные объекты в порядке запрошенных id (повторы id - один раз) и id, которых нет"""
+
+    items: list[T]
+    missing: list[int]
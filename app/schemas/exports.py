@@ -0,0 +1,4 @@
+from typing import Literal
+
+ExportFormat = Literal["ndjson", "csv", "columnar"]
+ExportCompression = Literal["none", "gzip", "zstd"]
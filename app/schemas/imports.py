@@ -0,0 +1,22 @@
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, Field
+
+ImportEntity = Literal["building", "activity", "organization", "phone"]
+ImportFormat = Literal["ndjson", "csv"]
+
+
+class ImportRowError(BaseModel):
+    line: Annotated[int, Field(..., ge=1, description="Номер строки во входном файле")]
+    entity: ImportEntity | None = None
+    error: str
+
+
+class ImportReport(BaseModel):
+    received: Annotated[int, Field(0, ge=0, description="Прочитано строк с данными")]
+    inserted: Annotated[int, Field(0, ge=0, description="Добавлено новых записей")]
+    skipped: Annotated[int, Field(0, ge=0, description="Пропущено записей, которые уже существуют")]
+    failed: Annotated[int, Field(0, ge=0, description="Строк с ошибками")]
+    errors: list[ImportRowError] = Field(default_factory=list)
+    elapsed_seconds: Annotated[float, Field(0.0, ge=0)]
+    rows_per_second: Annotated[float, Field(0.0, ge=0)]
@@ -19,3 +19,11 @@ class Organization(BaseModel):
     is_active: Annotated[bool, Field(default=True)]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class OrganizationWithDistance(Organization):
+    distance_km: Annotated[float, Field(..., ge=0, description="Расстояние до точки поиска в км")]
+
+
+class OrganizationSearchResult(Organization):
+    score: Annotated[float, Field(..., ge=0, le=1, description="Релевантность названия запросу")]
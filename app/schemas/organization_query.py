@@ -0,0 +1,57 @@
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.schemas import Organization
+
+OrganizationSort = Literal["id", "name", "distance"]
+
+
+class OrganizationQuery(BaseModel):
+    building_id: Annotated[int | None, Field(None, ge=1, description="Здание организации")]
+    activity_id: Annotated[int | None, Field(None, ge=1, description="Деятельность организации")]
+    include_children: Annotated[bool, Field(True, description="Учитывать потомков деятельности")]
+    name: Annotated[str | None, Field(None, min_length=1, max_length=155, description="Часть названия")]
+    lat: Annotated[float | None, Field(None, ge=-90.0, le=90.0, description="Широта точки")]
+    lon: Annotated[float | None, Field(None, ge=-180.0, le=180.0, description="Долгота точки")]
+    radius_km: Annotated[float | None, Field(None, gt=0, le=6371, description="Радиус вокруг точки, км")]
+    lat_min: Annotated[float | None, Field(None, ge=-90.0, le=90.0)]
+    lat_max: Annotated[float | None, Field(None, ge=-90.0, le=90.0)]
+    lon_min: Annotated[float | None, Field(None, ge=-180.0, le=180.0)]
+    lon_max: Annotated[float | None, Field(None, ge=-180.0, le=180.0)]
+    sort: Annotated[OrganizationSort, Field("id", description="Поле сортировки; distance требует lat и lon")]
+    limit: Annotated[int, Field(100, ge=1, le=1000, description="Размер страницы")]
+    cursor: Annotated[str | None, Field(None, description="next_cursor предыдущей страницы")]
+    explain: Annotated[
+        Literal["plan", "analyze"] | None,
+        Field(None, description="Вернуть план запроса вместо результатов"),
+    ]
+
+    @model_validator(mode="after")
+    def check_groups(self) -> "OrganizationQuery":
+        if (self.lat is None) != (self.lon is None):
+            raise ValueError("lat and lon must be given together")
+        if self.radius_km is not None and self.lat is None:
+            raise ValueError("radius_km requires lat and lon")
+        if self.sort == "distance" and self.lat is None:
+            raise ValueError("sort=distance requires lat and lon")
+        rectangle = (self.lat_min, self.lat_max, self.lon_min, self.lon_max)
+        if any(value is not None for value in rectangle) and any(value is None for value in rectangle):
+            raise ValueError("lat_min, lat_max, lon_min and lon_max must be given together")
+        return self
+
+
+class OrganizationQueryItem(Organization):
+    distance_km: Annotated[
+        float | None, Field(None, ge=0, description="Расстояние до точки, если она задана")
+    ]
+
+
+class OrganizationPage(BaseModel):
+    items: list[OrganizationQueryItem]
+    next_cursor: Annotated[str | None, Field(None, description="Курсор следующей страницы")]
+
+
+class QueryPlan(BaseModel):
+    sql: str
+    plan: list[str]
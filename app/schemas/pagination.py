@@ -0,0 +1,15 @@
+from collections.abc import Sequence
+from typing import Annotated
+
+from pydantic import BaseModel, Field
+
+
+class Pagination(BaseModel):
+    limit: Annotated[int, Field(100, ge=1, le=1000, description="Максимальное количество записей")]
+    after: Annotated[int | None, Field(None, ge=0, description="id последней записи предыдущей страницы")]
+
+    def next_after(self, page: Sequence) -> int | None:
+        """Курсор следующей страницы: id последней записи полной страницы, None - страница последняя"""
+        if len(page) < self.limit:
+            return None
+        return page[-1].id
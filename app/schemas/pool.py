@@ -0,0 +1,15 @@
+from typing import Annotated
+
+from pydantic import BaseModel, Field
+
+
+class PoolStatus(BaseModel):
+    pool_size: Annotated[int, Field(..., description="Постоянных соединений в пуле")]
+    max_overflow: Annotated[int, Field(..., description="Допустимо соединений сверх pool_size")]
+    checked_out: Annotated[int, Field(..., description="Соединений выдано запросам")]
+    idle: Annotated[int, Field(..., description="Свободных соединений в пуле")]
+    overflow: Annotated[int, Field(..., description="Открыто соединений сверх pool_size")]
+    checkouts: Annotated[int, Field(..., description="Всего выдач соединений с запуска процесса")]
+    timeouts: Annotated[int, Field(..., description="Запросов, не дождавшихся соединения за pool_timeout")]
+    wait_avg_ms: Annotated[float, Field(..., description="Среднее ожидание соединения, мс")]
+    wait_max_ms: Annotated[float, Field(..., description="Максимальное ожидание соединения, мс")]
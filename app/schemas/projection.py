@@ -0,0 +1,120 @@
+from functools import lru_cache
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+from app.schemas import Acivity, Building, Organization, OrganizationPage, OrganizationQueryItem, Phone
+
+# Вложенные объекты организации и схемы, из полей которых можно выбирать
+RELATION_SCHEMAS: dict[str, type[BaseModel]] = {
+    "building": Building,
+    "activities": Acivity,
+    "phones": Phone,
+}
+DEFAULT_RELATIONS = ("building", "activities")
+ORGANIZATION_COLUMNS = tuple(name for name in Organization.model_fields if name not in RELATION_SCHEMAS)
+
+
+class OrganizationFieldset(BaseModel):
+    """
+    Выбранные поля организации: собственные колонки и вложенные объекты.
+
+    Для вложенного объекта хранится набор его полей, None - объект не нужен.
+    id организации выбирается всегда, он нужен для курсоров пагинации.
+    """
+
+    columns: frozenset[str]
+    building: frozenset[str] | None = None
+    activities: frozenset[str] | None = None
+    phones: frozenset[str] | None = None
+
+    model_config = ConfigDict(frozen=True)
+
+    @classmethod
+    def parse(cls, fields: str | None, include: str | None) -> "OrganizationFieldset | None":
+        """
+        Разбирает параметры fields и include.
+
+        fields - список через запятую: колонки организации (id, name), вложенные объекты
+        целиком (building) или их отдельные поля (building.latitude). Без fields выбираются
+        все колонки, здание и деятельности, как в полном ответе. include добавляет вложенные
+        объекты целиком, в том числе телефоны, которых нет в полном ответе.
+        Без обоих параметров возвращает None. Неизвестные поля - ValueError.
+        """
+        if not fields and not include:
+            return None
+        columns = {"id"}
+        relations: dict[str, set[str]] = {}
+        if not fields:
+            columns.update(ORGANIZATION_COLUMNS)
+            relations.update((name, set(RELATION_SCHEMAS[name].model_fields)) for name in DEFAULT_RELATIONS)
+        for item in _split(fields):
+            name, _, field = item.partition(".")
+            if not field and name in ORGANIZATION_COLUMNS:
+                columns.add(name)
+            elif name not in RELATION_SCHEMAS:
+                raise ValueError(f"Unknown field {item!r}, available: {_available()}")
+            elif not field:
+                relations[name] = set(RELATION_SCHEMAS[name].model_fields)
+            elif field in RELATION_SCHEMAS[name].model_fields:
+                relations.setdefault(name, set()).add(field)
+            else:
+                raise ValueError(f"Unknown field {item!r}, available: {_available()}")
+        for name in _split(include):
+            if name not in RELATION_SCHEMAS:
+                raise ValueError(f"Unknown include {name!r}, available: {', '.join(RELATION_SCHEMAS)}")
+            relations[name] = set(RELATION_SCHEMAS[name].model_fields)
+        return cls(columns=columns, **{name: frozenset(values) for name, values in relations.items()})
+
+    def relation_fields(self) -> dict[str, frozenset[str]]:
+        return {name: getattr(self, name) for name in RELATION_SCHEMAS if getattr(self, name) is not None}
+
+
+def _split(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def _available() -> str:
+    return ", ".join(
+        [*ORGANIZATION_COLUMNS]
+        + [f"{name}[.{'|'.join(schema.model_fields)}]" for name, schema in RELATION_SCHEMAS.items()]
+    )
+
+
+def _partial(schema: type[BaseModel], names: frozenset[str], **extra) -> type[BaseModel]:
+    fields = {name: (field.annotation, field) for name, field in schema.model_fields.items() if name in names}
+    suffix = "_".join(sorted(names))
+    return create_model(
+        f"{schema.__name__}_{suffix}", __config__=ConfigDict(from_attributes=True), **fields, **extra
+    )
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema: type[Organization], fieldset: OrganizationFieldset) -> type[BaseModel]:
+    """
+    Схема ответа только с выбранными полями.
+
+    Поля, которые schema добавляет к Organization (distance_km, score), сохраняются всегда.
+    Схемы строятся один раз на сочетание полей.
+    """
+    names = set(fieldset.columns) | (set(schema.model_fields) - set(Organization.model_fields))
+    relations = {}
+    for name, relation_names in fieldset.relation_fields().items():
+        partial = _partial(RELATION_SCHEMAS[name], relation_names)
+        relations[name] = (partial if name == "building" else list[partial], ...)
+    return _partial(schema, frozenset(names), **relations)
+
+
+@lru_cache(maxsize=256)
+def sparse_adapter(schema: type[Organization], fieldset: OrganizationFieldset) -> TypeAdapter:
+    """TypeAdapter списка организаций в схеме sparse_schema"""
+    return TypeAdapter(list[sparse_schema(schema, fieldset)])
+
+
+@lru_cache(maxsize=256)
+def sparse_page_schema(fieldset: OrganizationFieldset) -> type[BaseModel]:
+    """Страница OrganizationPage с элементами в схеме sparse_schema"""
+    return create_model(
+        "OrganizationPage_sparse",
+        items=(list[sparse_schema(OrganizationQueryItem, fieldset)], ...),
+        next_cursor=(OrganizationPage.model_fields["next_cursor"].annotation, None),
+    )
@@ -0,0 +1,60 @@
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from app.schemas import Acivity
+
+
+class BuildingRow(TypedDict):
+    id: int
+    address: str
+    latitude: float
+    longitude: float
+    is_active: bool
+
+
+class ActivityRow(TypedDict):
+    id: int
+    name: str
+    parent_id: int | None
+    is_active: bool
+    level: int
+
+
+class OrganizationRow(TypedDict):
+    """Организация в форме схемы Organization, собранная из строк выборки без моделей Pydantic"""
+
+    id: int
+    name: str
+    is_active: bool
+    building: BuildingRow
+    activities: list[ActivityRow]
+
+
+class OrganizationWithDistanceRow(OrganizationRow):
+    distance_km: float
+
+
+class OrganizationRefRow(TypedDict):
+    """Организация нормализованного ответа: здание и деятельности - ссылками по id"""
+
+    id: int
+    name: str
+    is_active: bool
+    building_id: int
+    activity_ids: list[int]
+
+
+class NormalizedOrganizationsRow(TypedDict):
+    """Организации со ссылками и по одному экземпляру каждого упомянутого здания и деятельности"""
+
+    organizations: list[OrganizationRefRow]
+    buildings: list[BuildingRow]
+    activities: list[ActivityRow]
+
+
+# Адаптеры собираются один раз при импорте; dump_json сериализует словари по схеме
+# в pydantic-core, не создавая экземпляров моделей
+ORGANIZATION_ROWS = TypeAdapter(list[OrganizationRow])
+ORGANIZATION_WITH_DISTANCE_ROWS = TypeAdapter(list[OrganizationWithDistanceRow])
+NORMALIZED_ORGANIZATIONS = TypeAdapter(NormalizedOrganizationsRow)
+ACTIVITY_LIST = TypeAdapter(list[Acivity])
@@ -1,6 +1,17 @@
 from app.services.activities import ActivityService
 from app.services.buildings import BuildingService
+from app.services.exports import ExportService
+from app.services.imports import ImportService
+from app.services.jobs import JobService
 from app.services.organizations import OrganizationService
 from app.services.phones import PhoneService
 
-__all__ = ["ActivityService", "BuildingService", "PhoneService", "OrganizationService"]
+__all__ = [
+    "ActivityService",
+    "BuildingService",
+    "PhoneService",
+    "OrganizationService",
+    "ImportService",
+    "ExportService",
+    "JobService",
+]
@@ -1,53 +1,136 @@
 from app.core import BusinessException, NotFoundException
+from app.core.cache import CacheBackend, invalidate_organizations
 from app.models import Activity as ActivityModel
-from app.repositories import ActivityRepository
-from app.schemas import ActivityCreate
+from app.repositories import ActivityRepository, OrganizationRepository, RequestLoaders
+from app.schemas import Acivity, ActivityCreate, ActivityTree
+from app.services.activity_tree import ActivityTreeCache
+from app.services.batch import order_by_ids
+
+MAX_ACTIVITY_LEVEL = 3
 
 
 class ActivityService:
-    def __init__(self, activity_repo: ActivityRepository):
+    def __init__(
+        self,
+        activity_repo: ActivityRepository,
+        organization_repo: OrganizationRepository,
+        activity_tree: ActivityTreeCache,
+        cache: CacheBackend | None = None,
+        loaders: RequestLoaders | None = None,
+    ):
         self.activity_repo = activity_repo
+        self.organization_repo = organization_repo
+        self.activity_tree = activity_tree
+        self.cache = cache
+        self.loaders = loaders or RequestLoaders(db=activity_repo.db, read_db=activity_repo.read_db)
+
+    async def get_all_activities(self) -> list[Acivity]:
+        snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+        return list(snapshot.nodes.values())
 
-    async def get_all_activities(self) -> list[ActivityModel]:
-        return await self.activity_repo.get_all()
+    async def get_all_activities_json(self) -> bytes:
+        snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+        return snapshot.nodes_json
 
-    async def get_activity(self, activity_id: int) -> ActivityModel | None:
-        activity = await self.activity_repo.get_by_id(activity_id)
+    async def get_activity(self, activity_id: int) -> Acivity | None:
+        snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+        activity = snapshot.nodes.get(activity_id)
         if not activity:
             raise NotFoundException(detail=f"Activity with id {activity_id} not found")
         return activity
 
+    async def get_activities_batch(self, activity_ids: list[int]) -> tuple[list[Acivity], list[int]]:
+        """Деятельности в порядке activity_ids из снимка дерева, как и get_activity, без запроса к БД"""
+        snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+        return order_by_ids(activity_ids, snapshot.nodes)
+
+    async def get_activity_tree(self) -> list[ActivityTree]:
+        snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+        return [snapshot.subtree(root_id) for root_id in snapshot.roots]
+
     async def create_activity(self, activity_create: ActivityCreate) -> ActivityModel:
         if activity_create.parent_id:
-            activity = await self.activity_repo.get_by_id(activity_create.parent_id)
+            activity = await self.loaders.activities.load(activity_create.parent_id)
             if not activity:
                 raise NotFoundException(
                     status_code=401,
                     detail=f"Activity with {activity_create.parent_id} not found",
                 )
-        return await self.activity_repo.create(activity_create)
+            if activity.level >= MAX_ACTIVITY_LEVEL:
+                raise BusinessException(detail=f"Activity nesting is limited to {MAX_ACTIVITY_LEVEL} levels")
+        activity_db = await self.activity_repo.create(activity_create)
+        self.activity_tree.bump()
+        return activity_db
 
     async def update_activity(self, activity_id: int, activity_update: ActivityCreate) -> ActivityModel:
-        activity = await self.activity_repo.get_by_id(activity_id)
+        # Изменяемая деятельность и новый родитель выбираются одним запросом
+        ids = [activity_id, activity_update.parent_id] if activity_update.parent_id else [activity_id]
+        activity, *parent = await self.loaders.activities.load_many(ids)
         if not activity:
             raise NotFoundException(f"Activity with id {activity_id} not found")
         if activity_update.parent_id:
-            activity = await self.activity_repo.get_by_id(activity_update.parent_id)
+            activity = parent[0]
             if not activity:
                 raise NotFoundException(
                     status_code=401,
                     detail=f"Activity with {activity_update.parent_id} not found",
                 )
+            if await self.activity_repo.is_descendant(activity_id, activity_update.parent_id):
+                raise BusinessException(detail=f"Activity {activity_id} can't be moved into its own subtree")
+            height = await self.activity_repo.get_subtree_height(activity_id)
+            if activity.level + 1 + height > MAX_ACTIVITY_LEVEL:
+                raise BusinessException(detail=f"Activity nesting is limited to {MAX_ACTIVITY_LEVEL} levels")
         else:
             activity_update.parent_id = None
+        snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+        affected_ids = list(snapshot.descendants.get(activity_id, {activity_id}))
         activity_db = await self.activity_repo.update(activity_id, activity_update)
+        self.loaders.activities.clear(activity_id)
+        self.activity_tree.bump()
+        await self._invalidate_organizations(affected_ids)
         if not activity_db:
             raise BusinessException(detail=f"Failed to update activity with id {activity_id}")
 
         return activity_db
 
     async def delete_activity(self, activity_id: int) -> bool:
-        activity = await self.activity_repo.get_by_id(activity_id)
+        activity = await self.loaders.activities.load(activity_id)
         if not activity:
             raise NotFoundException(f"Activity with id {activity_id} not found")
-        return await self.activity_repo.delete(activity_id)
+        activity_ids = await self.activity_repo.delete(activity_id)
+        for deleted_id in activity_ids:
+            self.loaders.activities.clear(deleted_id)
+        self.activity_tree.bump()
+        await self._invalidate_organizations(activity_ids)
+        return bool(activity_ids)
+
+    async def restore_activity(self, activity_id: int) -> ActivityModel:
+        """Возвращает деятельность вместе с поддеревом, снятым при ее удалении"""
+        activity = await self.activity_repo.get_deleted(activity_id)
+        if not activity:
+            raise NotFoundException(detail=f"Deleted activity with id {activity_id} not found")
+        if activity.parent_id:
+            parent = await self.loaders.activities.load(activity.parent_id)
+            if not parent:
+                raise BusinessException(
+                    status_code=409,
+                    detail=f"Parent activity with id {activity.parent_id} is deleted, restore it first",
+                )
+            height = await self.activity_repo.get_subtree_height(activity_id)
+            if parent.level + 1 + height > MAX_ACTIVITY_LEVEL:
+                raise BusinessException(detail=f"Activity nesting is limited to {MAX_ACTIVITY_LEVEL} levels")
+        activity_ids = await self.activity_repo.restore(activity_id)
+        if activity_ids is None:
+            raise BusinessException(
+                status_code=409, detail=f"Failed to restore activity with id {activity_id}"
+            )
+        self.activity_tree.bump()
+        await self._invalidate_organizations(activity_ids)
+        return await self.loaders.activities.load(activity_id)
+
+    async def _invalidate_organizations(self, activity_ids: list[int]) -> None:
+        """Сбрасывает кэш организаций, в которые встроены деятельности activity_ids"""
+        if self.cache is not None:
+            await invalidate_organizations(
+                self.cache, await self.organization_repo.get_ids_by_activities(activity_ids)
+            )
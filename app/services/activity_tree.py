@@ -0,0 +1,89 @@
+import time
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.repositories import ActivityRepository
+from app.schemas import ACTIVITY_LIST, Acivity, ActivityTree
+
+
+@dataclass
+class ActivityTreeSnapshot:
+    version: int
+    loaded_at: float
+    nodes: dict[int, Acivity] = field(default_factory=dict)
+    name_to_id: dict[str, int] = field(default_factory=dict)
+    children: dict[int | None, list[int]] = field(default_factory=dict)
+    descendants: dict[int, frozenset[int]] = field(default_factory=dict)
+    roots: list[int] = field(default_factory=list)
+    # Список всех деятельностей в JSON, сериализуется один раз на снимок
+    nodes_json: bytes = b"[]"
+
+    def subtree(self, activity_id: int) -> ActivityTree:
+        return ActivityTree(
+            **self.nodes[activity_id].model_dump(),
+            children=[self.subtree(child_id) for child_id in self.children.get(activity_id, [])],
+        )
+
+
+class ActivityTreeCache:
+    """Дерево активных деятельностей в памяти процесса.
+
+    Снимок дерева помечается версией, которую сервис деятельностей увеличивает при
+    каждой записи; устаревший снимок перечитывается из БД при следующем обращении.
+    ttl_seconds ограничивает время жизни снимка, чтобы подхватывать записи других воркеров.
+    Снимок общий для всех запросов процесса, поэтому читается с основной БД: отстающая реплика
+    сохранила бы под новой версией дерево до записи.
+    """
+
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._snapshot: ActivityTreeSnapshot | None = None
+
+    def bump(self) -> None:
+        self.version += 1
+
+    async def get_snapshot(self, activity_repo: ActivityRepository) -> ActivityTreeSnapshot:
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and snapshot.version == self.version
+            and time.monotonic() - snapshot.loaded_at < self.ttl_seconds
+        ):
+            record_cache_lookup("activity_tree", True)
+            return snapshot
+        record_cache_lookup("activity_tree", False)
+        version = self.version
+        activities = await activity_repo.get_all(primary=True)
+        snapshot = self._build(version, [Acivity.model_validate(activity) for activity in activities])
+        if version == self.version:
+            self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _build(version: int, activities: list[Acivity]) -> ActivityTreeSnapshot:
+        snapshot = ActivityTreeSnapshot(version=version, loaded_at=time.monotonic())
+        for activity in sorted(activities, key=lambda activity: activity.id):
+            snapshot.nodes[activity.id] = activity
+            snapshot.name_to_id.setdefault(activity.name, activity.id)
+        for activity in snapshot.nodes.values():
+            if activity.parent_id in snapshot.nodes:
+                snapshot.children.setdefault(activity.parent_id, []).append(activity.id)
+            else:
+                snapshot.roots.append(activity.id)
+
+        def collect(activity_id: int) -> frozenset[int]:
+            ids = {activity_id}
+            for child_id in snapshot.children.get(activity_id, []):
+                ids |= collect(child_id)
+            snapshot.descendants[activity_id] = frozenset(ids)
+            return snapshot.descendants[activity_id]
+
+        for root_id in snapshot.roots:
+            collect(root_id)
+        snapshot.nodes_json = ACTIVITY_LIST.dump_json(list(snapshot.nodes.values()))
+        return snapshot
+
+
+activity_tree_cache = ActivityTreeCache(ttl_seconds=settings.ACTIVITY_TREE_TTL_SECONDS)
@@ -0,0 +1,22 @@
+from collections.abc import Iterable, Mapping
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+def order_by_ids(ids: Iterable[int], found: Mapping[int, T]) -> tuple[list[T], list[int]]:
+    """
+    Раскладывает результат пакетной выборки по порядку запрошенных id.
+
+    Повторяющиеся id учитываются один раз. Возвращает найденные объекты
+    и id, для которых объекта нет, оба списка в порядке запроса.
+    """
+    items: list[T] = []
+    missing: list[int] = []
+    for item_id in dict.fromkeys(ids):
+        item = found.get(item_id)
+        if item is None:
+            missing.append(item_id)
+        else:
+            items.append(item)
+    return items, missing
@@ -1,37 +1,107 @@
 from app.core import BusinessException, NotFoundException
+from app.core.activity_index import ActivityPostingIndex
+from app.core.cache import CacheBackend, invalidate_organizations
+from app.core.spatial_index import BuildingGridIndex
 from app.models import Building as BuildingModel
-from app.repositories import BuildingRepository
+from app.repositories import BuildingRepository, OrganizationRepository, RequestLoaders
 from app.schemas import BuildingCreate
+from app.services.batch import order_by_ids
 
 
 class BuildingService:
-    def __init__(self, building_repo: BuildingRepository):
+    def __init__(
+        self,
+        building_repo: BuildingRepository,
+        organization_repo: OrganizationRepository,
+        spatial_index: BuildingGridIndex | None = None,
+        cache: CacheBackend | None = None,
+        loaders: RequestLoaders | None = None,
+        activity_index: ActivityPostingIndex | None = None,
+    ):
         self.building_repo = building_repo
+        self.organization_repo = organization_repo
+        self.spatial_index = spatial_index
+        self.cache = cache
+        self.loaders = loaders or RequestLoaders(db=building_repo.db, read_db=building_repo.read_db)
+        self.activity_index = activity_index
 
     async def get_all_buildings(self) -> list[BuildingModel]:
         return await self.building_repo.get_all()
 
     async def get_building(self, building_id: int) -> BuildingModel | None:
-        building = await self.building_repo.get_by_id(building_id)
+        building = await self.loaders.buildings.load(building_id)
         if not building:
             raise NotFoundException(detail=f"Building with id {building_id} not found")
         return building
 
+    async def get_buildings_batch(self, building_ids: list[int]) -> tuple[list[BuildingModel], list[int]]:
+        """Здания в порядке building_ids и id, которых нет среди активных зданий"""
+        buildings = await self.loaders.buildings.load_many(building_ids)
+        return order_by_ids(building_ids, dict(zip(building_ids, buildings, strict=True)))
+
+    async def rebuild_spatial_index(self) -> None:
+        if self.spatial_index is None:
+            return
+        buildings = await self.building_repo.get_all()
+        self.spatial_index.load(
+            (building.id, building.latitude, building.longitude) for building in buildings
+        )
+
     async def create_building(self, building_create: BuildingCreate) -> BuildingModel:
-        return await self.building_repo.create(building_create)
+        building_db = await self.building_repo.create(building_create)
+        if self.spatial_index is not None:
+            self.spatial_index.upsert(building_db.id, building_db.latitude, building_db.longitude)
+        return building_db
 
     async def update_building(self, building_id: int, building_update: BuildingCreate) -> BuildingModel:
-        building = await self.building_repo.get_by_id(building_id)
+        building = await self.loaders.buildings.load(building_id)
         if not building:
             raise NotFoundException(detail=f"building with id {building_id} not found")
         building_db = await self.building_repo.update(building_id, building_update)
+        self.loaders.buildings.clear(building_id)
         if not building_db:
             raise BusinessException(detail=f"Failed to update building with id {building_id}")
+        if self.spatial_index is not None:
+            self.spatial_index.upsert(building_db.id, building_db.latitude, building_db.longitude)
+        await self._invalidate_organizations(building_id)
 
         return building_db
 
     async def delete_building(self, building_id: int) -> bool:
-        building = await self.building_repo.get_by_id(building_id)
+        building = await self.loaders.buildings.load(building_id)
         if not building:
             raise NotFoundException(detail=f"building with id {building_id} not found")
-        return await self.building_repo.delete(building_id)
+        organization_ids = await self.building_repo.delete(building_id)
+        self.loaders.buildings.clear(building_id)
+        if organization_ids is None:
+            return False
+        if self.spatial_index is not None:
+            self.spatial_index.remove(building_id)
+        for organization_id in organization_ids:
+            self.loaders.organizations.clear(organization_id)
+            if self.activity_index is not None:
+                self.activity_index.remove_organization(organization_id)
+        await self._invalidate_organizations(building_id)
+        return True
+
+    async def restore_building(self, building_id: int) -> BuildingModel:
+        """Возвращает здание вместе с организациями и телефонами, снятыми при его удалении"""
+        activity_ids = await self.building_repo.restore(building_id)
+        if activity_ids is None:
+            raise NotFoundException(detail=f"Deleted building with id {building_id} not found")
+        # Индекс деятельностей меняется сразу после commit, до шагов, которые могут упасть
+        if self.activity_index is not None:
+            for organization_id, ids in activity_ids.items():
+                self.activity_index.set_organization(organization_id, ids)
+        building_db = await self.building_repo.get_by_id(building_id)
+        if self.spatial_index is not None:
+            self.spatial_index.upsert(building_db.id, building_db.latitude, building_db.longitude)
+        await self._invalidate_organizations(building_id)
+        return building_db
+
+    async def _invalidate_organizations(self, building_id: int) -> None:
+        """Сбрасывает кэш организаций, в которые встроено здание building_id"""
+        if self.cache is not None:
+            await invalidate_organizations(
+                self.cache, await self.organization_repo.get_ids_by_building(building_id)
+            )
@@ -0,0 +1,149 @@
+import csv
+import gzip
+import io
+import json
+from collections.abc import AsyncIterator, Callable
+
+from app.core import BusinessException
+from app.repositories import OrganizationRepository
+from app.schemas import ExportCompression, ExportFormat
+
+EXPORT_COLUMNS = (
+    "id",
+    "name",
+    "building_id",
+    "address",
+    "latitude",
+    "longitude",
+    "activity_ids",
+    "activity_names",
+    "phones",
+)
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "columnar": "application/x-ndjson",
+}
+FILE_EXTENSIONS: dict[str, str] = {
+    "ndjson": ".ndjson",
+    "csv": ".csv",
+    "columnar": ".columns.ndjson",
+    "none": "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+
+def _encode_ndjson(records: list[dict], header: bool) -> bytes:
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode()
+
+
+def _encode_csv(records: list[dict], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for record in records:
+        writer.writerow(
+            ";".join(map(str, value)) if isinstance(value, list) else value for value in record.values()
+        )
+    return buffer.getvalue().encode()
+
+
+def _encode_columnar(records: list[dict], header: bool) -> bytes:
+    """Порция записей одной строкой JSON: по массиву значений на колонку"""
+    chunk = {
+        "count": len(records),
+        "last_id": records[-1]["id"],
+        "columns": {column: [record[column] for record in records] for column in EXPORT_COLUMNS},
+    }
+    return (json.dumps(chunk, ensure_ascii=False) + "\n").encode()
+
+
+ENCODERS: dict[str, Callable[[list[dict], bool], bytes]] = {
+    "ndjson": _encode_ndjson,
+    "csv": _encode_csv,
+    "columnar": _encode_columnar,
+}
+
+
+def get_compressor(compression: ExportCompression) -> Callable[[bytes], bytes]:
+    if compression == "gzip":
+        return lambda data: gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise BusinessException(detail="zstd compression requires the 'zstandard' package") from e
+        return zstandard.ZstdCompressor(level=3).compress
+    return lambda data: data
+
+
+class ExportService:
+    def __init__(self, organization_repo: OrganizationRepository):
+        self.organization_repo = organization_repo
+
+    async def iter_records(self, after_id: int | None = None, chunk_size: int = 500) -> AsyncIterator[dict]:
+        """Собирает подряд идущие плоские строки одной организации в одну запись"""
+        record = None
+        async for row in self.organization_repo.stream_flat(after=after_id, chunk_size=chunk_size):
+            if record is None or record["id"] != row.id:
+                if record is not None:
+                    yield record
+                record = {
+                    "id": row.id,
+                    "name": row.name,
+                    "building_id": row.building_id,
+                    "address": row.address,
+                    "latitude": float(row.latitude),
+                    "longitude": float(row.longitude),
+                    "activity_ids": [],
+                    "activity_names": [],
+                    "phones": row.phones or [],
+                }
+            if row.activity_id is not None:
+                record["activity_ids"].append(row.activity_id)
+                record["activity_names"].append(row.activity_name)
+        if record is not None:
+            yield record
+
+    def export_organizations(
+        self,
+        format: ExportFormat,
+        compression: ExportCompression,
+        after_id: int | None = None,
+        chunk_size: int = 500,
+        header: bool = True,
+    ) -> AsyncIterator[tuple[bytes, int]]:
+        """
+        Выгружает активные организации порциями по chunk_size записей.
+
+        Отдает пары (байты порции, id последней организации в ней). Каждая сжатая порция -
+        отдельный gzip member / zstd frame, поэтому файл можно обрезать по любой границе
+        порции и продолжить выгрузку с after_id, дописав остаток в конец.
+        Недоступное сжатие проверяется сразу, до начала выгрузки.
+        """
+        compress = get_compressor(compression)
+        return self._iter_chunks(ENCODERS[format], compress, after_id, chunk_size, header and format == "csv")
+
+    async def _iter_chunks(
+        self,
+        encode: Callable[[list[dict], bool], bytes],
+        compress: Callable[[bytes], bytes],
+        after_id: int | None,
+        chunk_size: int,
+        header: bool,
+    ) -> AsyncIterator[tuple[bytes, int]]:
+        last_id = after_id or 0
+        records: list[dict] = []
+        async for record in self.iter_records(after_id=after_id, chunk_size=chunk_size):
+            records.append(record)
+            if len(records) >= chunk_size:
+                last_id = records[-1]["id"]
+                yield compress(encode(records, header)), last_id
+                header = False
+                records = []
+        if records:
+            yield compress(encode(records, header)), records[-1]["id"]
+        elif header:
+            yield compress(encode([], header)), last_id
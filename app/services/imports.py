@@ -0,0 +1,337 @@
+import csv
+import json
+import time
+from collections.abc import AsyncIterable, AsyncIterator
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.activity_index import ActivityPostingIndex
+from app.core.spatial_index import BuildingGridIndex
+from app.repositories import ImportRepository
+from app.schemas import (
+    ActivityCreate,
+    BuildingCreate,
+    ImportEntity,
+    ImportFormat,
+    ImportReport,
+    ImportRowError,
+    OrganizationCreate,
+    PhoneCreate,
+)
+from app.services.activities import MAX_ACTIVITY_LEVEL
+from app.services.activity_tree import ActivityTreeCache
+
+ENTITY_SCHEMAS: dict[str, type[BaseModel]] = {
+    "building": BuildingCreate,
+    "activity": ActivityCreate,
+    "organization": OrganizationCreate,
+    "phone": PhoneCreate,
+}
+# Порядок записи внутри пакета: сначала то, на что могут ссылаться следующие сущности
+WRITE_ORDER: tuple[ImportEntity, ...] = ("building", "activity", "organization", "phone")
+
+_entity_adapter = TypeAdapter(ImportEntity)
+
+
+async def aiter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Разбивает поток байтов на строки, не дожидаясь конца тела запроса"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+def _format_database_error(exc: SQLAlchemyError) -> str:
+    return str(getattr(exc, "orig", exc)).splitlines()[0]
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+@dataclass
+class _Row:
+    line: int
+    entity: ImportEntity
+    data: BaseModel
+
+
+@dataclass
+class _BatchResult:
+    inserted: int = 0
+    skipped: int = 0
+    errors: list[ImportRowError] = field(default_factory=list)
+    buildings: list = field(default_factory=list)
+    organization_activities: dict[int, list[int]] = field(default_factory=dict)
+    activities_inserted: bool = False
+
+    def merge(self, other: "_BatchResult") -> None:
+        self.inserted += other.inserted
+        self.skipped += other.skipped
+        self.errors.extend(other.errors)
+        self.buildings.extend(other.buildings)
+        self.organization_activities.update(other.organization_activities)
+        self.activities_inserted = self.activities_inserted or other.activities_inserted
+
+
+class ImportService:
+    def __init__(
+        self,
+        import_repo: ImportRepository,
+        activity_tree: ActivityTreeCache,
+        spatial_index: BuildingGridIndex | None = None,
+        activity_index: ActivityPostingIndex | None = None,
+    ):
+        self.import_repo = import_repo
+        self.activity_tree = activity_tree
+        self.spatial_index = spatial_index
+        self.activity_index = activity_index
+
+    async def import_lines(
+        self,
+        lines: AsyncIterable[str],
+        format: ImportFormat,
+        entity: ImportEntity | None,
+        batch_size: int,
+    ) -> ImportReport:
+        """
+        Импортирует записи из NDJSON или CSV пакетами по batch_size строк.
+
+        В NDJSON тип записи берется из поля "type" (или параметра entity), в CSV задается
+        параметром entity, а activity_ids перечисляются через ";". Каждый пакет пишется в своей
+        транзакции. Строки с ошибками валидации или ссылками на несуществующие записи попадают
+        в отчет и не прерывают импорт; уже существующие записи пропускаются. Если пакет отклонен
+        базой (значение не помещается в столбец, гонка по внешнему ключу), он повторяется
+        построчно, и ошибку получают только строки, на которых она возникла.
+        """
+        started = time.perf_counter()
+        report = ImportReport()
+        batch: list[_Row] = []
+        async for line, row_entity, payload in self._iter_records(lines, format, entity):
+            report.received += 1
+            row = self._validate(line, row_entity, payload, report)
+            if row is None:
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                await self._write_batch(batch, report)
+                batch = []
+        if batch:
+            await self._write_batch(batch, report)
+        report.errors.sort(key=lambda error: error.line)
+        report.failed = len(report.errors)
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        if report.elapsed_seconds > 0:
+            report.rows_per_second = round(report.received / report.elapsed_seconds, 1)
+        return report
+
+    @staticmethod
+    async def _iter_records(
+        lines: AsyncIterable[str], format: ImportFormat, entity: ImportEntity | None
+    ) -> AsyncIterator[tuple[int, str | None, dict | str]]:
+        """Отдает (номер строки, тип записи, данные или текст ошибки разбора)"""
+        header: list[str] | None = None
+        line_number = 0
+        async for text in lines:
+            line_number += 1
+            if not text.strip():
+                continue
+            if format == "csv":
+                values = next(csv.reader([text]))
+                if header is None:
+                    header = [name.strip() for name in values]
+                    continue
+                if len(values) != len(header):
+                    yield line_number, entity, f"expected {len(header)} columns, got {len(values)}"
+                    continue
+                payload = {name: value for name, value in zip(header, values, strict=True) if value != ""}
+                if "activity_ids" in payload:
+                    payload["activity_ids"] = [item for item in payload["activity_ids"].split(";") if item]
+                yield line_number, payload.pop("type", entity), payload
+            else:
+                try:
+                    payload = json.loads(text)
+                except json.JSONDecodeError as e:
+                    yield line_number, entity, f"invalid JSON: {e.msg}"
+                    continue
+                if not isinstance(payload, dict):
+                    yield line_number, entity, "expected a JSON object"
+                    continue
+                yield line_number, payload.pop("type", entity), payload
+
+    @staticmethod
+    def _validate(line: int, entity: str | None, payload: dict | str, report: ImportReport) -> _Row | None:
+        if isinstance(payload, str):
+            report.errors.append(ImportRowError(line=line, entity=entity, error=payload))
+            return None
+        try:
+            entity = _entity_adapter.validate_python(entity)
+        except ValidationError:
+            report.errors.append(
+                ImportRowError(
+                    line=line, error=f"unknown record type {entity!r}, expected one of {list(ENTITY_SCHEMAS)}"
+                )
+            )
+            return None
+        try:
+            data = ENTITY_SCHEMAS[entity].model_validate(payload)
+        except ValidationError as e:
+            report.errors.append(ImportRowError(line=line, entity=entity, error=_format_validation_error(e)))
+            return None
+        return _Row(line=line, entity=entity, data=data)
+
+    async def _write_batch(self, batch: list[_Row], report: ImportReport) -> None:
+        result = _BatchResult()
+        try:
+            for entity in WRITE_ORDER:
+                rows = [row for row in batch if row.entity == entity]
+                if rows:
+                    await getattr(self, f"_write_{entity}_rows")(rows, result)
+            await self.import_repo.commit()
+        except SQLAlchemyError:
+            await self.import_repo.rollback()
+            result = await self._write_rows_one_by_one(batch)
+        report.inserted += result.inserted
+        report.skipped += result.skipped
+        report.errors.extend(result.errors)
+        if self.spatial_index is not None:
+            for building in result.buildings:
+                self.spatial_index.upsert(building.id, float(building.latitude), float(building.longitude))
+        if self.activity_index is not None:
+            for organization_id, activity_ids in result.organization_activities.items():
+                self.activity_index.set_organization(organization_id, activity_ids)
+        if result.activities_inserted:
+            self.activity_tree.bump()
+
+    async def _write_rows_one_by_one(self, batch: list[_Row]) -> _BatchResult:
+        """
+        Повтор отклоненного пакета: строки пишутся по одной, каждая в своей точке сохранения.
+
+        Ошибка базы откатывает только свою строку и попадает в отчет с ее номером, остальные
+        строки пакета фиксируются одной транзакцией, как и при обычной записи.
+        """
+        result = _BatchResult()
+        for entity in WRITE_ORDER:
+            for row in batch:
+                if row.entity != entity:
+                    continue
+                row_result = _BatchResult()
+                try:
+                    async with self.import_repo.savepoint():
+                        await getattr(self, f"_write_{entity}_rows")([row], row_result)
+                except SQLAlchemyError as e:
+                    result.errors.append(
+                        ImportRowError(line=row.line, entity=row.entity, error=_format_database_error(e))
+                    )
+                    continue
+                result.merge(row_result)
+        try:
+            await self.import_repo.commit()
+        except SQLAlchemyError as e:
+            await self.import_repo.rollback()
+            error = _format_database_error(e)
+            return _BatchResult(
+                errors=[
+                    ImportRowError(line=row.line, entity=row.entity, error=f"batch rolled back: {error}")
+                    for row in batch
+                ]
+            )
+        return result
+
+    @staticmethod
+    def _unique(rows: list[_Row], key, result: _BatchResult) -> list[_Row]:
+        """Оставляет первую строку для каждого значения уникального ключа, повторы считаются пропущенными"""
+        seen = set()
+        unique = []
+        for row in rows:
+            value = key(row.data)
+            if value in seen:
+                result.skipped += 1
+                continue
+            seen.add(value)
+            unique.append(row)
+        return unique
+
+    async def _write_building_rows(self, rows: list[_Row], result: _BatchResult) -> None:
+        rows = self._unique(rows, lambda building: building.address, result)
+        buildings = await self.import_repo.insert_buildings([row.data for row in rows])
+        result.inserted += len(buildings)
+        result.skipped += len(rows) - len(buildings)
+        result.buildings.extend(buildings)
+
+    async def _write_activity_rows(self, rows: list[_Row], result: _BatchResult) -> None:
+        # Деятельностей мало, а родитель может оказаться в этом же пакете,
+        # поэтому они добавляются по одной, но в общей транзакции пакета
+        for row in rows:
+            if await self.import_repo.activity_exists(row.data):
+                result.skipped += 1
+                continue
+            activity_id = await self.import_repo.insert_activity(row.data, MAX_ACTIVITY_LEVEL)
+            if activity_id is None:
+                result.errors.append(
+                    ImportRowError(
+                        line=row.line,
+                        entity=row.entity,
+                        error=f"Activity with id {row.data.parent_id} not found "
+                        f"or nesting is limited to {MAX_ACTIVITY_LEVEL} levels",
+                    )
+                )
+                continue
+            result.inserted += 1
+            result.activities_inserted = True
+
+    async def _write_organization_rows(self, rows: list[_Row], result: _BatchResult) -> None:
+        rows = self._unique(rows, lambda organization: organization.name, result)
+        building_ids = await self.import_repo.get_active_building_ids({row.data.building_id for row in rows})
+        activity_ids = await self.import_repo.get_active_activity_ids(
+            {activity_id for row in rows for activity_id in row.data.activity_ids}
+        )
+        valid = []
+        for row in rows:
+            if row.data.building_id not in building_ids:
+                error = f"Building with id {row.data.building_id} not found"
+            elif missing := sorted(set(row.data.activity_ids) - activity_ids):
+                error = f"Activities with ids {missing} not found"
+            else:
+                valid.append(row)
+                continue
+            result.errors.append(ImportRowError(line=row.line, entity=row.entity, error=error))
+        if not valid:
+            return
+        inserted = await self.import_repo.insert_organizations([row.data for row in valid])
+        for row in valid:
+            if row.data.name in inserted:
+                result.organization_activities[inserted[row.data.name]] = row.data.activity_ids
+        result.inserted += len(inserted)
+        result.skipped += len(valid) - len(inserted)
+
+    async def _write_phone_rows(self, rows: list[_Row], result: _BatchResult) -> None:
+        rows = self._unique(rows, lambda phone: phone.phone_number, result)
+        organization_ids = await self.import_repo.get_active_organization_ids(
+            {row.data.organization_id for row in rows if row.data.organization_id is not None}
+        )
+        valid = []
+        for row in rows:
+            if row.data.organization_id is not None and row.data.organization_id not in organization_ids:
+                result.errors.append(
+                    ImportRowError(
+                        line=row.line,
+                        entity=row.entity,
+                        error=f"Organization with id {row.data.organization_id} not found",
+                    )
+                )
+                continue
+            valid.append(row)
+        if not valid:
+            return
+        inserted = await self.import_repo.insert_phones([row.data for row in valid])
+        result.inserted += len(inserted)
+        result.skipped += len(valid) - len(inserted)
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import BusinessException, NotFoundException
+from app.core.activity_index import activity_index
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.exceptions import AppException
+from app.core.metrics import registry
+from app.core.spatial_index import building_index
+from app.models import Job as JobModel
+from app.repositories import ActivityRepository, BuildingRepository, JobRepository, OrganizationRepository
+from app.schemas import Acivity, ActivityCreate
+from app.services.activities import ActivityService
+from app.services.activity_tree import activity_tree_cache
+from app.services.buildings import BuildingService
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, dict], Awaitable[dict | None]]
+
+JOB_DURATION = registry.histogram(
+    "job_duration_seconds", "Background job run time by kind and final status", ("kind", "status")
+)
+
+
+class JobQueue:
+    """
+    Очередь фоновых задач процесса: id задач в asyncio.Queue и пул из workers воркеров.
+
+    Сами задачи хранятся в таблице jobs, каждая выполняется в своей сессии. Задача, прерванная
+    остановкой процесса, возвращается в queued: ее транзакция откатывается, и задачу можно
+    повторить. Пока задача выполняется, ее аренда продлевается раз в heartbeat_seconds.
+    recover при старте и затем периодически возвращает в queued задачи running с истекшей
+    арендой (процесс упал, не вернув их) и добирает в очередь процесса задачи queued,
+    не поместившиеся в нее раньше.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        workers: int,
+        max_size: int = 0,
+        heartbeat_seconds: float = 15,
+        lease_seconds: int = 120,
+    ):
+        self.session_maker = session_maker
+        self.workers = workers
+        self.heartbeat_seconds = heartbeat_seconds
+        self.lease_seconds = lease_seconds
+        self._queue: asyncio.Queue[int] = asyncio.Queue(max_size)
+        self._handlers: dict[str, JobHandler] = {}
+        # Задачи в очереди процесса или у воркера: recover не ставит их повторно
+        self._pending: set[int] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def put(self, job_id: int) -> None:
+        """Ставит задачу в очередь процесса; asyncio.QueueFull, если очередь заполнена"""
+        if job_id in self._pending:
+            return
+        self._queue.put_nowait(job_id)
+        self._pending.add(job_id)
+
+    def full(self) -> bool:
+        return self._queue.full()
+
+    async def recover(self) -> None:
+        """Возвращает в queued задачи с истекшей арендой и ставит задачи queued в очередь процесса"""
+        async with self.session_maker() as db:
+            jobs = JobRepository(db=db)
+            expired = await jobs.requeue_expired(self.lease_seconds)
+            if expired:
+                logger.warning("jobs %s had an expired lease and were requeued", expired)
+            queued = await jobs.get_queued_ids()
+        for job_id in queued:
+            if self._queue.full():
+                # Остальные останутся в queued до следующего вызова recover
+                break
+            self.put(job_id)
+
+    async def start(self) -> None:
+        await self.recover()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def join(self) -> None:
+        """Ждет, пока все поставленные задачи будут выполнены"""
+        await self._queue.join()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.run(job_id)
+            except Exception:
+                logger.exception("job %s could not be run", job_id)
+            finally:
+                self._pending.discard(job_id)
+                self._queue.task_done()
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """Продлевает аренду задачи, пока воркер ее выполняет"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                async with self.session_maker() as db:
+                    await JobRepository(db=db).heartbeat(job_id)
+            except Exception:
+                logger.exception("job %s heartbeat failed", job_id)
+
+    async def run(self, job_id: int) -> None:
+        """Выполняет задачу, если ее еще не захватил другой воркер или процесс, и сохраняет итог"""
+        async with self.session_maker() as db:
+            jobs = JobRepository(db=db)
+            job = await jobs.claim(job_id)
+            if job is None:
+                return
+            kind, status = job.kind, "failed"
+            started = time.perf_counter()
+            heartbeat = asyncio.create_task(self._heartbeat(job_id))
+            try:
+                handler = self._handlers.get(kind)
+                if handler is None:
+                    raise BusinessException(detail=f"Unknown job kind {kind}")
+                result = await handler(db, job.payload)
+            except asyncio.CancelledError:
+                async with self.session_maker() as release_db:
+                    await JobRepository(db=release_db).release(job_id)
+                raise
+            except AppException as e:
+                await db.rollback()
+                await jobs.fail(job_id, e.detail)
+            except Exception as e:
+                logger.exception("job %s (%s) failed", job_id, kind)
+                await db.rollback()
+                await jobs.fail(job_id, f"{type(e).__name__}: {e}")
+            else:
+                status = "succeeded"
+                await jobs.finish(job_id, result)
+            finally:
+                heartbeat.cancel()
+            JOB_DURATION.observe(time.perf_counter() - started, kind=kind, status=status)
+
+
+async def update_activity(db: AsyncSession, payload: dict) -> dict:
+    """Перенос деятельности с поддеревом: пересчет замыкания и сброс кэша организаций"""
+    activity_service = ActivityService(
+        activity_repo=ActivityRepository(db=db),
+        organization_repo=OrganizationRepository(db=db),
+        activity_tree=activity_tree_cache,
+        cache=response_cache,
+    )
+    activity = await activity_service.update_activity(
+        payload["activity_id"], ActivityCreate.model_validate(payload["activity"])
+    )
+    return Acivity.model_validate(activity).model_dump(mode="json")
+
+
+async def delete_building(db: AsyncSession, payload: dict) -> dict:
+    """Удаление здания с его организациями и телефонами и сбросом кэша всех его организаций"""
+    building_service = BuildingService(
+        building_repo=BuildingRepository(db=db),
+        organization_repo=OrganizationRepository(db=db),
+        spatial_index=building_index,
+        cache=response_cache,
+        activity_index=activity_index,
+    )
+    return {"deleted": await building_service.delete_building(payload["building_id"])}
+
+
+job_queue = JobQueue(
+    async_session_maker,
+    workers=settings.JOB_WORKERS,
+    max_size=settings.JOB_QUEUE_SIZE,
+    heartbeat_seconds=settings.JOB_HEARTBEAT_SECONDS,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+)
+job_queue.register("activity.update", update_activity)
+job_queue.register("building.delete", delete_building)
+
+
+class JobService:
+    def __init__(self, job_repo: JobRepository, queue: JobQueue):
+        self.job_repo = job_repo
+        self.queue = queue
+
+    async def submit(self, kind: str, payload: dict) -> JobModel:
+        """Сохраняет задачу и ставит ее в очередь процесса"""
+        if self.queue.full():
+            raise BusinessException(status_code=503, detail="Job queue is full, retry later")
+        job = await self.job_repo.create(kind, payload)
+        try:
+            self.queue.put(job.id)
+        except asyncio.QueueFull as e:
+            await self.job_repo.fail(job.id, "Job queue is full")
+            raise BusinessException(status_code=503, detail="Job queue is full, retry later") from e
+        return job
+
+    async def get_job(self, job_id: int) -> JobModel:
+        job = await self.job_repo.get_by_id(job_id)
+        if job is None:
+            raise NotFoundException(detail=f"Job with id {job_id} not found")
+        return job
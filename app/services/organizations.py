@@ -1,12 +1,157 @@
 # ruff:noqa:E712
+import base64
+import json
+from array import array
+from collections.abc import AsyncIterator
+
 from app.core import BusinessException, NotFoundException
+from app.core.activity_index import ActivityPostingIndex
+from app.core.cache import CacheBackend, invalidate_organizations, organization_cache_key
+from app.core.metrics import record_cache_lookup, serialization_timer
+from app.core.spatial_index import BuildingGridIndex
 from app.models import Organization as OrganizationModel
 from app.repositories import (
     ActivityRepository,
     BuildingRepository,
     OrganizationRepository,
+    RequestLoaders,
+)
+from app.repositories.organization_query import OrganizationQueryBuilder
+from app.schemas import (
+    NORMALIZED_ORGANIZATIONS,
+    ORGANIZATION_ROWS,
+    ORGANIZATION_WITH_DISTANCE_ROWS,
+    CoordinateRadius,
+    CoordinateRectangle,
+    Organization,
+    OrganizationCreate,
+    OrganizationFieldset,
+    OrganizationPage,
+    OrganizationQuery,
+    Pagination,
+    QueryPlan,
+    sparse_page_schema,
+    sparse_schema,
 )
-from app.schemas import CoordinateRadius, CoordinateRectangle, OrganizationCreate
+from app.services.activity_tree import ActivityTreeCache
+from app.services.batch import order_by_ids
+
+
+def encode_cursor(value, organization_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, organization_id]).encode()).decode()
+
+
+CURSOR_VALUE_TYPES: dict[str, type | tuple[type, ...]] = {"id": int, "name": str, "distance": (int, float)}
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        value, organization_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise BusinessException(detail="Invalid cursor") from e
+    if not isinstance(organization_id, int) or not isinstance(value, CURSOR_VALUE_TYPES[sort]):
+        raise BusinessException(detail="Invalid cursor")
+    return value, organization_id
+
+
+def organization_records(rows: list, activity_rows: list) -> list[dict]:
+    """
+    Собирает организации в форме схемы Organization из плоских строк выборки.
+
+    rows - строки OrganizationRepository._select_rows (с distance_km, если она выбрана),
+    activity_rows - строки get_activity_rows. Модели Pydantic не создаются.
+    """
+    activities: dict[int, list[dict]] = {}
+    for organization_id, activity_id, name, parent_id, is_active, level in activity_rows:
+        activities.setdefault(organization_id, []).append(
+            {"id": activity_id, "name": name, "parent_id": parent_id, "is_active": is_active, "level": level}
+        )
+    records = []
+    for (
+        organization_id,
+        name,
+        is_active,
+        building_id,
+        address,
+        latitude,
+        longitude,
+        building_is_active,
+        *extra,
+    ) in rows:
+        record = {
+            "id": organization_id,
+            "name": name,
+            "is_active": is_active,
+            "building": {
+                "id": building_id,
+                "address": address,
+                "latitude": latitude,
+                "longitude": longitude,
+                "is_active": building_is_active,
+            },
+            "activities": activities.get(organization_id, []),
+        }
+        if extra:
+            record["distance_km"] = float(extra[0])
+        records.append(record)
+    return records
+
+
+def normalized_organizations(rows: list, activity_rows: list) -> dict:
+    """
+    Собирает нормализованный ответ: организации ссылаются на здание и деятельности по id,
+    а сами здания и деятельности перечислены по одному разу.
+
+    Размер ответа и время сборки растут с числом уникальных зданий и деятельностей,
+    а не с числом организаций, которые на них ссылаются.
+    """
+    activities: dict[int, dict] = {}
+    activity_ids: dict[int, list[int]] = {}
+    for organization_id, activity_id, name, parent_id, is_active, level in activity_rows:
+        activity_ids.setdefault(organization_id, []).append(activity_id)
+        if activity_id not in activities:
+            activities[activity_id] = {
+                "id": activity_id,
+                "name": name,
+                "parent_id": parent_id,
+                "is_active": is_active,
+                "level": level,
+            }
+    buildings: dict[int, dict] = {}
+    organizations = []
+    for (
+        organization_id,
+        name,
+        is_active,
+        building_id,
+        address,
+        latitude,
+        longitude,
+        building_is_active,
+        *_,
+    ) in rows:
+        organizations.append(
+            {
+                "id": organization_id,
+                "name": name,
+                "is_active": is_active,
+                "building_id": building_id,
+                "activity_ids": activity_ids.get(organization_id, []),
+            }
+        )
+        if building_id not in buildings:
+            buildings[building_id] = {
+                "id": building_id,
+                "address": address,
+                "latitude": latitude,
+                "longitude": longitude,
+                "is_active": building_is_active,
+            }
+    return {
+        "organizations": organizations,
+        "buildings": list(buildings.values()),
+        "activities": list(activities.values()),
+    }
 
 
 class OrganizationService:
@@ -15,83 +160,407 @@ class OrganizationService:
         organization_repo: OrganizationRepository,
         building_repo: BuildingRepository,
         activity_repo: ActivityRepository,
+        activity_tree: ActivityTreeCache,
+        spatial_index: BuildingGridIndex | None = None,
+        cache: CacheBackend | None = None,
+        loaders: RequestLoaders | None = None,
+        activity_index: ActivityPostingIndex | None = None,
     ):
         self.organization_repo = organization_repo
         self.building_repo = building_repo
         self.activity_repo = activity_repo
+        self.activity_tree = activity_tree
+        self.spatial_index = spatial_index
+        self.cache = cache
+        self.loaders = loaders or RequestLoaders(db=organization_repo.db, read_db=organization_repo.read_db)
+        self.activity_index = activity_index
+
+    async def get_all_organizations(
+        self, pagination: Pagination | None = None, fieldset: OrganizationFieldset | None = None
+    ) -> list[OrganizationModel]:
+        return await self.organization_repo.get_all(pagination, fieldset)
+
+    async def _records(self, rows: list) -> list[dict]:
+        if not rows:
+            return []
+        activity_rows = await self.organization_repo.get_activity_rows([row.id for row in rows])
+        return organization_records(rows, activity_rows)
+
+    async def _rows_json(self, rows: list, normalized: bool = False) -> bytes:
+        if not normalized:
+            records = await self._records(rows)
+            with serialization_timer():
+                return ORGANIZATION_ROWS.dump_json(records)
+        activity_rows = []
+        if rows:
+            activity_rows = await self.organization_repo.get_activity_rows([row.id for row in rows])
+        with serialization_timer():
+            return NORMALIZED_ORGANIZATIONS.dump_json(normalized_organizations(rows, activity_rows))
 
-    async def get_all_organizations(self) -> list[OrganizationModel]:
-        return await self.organization_repo.get_all()
+    async def get_all_organizations_json(
+        self, pagination: Pagination | None = None, normalized: bool = False
+    ) -> tuple[bytes, int | None]:
+        """
+        Страница организаций в виде готового JSON: из строк выборки, без моделей ORM и Pydantic.
 
-    async def get_organization_by_id(self, organization_id: int) -> OrganizationModel | None:
-        organization = await self.organization_repo.get_by_id(organization_id)
+        normalized=True - нормализованная форма (см. normalized_organizations).
+        Вторым элементом возвращается курсор следующей страницы (см. Pagination.next_after).
+        """
+        rows = await self.organization_repo.get_all_rows(pagination)
+        next_after = None if pagination is None else pagination.next_after(rows)
+        return await self._rows_json(rows, normalized), next_after
+
+    def stream_all_organizations(
+        self,
+        after: int | None = None,
+        chunk_size: int = 500,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> AsyncIterator[OrganizationModel]:
+        return self.organization_repo.stream_all(after=after, chunk_size=chunk_size, fieldset=fieldset)
+
+    async def get_organization_by_id(
+        self, organization_id: int, fieldset: OrganizationFieldset | None = None
+    ) -> OrganizationModel | None:
+        if fieldset is None:
+            organization = await self.loaders.organizations.load(organization_id)
+        else:
+            organization = await self.organization_repo.get_by_id(organization_id, fieldset)
         if not organization:
             raise NotFoundException(detail=f"Organization with id {organization_id} not found")
         return organization
 
+    async def get_organizations_batch(
+        self, organization_ids: list[int], fieldset: OrganizationFieldset | None = None
+    ) -> tuple[list[OrganizationModel], list[int]]:
+        """Организации в порядке organization_ids и id, которых нет среди активных организаций"""
+        if fieldset is None:
+            organizations = await self.loaders.organizations.load_many(organization_ids)
+            return order_by_ids(organization_ids, dict(zip(organization_ids, organizations, strict=True)))
+        organizations = await self.organization_repo.get_by_ids(organization_ids, fieldset)
+        return order_by_ids(
+            organization_ids, {organization.id: organization for organization in organizations}
+        )
+
+    async def get_organization_json(
+        self, organization_id: int, fieldset: OrganizationFieldset | None = None
+    ) -> bytes:
+        """
+        Организация в виде готового JSON, через кэш ответов (кэшируется только полный ответ).
+
+        Промах читается с основной БД: реплика может отставать, и ответ с нее вернул бы в кэш
+        данные, которые запись уже сбросила. Без кэша чтение идет на реплику, как обычно.
+        """
+        if fieldset is not None:
+            organization = await self.get_organization_by_id(organization_id, fieldset)
+            with serialization_timer():
+                return (
+                    sparse_schema(Organization, fieldset)
+                    .model_validate(organization)
+                    .model_dump_json()
+                    .encode()
+                )
+        if self.cache is None:
+            organization = await self.get_organization_by_id(organization_id)
+            with serialization_timer():
+                return Organization.model_validate(organization).model_dump_json().encode()
+        key = organization_cache_key(organization_id)
+        cached = await self.cache.get(key)
+        record_cache_lookup("organization", cached is not None)
+        if cached is not None:
+            return cached
+        # Поколение до чтения: если запись сбросит ключ, пока идет чтение, set ответ не сохранит
+        generation = await self.cache.generation(key)
+        organization = await self.organization_repo.get_by_id(organization_id, primary=True)
+        if not organization:
+            raise NotFoundException(detail=f"Organization with id {organization_id} not found")
+        with serialization_timer():
+            payload = Organization.model_validate(organization).model_dump_json().encode()
+        await self.cache.set(key, payload, generation)
+        return payload
+
     async def get_organization_by_name(self, name: str) -> OrganizationModel | None:
         return await self.organization_repo.get_by_name(name)
 
-    async def get_organization_by_building(self, building_id: int) -> list[OrganizationModel]:
-        building = await self.building_repo.get_by_id(building_id)
+    async def get_organization_by_building(
+        self,
+        building_id: int,
+        pagination: Pagination | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        building = await self.loaders.buildings.load(building_id)
         if not building:
             raise NotFoundException(detail=f"Organization with building id {building_id} not found")
-        return await self.organization_repo.get_by_building(building_id)
+        return await self.organization_repo.get_by_building(building_id, pagination, fieldset)
 
-    async def get_organization_by_activity(self, activity_id: int) -> list[OrganizationModel]:
-        activity = await self.activity_repo.get_by_id(activity_id)
-        if not activity:
+    async def get_organization_by_activity(
+        self,
+        activity_id: int,
+        pagination: Pagination | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        """Страница организаций деятельности; пустая страница - не ошибка, 404 только для неизвестной"""
+        snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+        if activity_id not in snapshot.nodes:
             raise NotFoundException(detail=f"Organization with activity id {activity_id} not found")
-        organization = await self.organization_repo.get_by_activity(activity_id)
-        if not organization:
-            raise NotFoundException(
-                status_code=401,
-                detail=f"Organization with activity id {activity_id} not found",
+        if self.activity_index is not None and self.activity_index.ready:
+            return await self._get_page_by_postings(
+                self.activity_index.organizations([activity_id]), pagination, fieldset
             )
-        return organization
+        return await self.organization_repo.get_by_activity(activity_id, pagination, fieldset)
 
-    async def get_organizations_by_name_activity_with_children(self, name: str) -> list[OrganizationModel]:
-        activity = await self.activity_repo.get_by_name(name)
-        if not activity:
+    async def get_organizations_by_name_activity_with_children(
+        self, name: str, pagination: Pagination | None = None, fieldset: OrganizationFieldset | None = None
+    ) -> list[OrganizationModel]:
+        snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+        activity_id = snapshot.name_to_id.get(name)
+        if activity_id is None:
             raise NotFoundException(detail=f"Organization with activity name {name} not found")
-        return await self.organization_repo.get_by_name_activity_with_children(activity)
+        if self.activity_index is not None and self.activity_index.ready:
+            return await self._get_page_by_postings(
+                self.activity_index.organizations(snapshot.descendants[activity_id]), pagination, fieldset
+            )
+        return await self.organization_repo.get_by_activity_ids(
+            list(snapshot.descendants[activity_id]), pagination, fieldset
+        )
+
+    async def _get_page_by_postings(
+        self, postings: array, pagination: Pagination | None, fieldset: OrganizationFieldset | None
+    ) -> list[OrganizationModel]:
+        """
+        Страница организаций по списку индекса: id отбираются в памяти, из БД выбирается только страница.
+
+        get_by_ids пропускает id, которых уже нет среди активных организаций (индекс другого
+        процесса или еще не примененное изменение), поэтому недостающие строки добираются
+        следующими срезами списка, пока страница не заполнится или список не закончится.
+        """
+        if pagination is None:
+            organization_ids = ActivityPostingIndex.page(postings)
+            if not organization_ids:
+                return []
+            organizations = await self.organization_repo.get_by_ids(organization_ids, fieldset)
+            return sorted(organizations, key=lambda organization: organization.id)
+        organizations = []
+        after = pagination.after
+        while len(organizations) < pagination.limit:
+            organization_ids = ActivityPostingIndex.page(
+                postings, after, pagination.limit - len(organizations)
+            )
+            if not organization_ids:
+                break
+            organizations.extend(await self.organization_repo.get_by_ids(organization_ids, fieldset))
+            after = organization_ids[-1]
+        return sorted(organizations, key=lambda organization: organization.id)
+
+    async def _build_query(self, query: OrganizationQuery) -> OrganizationQueryBuilder:
+        builder = OrganizationQueryBuilder()
+        if query.building_id is not None:
+            builder.building(query.building_id)
+        if query.activity_id is not None:
+            snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+            if query.activity_id not in snapshot.nodes:
+                raise NotFoundException(detail=f"Activity with id {query.activity_id} not found")
+            builder.activities(
+                list(snapshot.descendants[query.activity_id])
+                if query.include_children
+                else [query.activity_id]
+            )
+        if query.name is not None:
+            builder.name(query.name)
+        if query.radius_km is not None:
+            builder.within_radius(query.lat, query.lon, query.radius_km)
+        elif query.lat is not None:
+            builder.near(query.lat, query.lon)
+        if query.lat_min is not None:
+            builder.within_rectangle(query.lat_min, query.lat_max, query.lon_min, query.lon_max)
+        builder.order_by(query.sort)
+        if query.cursor is not None:
+            builder.after(*decode_cursor(query.cursor, query.sort))
+        return builder
+
+    async def query_organizations(
+        self, query: OrganizationQuery, fieldset: OrganizationFieldset | None = None
+    ) -> OrganizationPage:
+        """
+        Страница организаций по любому сочетанию фильтров, одним SQL-запросом.
+
+        С fieldset элементы страницы содержат только выбранные поля (схема sparse_page_schema).
+        """
+        builder = await self._build_query(query)
+        organizations = await self.organization_repo.query(builder.limit(query.limit + 1), fieldset)
+        next_cursor = None
+        if len(organizations) > query.limit:
+            organizations = organizations[: query.limit]
+            last = organizations[-1]
+            next_cursor = encode_cursor(builder.sort_value(last, last.distance_km), last.id)
+        page_schema = OrganizationPage if fieldset is None else sparse_page_schema(fieldset)
+        return page_schema.model_validate(
+            {"items": organizations, "next_cursor": next_cursor}, from_attributes=True
+        )
+
+    async def explain_organizations_query(self, query: OrganizationQuery) -> QueryPlan:
+        builder = await self._build_query(query)
+        sql, plan = await self.organization_repo.explain(
+            builder.limit(query.limit + 1), analyze=query.explain == "analyze"
+        )
+        return QueryPlan(sql=sql, plan=plan)
+
+    async def search_organizations(
+        self,
+        query: str,
+        activity_id: int | None = None,
+        area: CoordinateRectangle | None = None,
+        limit: int = 20,
+        offset: int = 0,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        activity_ids = None
+        if activity_id is not None:
+            snapshot = await self.activity_tree.get_snapshot(self.activity_repo)
+            if activity_id not in snapshot.nodes:
+                raise NotFoundException(detail=f"Activity with id {activity_id} not found")
+            activity_ids = list(snapshot.descendants[activity_id])
+        return await self.organization_repo.search(query, activity_ids, area, limit, offset, fieldset)
 
     async def get_organization_by_rectangle(
-        self, coordinates: CoordinateRectangle
+        self,
+        coordinates: CoordinateRectangle,
+        pagination: Pagination | None = None,
+        fieldset: OrganizationFieldset | None = None,
     ) -> list[OrganizationModel]:
-        return await self.organization_repo.get_by_rectangle(**coordinates.model_dump())
+        if self.spatial_index is not None and self.spatial_index.ready:
+            building_ids = self.spatial_index.query_rectangle(**coordinates.model_dump())
+            if not building_ids:
+                return []
+            return await self.organization_repo.get_by_building_ids(building_ids, pagination, fieldset)
+        return await self.organization_repo.get_by_rectangle(
+            **coordinates.model_dump(), pagination=pagination, fieldset=fieldset
+        )
 
-    async def get_organization_by_radius(self, coordinates: CoordinateRadius) -> list[OrganizationModel]:
-        return await self.organization_repo.get_by_radius(**coordinates.model_dump())
+    async def get_organizations_by_rectangle_json(
+        self,
+        coordinates: CoordinateRectangle,
+        pagination: Pagination | None = None,
+        normalized: bool = False,
+    ) -> tuple[bytes, int | None]:
+        """get_organization_by_rectangle в виде готового JSON из строк выборки и курсор следующей страницы"""
+        if self.spatial_index is not None and self.spatial_index.ready:
+            building_ids = self.spatial_index.query_rectangle(**coordinates.model_dump())
+            rows = []
+            if building_ids:
+                rows = await self.organization_repo.get_rows_by_building_ids(building_ids, pagination)
+        else:
+            rows = await self.organization_repo.get_rows_by_rectangle(
+                **coordinates.model_dump(), pagination=pagination
+            )
+        next_after = None if pagination is None else pagination.next_after(rows)
+        return await self._rows_json(rows, normalized), next_after
 
-    async def create_organization(self, organization_create: OrganizationCreate):
-        building = await self.building_repo.get_by_id(organization_create.building_id)
-        if not building:
+    async def get_organization_by_radius(
+        self,
+        coordinates: CoordinateRadius,
+        limit: int | None = None,
+        fieldset: OrganizationFieldset | None = None,
+    ) -> list[OrganizationModel]:
+        if self.spatial_index is not None and self.spatial_index.ready:
+            hits = self.spatial_index.query_radius(**coordinates.model_dump())
+            if not hits:
+                return []
+            distances = dict(hits)
+            organizations = await self.organization_repo.get_nearest_by_building_ids(
+                list(distances), limit, fieldset
+            )
+            for organization in organizations:
+                organization.distance_km = distances[organization.building_id]
+            return organizations
+        return await self.organization_repo.get_by_radius(
+            **coordinates.model_dump(), limit=limit, fieldset=fieldset
+        )
+
+    async def get_organizations_by_radius_json(
+        self, coordinates: CoordinateRadius, limit: int | None = None
+    ) -> bytes:
+        """get_organization_by_radius в виде готового JSON, из строк выборки"""
+        if self.spatial_index is not None and self.spatial_index.ready:
+            hits = self.spatial_index.query_radius(**coordinates.model_dump())
+            rows = []
+            if hits:
+                rows = await self.organization_repo.get_nearest_rows_by_building_ids(
+                    [building_id for building_id, _ in hits], limit
+                )
+            records = await self._records(rows)
+            distances = dict(hits)
+            for record in records:
+                record["distance_km"] = distances[record["building"]["id"]]
+        else:
+            rows = await self.organization_repo.get_rows_by_radius(**coordinates.model_dump(), limit=limit)
+            records = await self._records(rows)
+        with serialization_timer():
+            return ORGANIZATION_WITH_DISTANCE_ROWS.dump_json(records)
+
+    async def _check_references(
+        self, organization_create: OrganizationCreate, organization_id: int | None = None
+    ) -> None:
+        references = await self.organization_repo.check_references(
+            building_id=organization_create.building_id,
+            activity_ids=organization_create.activity_ids,
+            organization_id=organization_id,
+        )
+        if not references.organization_exists:
+            raise NotFoundException(detail=f"Organization with id {organization_id} not found")
+        if not references.building_exists:
             raise NotFoundException(
                 status_code=401,
                 detail=f"Organization with building id {organization_create.building_id} not found",
             )
-        return await self.organization_repo.create(organization_create)
+        if references.missing_activity_ids:
+            raise NotFoundException(detail=f"Activities with ids {references.missing_activity_ids} not found")
+
+    async def create_organization(self, organization_create: OrganizationCreate) -> OrganizationModel:
+        await self._check_references(organization_create)
+        organization_db = await self.organization_repo.create(organization_create)
+        if self.activity_index is not None:
+            self.activity_index.set_organization(organization_db.id, organization_create.activity_ids)
+        return organization_db
 
     async def update_organization(
         self, organization_id: int, organization_update: OrganizationCreate
     ) -> OrganizationModel:
-        organization = await self.organization_repo.get_by_id(organization_id)
-        if not organization:
-            raise NotFoundException(detail=f"Organization with id {organization_id} not found")
-        building = await self.building_repo.get_by_id(organization_update.building_id)
-        if not building:
-            raise NotFoundException(
-                status_code=401,
-                detail=f"Organization with building id {organization_update.building_id} not found",
-            )
+        await self._check_references(organization_update, organization_id)
         organization_db = await self.organization_repo.update(organization_id, organization_update)
+        if organization_db and self.activity_index is not None:
+            self.activity_index.set_organization(organization_id, organization_update.activity_ids)
+        await invalidate_organizations(self.cache, [organization_id])
         if not organization_db:
             raise BusinessException(detail=f"Failed to update activity with id {organization_id}")
         return organization_db
 
     async def delete_organization(self, organization_id: int) -> bool:
-        organization = await self.organization_repo.get_by_id(organization_id)
-        if not organization:
+        deleted = await self.organization_repo.delete(organization_id)
+        if not deleted:
             raise NotFoundException(detail=f"Organization with id {organization_id} not found")
-        return await self.organization_repo.delete(organization_id)
+        if self.activity_index is not None:
+            self.activity_index.remove_organization(organization_id)
+        await invalidate_organizations(self.cache, [organization_id])
+        return deleted
+
+    async def restore_organization(self, organization_id: int) -> OrganizationModel:
+        """Возвращает организацию вместе с телефонами, снятыми при ее удалении"""
+        organization = await self.organization_repo.get_deleted(organization_id)
+        if not organization:
+            raise NotFoundException(detail=f"Deleted organization with id {organization_id} not found")
+        if not await self.loaders.buildings.load(organization.building_id):
+            raise BusinessException(
+                status_code=409,
+                detail=f"Building with id {organization.building_id} is deleted, restore it first",
+            )
+        activity_ids = await self.organization_repo.restore(organization_id)
+        if activity_ids is None:
+            raise BusinessException(
+                status_code=409, detail=f"Failed to restore organization {organization_id}"
+            )
+        if self.activity_index is not None:
+            self.activity_index.set_organization(organization_id, activity_ids)
+        self.loaders.organizations.clear(organization_id)
+        organization_db = await self.loaders.organizations.load(organization_id)
+        await invalidate_organizations(self.cache, [organization_id])
+        return organization_db
@@ -1,26 +1,38 @@
 from app.core import BusinessException, NotFoundException
 from app.models import Phone as PhoneModel
-from app.repositories import OrganizationRepository, PhoneRepository
+from app.repositories import OrganizationRepository, PhoneRepository, RequestLoaders
 from app.schemas import PhoneCreate
+from app.services.batch import order_by_ids
 
 
 class PhoneService:
-    def __init__(self, phone_repo: PhoneRepository, organization_repo: OrganizationRepository):
+    def __init__(
+        self,
+        phone_repo: PhoneRepository,
+        organization_repo: OrganizationRepository,
+        loaders: RequestLoaders | None = None,
+    ):
         self.phone_repo = phone_repo
         self.organization_repo = organization_repo
+        self.loaders = loaders or RequestLoaders(db=phone_repo.db, read_db=phone_repo.read_db)
 
     async def get_all_phones(self) -> list[PhoneModel]:
         return await self.phone_repo.get_all()
 
     async def get_phone(self, phone_id: int) -> PhoneModel | None:
-        phone = await self.phone_repo.get_by_id(phone_id)
+        phone = await self.loaders.phones.load(phone_id)
         if not phone:
             raise NotFoundException(detail=f"phone with id {phone_id} not found")
         return phone
 
+    async def get_phones_batch(self, phone_ids: list[int]) -> tuple[list[PhoneModel], list[int]]:
+        """Телефоны в порядке phone_ids и id, которых нет среди активных телефонов"""
+        phones = await self.loaders.phones.load_many(phone_ids)
+        return order_by_ids(phone_ids, dict(zip(phone_ids, phones, strict=True)))
+
     async def create_phone(self, phone_create: PhoneCreate) -> PhoneModel:
         if phone_create.organization_id:
-            organization = self.organization_repo.get_by_id(phone_create.organization_id)
+            organization = await self.loaders.organizations.load(phone_create.organization_id)
             if not organization:
                 raise NotFoundException(
                     status_code=401,
@@ -29,23 +41,26 @@ class PhoneService:
         return await self.phone_repo.create(phone_create)
 
     async def update_phone(self, phone_id: int, phone_update: PhoneCreate) -> PhoneModel:
-        phone = await self.phone_repo.get_by_id(phone_id)
+        phone = await self.loaders.phones.load(phone_id)
         if not phone:
             raise NotFoundException(detail=f"phone with id {phone_id} not found")
         if phone_update.organization_id:
-            organization = await self.organization_repo.get_by_id(phone_update.organization_id)
+            organization = await self.loaders.organizations.load(phone_update.organization_id)
             if not organization:
                 raise NotFoundException(
                     detail=f"Organization with {phone_update.organization_id} not found",
                 )
         phone_db = await self.phone_repo.update(phone_id, phone_update)
+        self.loaders.phones.clear(phone_id)
         if not phone_db:
             raise BusinessException(detail=f"Failed to update phone with id {phone_id}")
 
         return phone_db
 
     async def delete_phone(self, phone_id: int) -> bool:
-        phone = await self.phone_repo.get_by_id(phone_id)
+        phone = await self.loaders.phones.load(phone_id)
         if not phone:
             raise NotFoundException(detail=f"phone with id {phone_id} not found")
-        return await self.phone_repo.delete(phone_id)
+        deleted = await self.phone_repo.delete(phone_id)
+        self.loaders.phones.clear(phone_id)
+        return deleted
@@ -0,0 +1,57 @@
+"""Сравнение двух отчетов python -m benchmarks.load --output, например до и после изменения.
+
+Для каждого эндпоинта выводит p50/p95/p99 и пропускную способность обоих прогонов и изменение
+в процентах. С --fail-above завершается с кодом 1, если p95 какого-либо эндпоинта вырос
+больше чем на заданный процент.
+
+    python -m benchmarks.compare baseline.json candidate.json --fail-above 20
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def change(old: float | None, new: float | None) -> float | None:
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def main(baseline_path: str, candidate_path: str, fail_above: float | None) -> int:
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(candidate_path, encoding="utf-8") as file:
+        candidate = json.load(file)
+    print(f"baseline {baseline['meta'].get('commit')}, candidate {candidate['meta'].get('commit')}")
+    print(f"{'endpoint':<44}" + "".join(f" {metric:>24}" for metric in METRICS))
+    regressions = []
+    for name, new in candidate["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        cells = []
+        for metric in METRICS:
+            delta = change(old.get(metric), new.get(metric))
+            cell = f"{old.get(metric, 0):.1f} -> {new.get(metric, 0):.1f}"
+            cells.append(f" {cell + (f' ({delta:+.0f}%)' if delta is not None else ''):>24}")
+        print(f"{name:<44}" + "".join(cells))
+        p95_change = change(old.get("p95_ms"), new.get("p95_ms"))
+        if fail_above is not None and p95_change is not None and p95_change > fail_above:
+            regressions.append(f"{name}: p95 {p95_change:+.0f}%")
+    for regression in regressions:
+        print(f"regression {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--fail-above", type=float, help="Допустимый рост p95 в процентах")
+    args = parser.parse_args()
+    sys.exit(main(args.baseline, args.candidate, args.fail_above))
@@ -0,0 +1,201 @@
+"""Генератор синтетического справочника для нагрузочных замеров.
+
+Строит детерминированный по seed набор зданий, дерева деятельностей (глубина и число детей
+настраиваются), организаций с их деятельностями и телефонов и загружает его в БД из настроек
+приложения через COPY. Загрузка заменяет все данные справочника (TRUNCATE), поэтому требует --yes.
+Поддерживается только PostgreSQL: схема опирается на pg_trgm, массивы и частичные индексы.
+
+    python -m benchmarks.datagen --buildings 10000 --organizations 100000 --yes
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import text
+
+from app.core.database import async_session_maker
+from app.repositories import bump_table_versions
+from app.services.activities import MAX_ACTIVITY_LEVEL
+
+STREETS = ["Тверская", "Арбат", "Лесная", "Садовая", "Мира", "Ленина", "Пушкина", "Гагарина", "Полевая"]
+KINDS = ["Столовая", "Кофейня", "Аптека", "Автосервис", "Пекарня", "Типография", "Стоматология", "Склад"]
+WORDS = ["Ромашка", "Север", "Восток", "Лидер", "Прогресс", "Орбита", "Вектор", "Радуга", "Гранит"]
+ROOT_ACTIVITIES = ["Еда", "Автомобили", "Услуги", "Торговля", "Медицина", "Образование", "Производство"]
+
+TABLES = ["phones", "organization_activities", "organizations", "buildings", "activity_closure", "activities"]
+VERSIONED_TABLES = ["activities", "buildings", "organizations", "phones"]
+
+
+@dataclass(frozen=True)
+class DatasetConfig:
+    seed: int = 42
+    buildings: int = 10_000
+    organizations: int = 100_000
+    activity_depth: int = MAX_ACTIVITY_LEVEL
+    activity_fanout: int = 5
+    activities_per_organization: int = 2
+    phones_per_organization: int = 2
+    center_lat: float = 55.7558
+    center_lon: float = 37.6173
+    spread_degrees: float = 0.5
+
+    def activity_count(self) -> int:
+        return sum(self.activity_fanout**level for level in range(1, self.activity_depth + 1))
+
+
+def _rng(config: DatasetConfig, table: str) -> random.Random:
+    # Своя последовательность на таблицу: состав одной таблицы не зависит от размеров других
+    return random.Random(f"{config.seed}:{table}")
+
+
+def generate_buildings(config: DatasetConfig) -> Iterator[tuple]:
+    rng = _rng(config, "buildings")
+    for building_id in range(1, config.buildings + 1):
+        yield (
+            building_id,
+            f"г. Москва, ул. {rng.choice(STREETS)}, {building_id}",
+            round(config.center_lat + rng.uniform(-config.spread_degrees, config.spread_degrees), 6),
+            round(config.center_lon + rng.uniform(-config.spread_degrees, config.spread_degrees), 6),
+            True,
+        )
+
+
+def generate_activities(config: DatasetConfig) -> tuple[list[tuple], list[tuple]]:
+    """Дерево деятельностей по уровням и его замыкание: строки activities и activity_closure"""
+    activities: list[tuple] = []
+    closure: list[tuple] = []
+    # (id, путь предков от корня, название) узлов предыдущего уровня
+    parents: list[tuple[int | None, list[int], str]] = [(None, [], "")]
+    for level in range(1, config.activity_depth + 1):
+        nodes = []
+        for parent_id, ancestors, parent_name in parents:
+            for index in range(1, config.activity_fanout + 1):
+                activity_id = len(activities) + 1
+                if parent_id is None:
+                    root = ROOT_ACTIVITIES[(index - 1) % len(ROOT_ACTIVITIES)]
+                    name = f"{root} {index}" if index > len(ROOT_ACTIVITIES) else root
+                else:
+                    name = f"{parent_name}.{index}"
+                path = [*ancestors, activity_id]
+                activities.append((activity_id, name, level, True, parent_id))
+                closure.extend(
+                    (ancestor_id, activity_id, len(path) - 1 - depth)
+                    for depth, ancestor_id in enumerate(path)
+                )
+                nodes.append((activity_id, path, name))
+        parents = nodes
+    return activities, closure
+
+
+def generate_organizations(config: DatasetConfig) -> Iterator[tuple]:
+    rng = _rng(config, "organizations")
+    for organization_id in range(1, config.organizations + 1):
+        name = f"{rng.choice(KINDS)} «{rng.choice(WORDS)}» {organization_id}"
+        yield organization_id, name, rng.randint(1, config.buildings), True
+
+
+def generate_organization_activities(config: DatasetConfig) -> Iterator[tuple]:
+    rng = _rng(config, "organization_activities")
+    activity_ids = range(1, config.activity_count() + 1)
+    per_organization = min(config.activities_per_organization, len(activity_ids))
+    for organization_id in range(1, config.organizations + 1):
+        for activity_id in sorted(rng.sample(activity_ids, per_organization)):
+            yield organization_id, activity_id
+
+
+def generate_phones(config: DatasetConfig) -> Iterator[tuple]:
+    phone_id = 0
+    for organization_id in range(1, config.organizations + 1):
+        for _ in range(config.phones_per_organization):
+            phone_id += 1
+            # +79 и девять цифр номера: уникален и проходит проверку PhoneCreate
+            yield phone_id, f"+79{phone_id:09d}", organization_id, True
+
+
+async def load(config: DatasetConfig) -> dict[str, int]:
+    """Заменяет справочник сгенерированным набором одной транзакцией; возвращает число строк по таблицам"""
+    activities, closure = generate_activities(config)
+    copies = [
+        ("activities", ["id", "name", "level", "is_active", "parent_id"], activities),
+        ("activity_closure", ["ancestor_id", "descendant_id", "depth"], closure),
+        ("buildings", ["id", "address", "latitude", "longitude", "is_active"], generate_buildings(config)),
+        ("organizations", ["id", "name", "building_id", "is_active"], generate_organizations(config)),
+        (
+            "organization_activities",
+            ["organization_id", "activity_id"],
+            generate_organization_activities(config),
+        ),
+        ("phones", ["id", "phone_number", "organization_id", "is_active"], generate_phones(config)),
+    ]
+    counts = {}
+    async with async_session_maker() as db:
+        await db.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY"))
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        for table, columns, records in copies:
+            status = await raw.driver_connection.copy_records_to_table(
+                table, records=records, columns=columns
+            )
+            counts[table] = int(status.split()[-1])
+        for table in VERSIONED_TABLES:
+            # Следующие id после явно заданных при загрузке
+            await db.execute(
+                text(
+                    f"SELECT setval('{table}_id_seq', coalesce((SELECT max(id) FROM {table}), 0) + 1, false)"
+                )
+            )
+        await bump_table_versions(db, VERSIONED_TABLES)
+        await db.commit()
+        for table in TABLES:
+            await db.execute(text(f"ANALYZE {table}"))
+        await db.commit()
+    return counts
+
+
+async def main(config: DatasetConfig) -> None:
+    print(", ".join(f"{key}={value}" for key, value in asdict(config).items()))
+    started = time.perf_counter()
+    counts = await load(config)
+    for table, count in counts.items():
+        print(f"{table:>24} {count:>10}")
+    print(f"loaded in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    defaults = DatasetConfig()
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--buildings", type=int, default=defaults.buildings)
+    parser.add_argument("--organizations", type=int, default=defaults.organizations)
+    parser.add_argument(
+        "--activity-depth",
+        type=int,
+        default=defaults.activity_depth,
+        choices=range(1, MAX_ACTIVITY_LEVEL + 1),
+        help="Глубина дерева деятельностей",
+    )
+    parser.add_argument("--activity-fanout", type=int, default=defaults.activity_fanout, help="Детей у узла")
+    parser.add_argument(
+        "--activities-per-organization", type=int, default=defaults.activities_per_organization
+    )
+    parser.add_argument("--phones-per-organization", type=int, default=defaults.phones_per_organization)
+    parser.add_argument("--yes", action="store_true", help="Подтвердить замену данных справочника")
+    args = parser.parse_args()
+    if not args.yes:
+        parser.error("loading replaces all directory data; pass --yes to confirm")
+    config = DatasetConfig(
+        seed=args.seed,
+        buildings=args.buildings,
+        organizations=args.organizations,
+        activity_depth=args.activity_depth,
+        activity_fanout=args.activity_fanout,
+        activities_per_organization=args.activities_per_organization,
+        phones_per_organization=args.phones_per_organization,
+    )
+    asyncio.run(main(config))
@@ -0,0 +1,406 @@
+"""Нагрузочный прогон всех эндпоинтов зданий, телефонов, деятельностей и организаций.
+
+Приложение запускается в том же процессе (httpx.ASGITransport, с lifespan), без сети и uvicorn,
+поэтому замеряется обработка запроса приложением и БД, а клиент делит с ним event loop.
+Параметры запросов берутся из данных в БД (например, после python -m benchmarks.datagen):
+случайные существующие id, названия и координаты зданий, выбранные по seed.
+Для каждого эндпоинта выполняется --requests запросов с --concurrency одновременными,
+выводятся пропускная способность и p50/p95/p99. Записи (POST/PUT/DELETE и импорт) создают
+собственные здания, деятельности, организации и телефоны и затем удаляют их, но удаление мягкое;
+--read-only пропускает их. Результат можно сохранить в JSON и сравнить с другим коммитом
+через python -m benchmarks.compare.
+
+    python -m benchmarks.load --requests 200 --concurrency 10 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import async_session_maker, engine, read_engine
+from app.main import app
+from app.services.activities import MAX_ACTIVITY_LEVEL
+
+RequestSpec = tuple[str, str, dict]
+
+
+@dataclass
+class Sample:
+    """Существующие записи, из которых собираются параметры запросов"""
+
+    building_ids: list[int]
+    coordinates: list[tuple[float, float]]
+    activities: list[tuple[int, str, int]]
+    organization_ids: list[int]
+    organization_names: list[str]
+    phone_ids: list[int]
+
+
+@dataclass
+class RunState:
+    """Записи, созданные во время прогона, для последующих PUT и DELETE"""
+
+    run_id: str
+    sequence: int = 0
+    created: dict[str, list[int]] = field(default_factory=dict)
+
+    def next_suffix(self) -> str:
+        self.sequence += 1
+        return f"{self.run_id}-{self.sequence}"
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[random.Random, Sample, RunState], RequestSpec]
+    write: bool = False
+    # Для создающих запросов: имя списка в RunState.created, куда записать id из ответа
+    creates: str | None = None
+
+
+async def load_sample(seed: int, size: int) -> Sample:
+    async with async_session_maker() as db:
+        await db.execute(text("SELECT setseed(:seed)"), {"seed": (seed % 1000) / 1000})
+
+        async def rows(query: str) -> list:
+            return (await db.execute(text(query + " ORDER BY random() LIMIT :size"), {"size": size})).all()
+
+        buildings = await rows("SELECT id, latitude, longitude FROM buildings WHERE is_active")
+        activities = await rows("SELECT id, name, level FROM activities WHERE is_active")
+        organizations = await rows("SELECT id, name FROM organizations WHERE is_active")
+        phones = await rows("SELECT id FROM phones WHERE is_active")
+    if not buildings or not activities or not organizations or not phones:
+        raise SystemExit("the database is empty; load data first: python -m benchmarks.datagen --yes")
+    return Sample(
+        building_ids=[row.id for row in buildings],
+        coordinates=[(float(row.latitude), float(row.longitude)) for row in buildings],
+        activities=[(row.id, row.name, row.level) for row in activities],
+        organization_ids=[row.id for row in organizations],
+        organization_names=[row.name for row in organizations],
+        phone_ids=[row.id for row in phones],
+    )
+
+
+def _area(rng: random.Random, sample: Sample, half_side: float = 0.02) -> dict:
+    lat, lon = rng.choice(sample.coordinates)
+    return {
+        "lat_min": lat - half_side,
+        "lat_max": lat + half_side,
+        "lon_min": lon - half_side,
+        "lon_max": lon + half_side,
+    }
+
+
+def _search_term(rng: random.Random, sample: Sample) -> str:
+    # Слово из названия существующей организации с опечаткой: проверяет нечеткий поиск
+    word = rng.choice(
+        [word for word in rng.choice(sample.organization_names).split() if len(word) > 3] or ["Склад"]
+    )
+    return word.strip("«»")[:-1]
+
+
+def _building_body(rng: random.Random, sample: Sample, state: RunState) -> dict:
+    lat, lon = rng.choice(sample.coordinates)
+    return {"address": f"Нагрузочная ул., {state.next_suffix()}", "latitude": lat, "longitude": lon}
+
+
+def _activity_body(rng: random.Random, sample: Sample, state: RunState) -> dict:
+    parents = [activity_id for activity_id, _, level in sample.activities if level < MAX_ACTIVITY_LEVEL]
+    return {"name": f"Нагрузка {state.next_suffix()}", "parent_id": rng.choice(parents) if parents else None}
+
+
+def _organization_body(rng: random.Random, sample: Sample, state: RunState) -> dict:
+    return {
+        "name": f"Нагрузка {state.next_suffix()}",
+        "building_id": rng.choice(sample.building_ids),
+        "activity_ids": [rng.choice(sample.activities)[0]],
+    }
+
+
+def _phone_body(rng: random.Random, sample: Sample, state: RunState) -> dict:
+    state.sequence += 1
+    # +74 и девять цифр: вне диапазона номеров генератора (+79...)
+    number = f"+74{(int(state.run_id) * 1000 + state.sequence) % 10**9:09d}"
+    return {"phone_number": number, "organization_id": rng.choice(sample.organization_ids)}
+
+
+def _import_body(rng: random.Random, sample: Sample, state: RunState, rows: int = 100) -> str:
+    return "\n".join(
+        json.dumps({"type": "organization", **_organization_body(rng, sample, state)}, ensure_ascii=False)
+        for _ in range(rows)
+    )
+
+
+def _created(state: RunState, entity: str, consume: bool = False) -> int:
+    ids = state.created.get(entity)
+    if not ids:
+        raise LookupError(f"no {entity} created in this run")
+    return ids.pop() if consume else ids[-1]
+
+
+def build_scenarios() -> list[Scenario]:
+    def get(path: str, params: Callable[[random.Random, Sample], dict] | None = None):
+        def build(rng: random.Random, sample: Sample, state: RunState) -> RequestSpec:
+            return "GET", path, {"params": params(rng, sample) if params else {}}
+
+        return build
+
+    def by_id(template: str, ids: Callable[[Sample], list], params: dict | None = None):
+        def build(rng: random.Random, sample: Sample, state: RunState) -> RequestSpec:
+            return "GET", template.format(rng.choice(ids(sample))), {"params": params or {}}
+
+        return build
+
+    def write(method: str, path: str, body, entity: str | None = None, consume: bool = False):
+        def build(rng: random.Random, sample: Sample, state: RunState) -> RequestSpec:
+            url = path.format(_created(state, entity, consume)) if entity else path
+            return method, url, {"json": body(rng, sample, state)} if body else {}
+
+        return build
+
+    scenarios = [
+        Scenario("GET /building/", get("/building/")),
+        Scenario("GET /building/{building_id}", by_id("/building/{}", lambda s: s.building_ids)),
+        Scenario("GET /phone/", get("/phone/")),
+        Scenario("GET /phone/{phone_id}", by_id("/phone/{}", lambda s: s.phone_ids)),
+        Scenario("GET /activity/", get("/activity/")),
+        Scenario("GET /activity/tree", get("/activity/tree")),
+        Scenario(
+            "GET /activity/{activity_id}", by_id("/activity/{}", lambda s: [a[0] for a in s.activities])
+        ),
+        Scenario("GET /organization/", get("/organization/")),
+        Scenario("GET /organization/?stream=true", get("/organization/", lambda rng, s: {"stream": "true"})),
+        Scenario(
+            "GET /organization/radius",
+            get(
+                "/organization/radius",
+                lambda rng, s: dict(zip(("lat", "lon"), rng.choice(s.coordinates), strict=True), radius_km=2),
+            ),
+        ),
+        Scenario("GET /organization/area/", get("/organization/area/", _area)),
+        Scenario(
+            "GET /organization/query",
+            get(
+                "/organization/query",
+                lambda rng, s: {
+                    **_area(rng, s, 0.1),
+                    "activity_id": rng.choice(s.activities)[0],
+                    "limit": 50,
+                },
+            ),
+        ),
+        Scenario(
+            "GET /organization/search",
+            get("/organization/search", lambda rng, s: {"q": _search_term(rng, s)}),
+        ),
+        Scenario(
+            "GET /organization/{organization_id}", by_id("/organization/{}", lambda s: s.organization_ids)
+        ),
+        Scenario(
+            "GET /organization/buildings/{building_id}",
+            by_id("/organization/buildings/{}", lambda s: s.building_ids),
+        ),
+        Scenario(
+            "GET /organization/activities/{activity_id}",
+            by_id("/organization/activities/{}", lambda s: [a[0] for a in s.activities]),
+        ),
+        Scenario(
+            "GET /organization/activity/{activity_name}",
+            by_id("/organization/activity/{}", lambda s: [a[1] for a in s.activities if a[2] == 1]),
+        ),
+        Scenario("POST /building/", write("POST", "/building/", _building_body), True, "building"),
+        Scenario(
+            "PUT /building/{building_id}", write("PUT", "/building/{}", _building_body, "building"), True
+        ),
+        Scenario("POST /activity/", write("POST", "/activity/", _activity_body), True, "activity"),
+        Scenario(
+            "PUT /activity/{activity_id}", write("PUT", "/activity/{}", _activity_body, "activity"), True
+        ),
+        Scenario(
+            "POST /organization/", write("POST", "/organization/", _organization_body), True, "organization"
+        ),
+        Scenario(
+            "PUT /organization/{organization_id}",
+            write("PUT", "/organization/{}", _organization_body, "organization"),
+            True,
+        ),
+        Scenario("POST /phone/", write("POST", "/phone/", _phone_body), True, "phone"),
+        Scenario("PUT /phone/{phone_id}", write("PUT", "/phone/{}", _phone_body, "phone"), True),
+        Scenario(
+            "POST /organization/bulk",
+            lambda rng, sample, state: (
+                "POST",
+                "/organization/bulk",
+                {
+                    "params": {"entity": "organization"},
+                    "content": _import_body(rng, sample, state).encode(),
+                    "headers": {"Content-Type": "application/x-ndjson"},
+                },
+            ),
+            True,
+        ),
+        # Удаления в обратном порядке зависимостей: телефоны и организации раньше зданий и деятельностей
+        Scenario("DELETE /phone/{phone_id}", write("DELETE", "/phone/{}", None, "phone", True), True),
+        Scenario(
+            "DELETE /organization/{organization_id}",
+            write("DELETE", "/organization/{}", None, "organization", True),
+            True,
+        ),
+        Scenario(
+            "DELETE /building/{building_id}", write("DELETE", "/building/{}", None, "building", True), True
+        ),
+        Scenario(
+            "DELETE /activity/{activity_id}", write("DELETE", "/activity/{}", None, "activity", True), True
+        ),
+    ]
+    return scenarios
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    return ordered[min(len(ordered) - 1, max(math.ceil(q * len(ordered)) - 1, 0))]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    sample: Sample,
+    state: RunState,
+    rng: random.Random,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    statuses: dict[int, int] = {}
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            try:
+                method, url, kwargs = scenario.build(rng, sample, state)
+            except LookupError:
+                errors += 1
+                continue
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                errors += 1
+            elif scenario.creates is not None:
+                state.created.setdefault(scenario.creates, []).append(response.json()["id"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {**summarize(latencies, errors, time.perf_counter() - started), "statuses": statuses}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    sample = await load_sample(args.seed, args.sample_size)
+    scenarios = [
+        scenario
+        for scenario in build_scenarios()
+        if not (args.read_only and scenario.write)
+        and (not args.only or any(pattern in scenario.name for pattern in args.only))
+    ]
+    state = RunState(run_id=f"{int(time.time())}")
+    results = {}
+    print(f"{'endpoint':<44} {'rps':>9} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} {'errors':>7}")
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(
+            transport=transport,
+            base_url="http://benchmark",
+            headers={"X-API-Key": settings.API_KEY},
+            timeout=60,
+        ) as client,
+    ):
+        for scenario in scenarios:
+            if not scenario.write and args.warmup:
+                await run_scenario(client, scenario, sample, state, rng, args.warmup, args.concurrency)
+            result = await run_scenario(client, scenario, sample, state, rng, args.requests, args.concurrency)
+            results[scenario.name] = result
+            print(
+                f"{scenario.name:<44} {result.get('throughput_rps', 0):>9.1f} "
+                f"{result.get('p50_ms', 0):>9.2f} {result.get('p95_ms', 0):>9.2f} "
+                f"{result.get('p99_ms', 0):>9.2f} {result['errors']:>7}"
+            )
+    await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
+    return {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Запросов на эндпоинт")
+    parser.add_argument("--concurrency", type=int, default=10, help="Одновременных запросов")
+    parser.add_argument("--warmup", type=int, default=20, help="Неучитываемых запросов перед замером чтения")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sample-size", type=int, default=1000, help="Сколько id каждой таблицы брать из БД")
+    parser.add_argument("--only", nargs="+", help="Только эндпоинты, в названии которых есть подстрока")
+    parser.add_argument("--read-only", action="store_true", help="Без POST, PUT и DELETE")
+    parser.add_argument("--output", help="Сохранить результат в JSON")
+    args = parser.parse_args()
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if any(result["errors"] for result in report["results"].values()):
+        sys.exit(1)
@@ -0,0 +1,118 @@
+"""Замер латентности нечеткого поиска по названию в зависимости от количества организаций.
+
+Сравнивает прежний сценарий клиентов (выгрузить все названия и отфильтровать на клиенте)
+с OrganizationRepository.search через триграммный индекс ix_organizations_name_trgm.
+Синтетические организации генерируются на стороне БД в одной транзакции, которая
+в конце откатывается, так что база не меняется.
+
+    python -m benchmarks.organization_search --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import ARRAY, String, bindparam, select, text
+
+from app.core.database import async_session_maker
+from app.models import Organization as OrganizationModel
+from app.repositories import OrganizationRepository
+
+KINDS = [
+    "Столовая",
+    "Кофейня",
+    "Аптека",
+    "Автосервис",
+    "Пекарня",
+    "Типография",
+    "Стоматология",
+    "Библиотека",
+    "Прачечная",
+    "Ателье",
+]
+# Из трех слогов собирается около 27 тысяч разных "фамилий", как в реальном справочнике
+SYLLABLES = [
+    "ба", "ве", "го", "да", "ле", "ми", "но", "ра", "со", "ту",
+    "фе", "ки", "ло", "ма", "ни", "пе", "ре", "си", "та", "зо",
+    "ва", "ге", "ду", "жа", "зи", "ку", "лу", "му", "на", "ро",
+]  # fmt: skip
+QUERIES = ["ромалиш", "Кофейня Бавего", "Стаматология Рамини", "лемину"]
+
+SEED_BUILDINGS = text(
+    """
+    INSERT INTO buildings (address, latitude, longitude, is_active)
+    SELECT 'benchmark search street ' || i, 55 + random(), 37 + random(), true
+    FROM generate_series(1, 1000) AS i
+    """
+)
+SEED_ORGANIZATIONS = text(
+    """
+    INSERT INTO organizations (name, building_id, is_active)
+    SELECT
+        (:kinds)[1 + floor(random() * cardinality(:kinds))::int] || ' ' || initcap(
+            (:syllables)[1 + floor(random() * cardinality(:syllables))::int]
+            || (:syllables)[1 + floor(random() * cardinality(:syllables))::int]
+            || (:syllables)[1 + floor(random() * cardinality(:syllables))::int]
+        ) || ' ' || i,
+        (SELECT min(id) FROM buildings WHERE address LIKE 'benchmark search street %') + i % 1000,
+        true
+    FROM generate_series(:start, :stop - 1) AS i
+    """
+).bindparams(bindparam("kinds", type_=ARRAY(String)), bindparam("syllables", type_=ARRAY(String)))
+
+
+async def measure(coro_factory, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main(sizes: list[int], repeat: int, limit: int) -> None:
+    print(f"{'organizations':>13} {'query':>20} {'found':>6} {'client-side, ms':>16} {'trigram, ms':>12}")
+    async with async_session_maker() as db:
+        repo = OrganizationRepository(db=db)
+        seeded = 0
+        try:
+            await db.execute(text("SELECT setseed(0.42)"))
+            await db.execute(SEED_BUILDINGS)
+            for size in sorted(sizes):
+                await db.execute(
+                    SEED_ORGANIZATIONS,
+                    {"kinds": KINDS, "syllables": SYLLABLES, "start": seeded, "stop": size},
+                )
+                seeded = size
+                # Вставки копятся в pending list GIN-индекса, который обычно сбрасывает autovacuum
+                await db.execute(text("SELECT gin_clean_pending_list('ix_organizations_name_trgm')"))
+                await db.execute(text("ANALYZE organizations"))
+                for query in QUERIES:
+
+                    async def client_side(query=query):
+                        names = (await db.scalars(select(OrganizationModel.name))).all()
+                        return [name for name in names if query.lower() in name.lower()]
+
+                    async def trigram(query=query):
+                        found = await repo.search(query, limit=limit)
+                        db.expunge_all()
+                        return found
+
+                    found = len(await trigram())
+                    client_ms = await measure(client_side, max(1, repeat // 10))
+                    trigram_ms = await measure(trigram, repeat)
+                    print(f"{size:>13} {query:>20} {found:>6} {client_ms:>16.2f} {trigram_ms:>12.2f}")
+        finally:
+            await db.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20, help="Размер страницы поиска")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat, args.limit))
@@ -0,0 +1,102 @@
+"""Замер латентности поиска по радиусу в зависимости от количества зданий.
+
+Сравнивает прежний запрос (acos по всем зданиям) с поиском через описанный прямоугольник
+и индекс ix_buildings_active_lat_lon. Синтетические здания и организации вставляются
+в одной транзакции, которая в конце откатывается, так что база не меняется.
+
+    python -m benchmarks.radius_search --sizes 1000 10000 100000 --radius 2
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import insert, text
+
+from app.core.database import async_session_maker
+from app.models import Building as BuildingModel
+from app.models import Organization as OrganizationModel
+from app.repositories import OrganizationRepository
+
+CENTER_LAT, CENTER_LON = 55.7558, 37.6173
+SPREAD_DEGREES = 0.5
+
+LEGACY_QUERY = text(
+    """
+    SELECT organizations.id FROM organizations JOIN buildings ON buildings.id = organizations.building_id
+    WHERE organizations.is_active AND buildings.is_active AND 6371 * acos(
+        cos(radians(:lat)) * cos(radians(buildings.latitude)) *
+        cos(radians(buildings.longitude) - radians(:lon)) +
+        sin(radians(:lat)) * sin(radians(buildings.latitude))
+    ) <= :radius
+    """
+)
+
+
+async def seed(db, start: int, stop: int, rng: random.Random) -> None:
+    buildings = [
+        {
+            "address": f"benchmark street {i}",
+            "latitude": round(CENTER_LAT + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), 6),
+            "longitude": round(CENTER_LON + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), 6),
+            "is_active": True,
+        }
+        for i in range(start, stop)
+    ]
+    building_ids = (await db.scalars(insert(BuildingModel).returning(BuildingModel.id), buildings)).all()
+    await db.execute(
+        insert(OrganizationModel),
+        [
+            {"name": f"benchmark organization {i}", "building_id": building_id, "is_active": True}
+            for i, building_id in zip(range(start, stop), building_ids, strict=True)
+        ],
+    )
+    await db.execute(text("ANALYZE buildings"))
+    await db.execute(text("ANALYZE organizations"))
+
+
+async def measure(coro_factory, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main(sizes: list[int], radius_km: float, repeat: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    params = {"lat": CENTER_LAT, "lon": CENTER_LON, "radius": radius_km}
+    print(f"{'buildings':>10} {'found':>8} {'legacy, ms':>12} {'bbox, ms':>10}")
+    async with async_session_maker() as db:
+        repo = OrganizationRepository(db=db)
+
+        async def legacy():
+            return (await db.execute(LEGACY_QUERY, params)).all()
+
+        seeded = 0
+        try:
+            for size in sorted(sizes):
+                await seed(db, seeded, size, rng)
+                seeded = size
+                found = len(await legacy())
+                legacy_ms = await measure(legacy, repeat)
+                bbox_ms = await measure(lambda: repo.get_by_radius(CENTER_LAT, CENTER_LON, radius_km), repeat)
+                db.expunge_all()
+                print(f"{size:>10} {found:>8} {legacy_ms:>12.2f} {bbox_ms:>10.2f}")
+        finally:
+            await db.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--radius", type=float, default=2.0, help="Радиус поиска, км")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.radius, args.repeat, args.seed))
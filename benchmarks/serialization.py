@@ -0,0 +1,153 @@
+"""Замер сборки JSON-ответов списков: прежний путь через ORM и response_model против строк выборки.
+
+Прежний путь: ORM-объекты с selectinload-связями, валидация в list[Organization] через
+from_attributes (как делает FastAPI для response_model) и кодирование JSONResponse.
+Новый путь: плоские строки выборки, словари в форме схемы и заранее собранный TypeAdapter.
+Для get_activities сравнивается сериализация списка из снимка дерева на каждый запрос
+с готовым JSON снимка. Синтетические организации вставляются в одной транзакции,
+которая в конце откатывается, так что база не меняется.
+
+    python -m benchmarks.serialization --sizes 1000 10000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import text
+
+from app.core.database import async_session_maker
+from app.repositories import ActivityRepository, BuildingRepository, OrganizationRepository
+from app.schemas import Acivity, CoordinateRadius, Organization, OrganizationWithDistance
+from app.services import ActivityService, OrganizationService
+from app.services.activity_tree import ActivityTreeCache
+
+CENTER_LAT, CENTER_LON = 55.7558, 37.6173
+
+SEED_BUILDINGS = text(
+    """
+    INSERT INTO buildings (address, latitude, longitude, is_active)
+    SELECT 'benchmark serialization street ' || i, :lat - 0.5 + random(), :lon - 0.5 + random(), true
+    FROM generate_series(1, 1000) AS i
+    """
+)
+SEED_ORGANIZATIONS = text(
+    """
+    INSERT INTO organizations (name, building_id, is_active)
+    SELECT
+        'benchmark serialization organization ' || i,
+        (SELECT min(id) FROM buildings WHERE address LIKE 'benchmark serialization street %') + i % 1000,
+        true
+    FROM generate_series(:start, :stop - 1) AS i
+    """
+)
+# Каждой новой организации - две деятельности из существующих
+SEED_ACTIVITIES = text(
+    """
+    INSERT INTO organization_activities (organization_id, activity_id)
+    SELECT organizations.id, activity.id
+    FROM organizations
+    CROSS JOIN LATERAL (
+        SELECT id FROM activities
+        WHERE is_active AND organizations.id > 0
+        ORDER BY random() LIMIT 2
+    ) AS activity
+    WHERE organizations.name LIKE 'benchmark serialization organization %'
+        AND NOT EXISTS (
+            SELECT 1 FROM organization_activities AS linked WHERE linked.organization_id = organizations.id
+        )
+    """
+)
+
+
+async def measure(coro_factory, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def legacy_body(response_model, content) -> bytes:
+    """Тело ответа так, как его собирает FastAPI по response_model со стандартным JSONResponse"""
+    field = create_model_field(name="Response", type_=response_model, mode="serialization")
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+async def main(sizes: list[int], repeat: int, radius_km: float) -> None:
+    print(f"{'endpoint':>28} {'organizations':>13} {'legacy, ms':>11} {'rows, ms':>9} {'speedup':>8}")
+    async with async_session_maker() as db:
+        organization_repo = OrganizationRepository(db=db)
+        activity_repo = ActivityRepository(db=db)
+        activity_tree = ActivityTreeCache()
+        organization_service = OrganizationService(
+            organization_repo=organization_repo,
+            building_repo=BuildingRepository(db=db),
+            activity_repo=activity_repo,
+            activity_tree=activity_tree,
+        )
+        activity_service = ActivityService(
+            activity_repo=activity_repo, organization_repo=organization_repo, activity_tree=activity_tree
+        )
+        coordinates = CoordinateRadius(lat=CENTER_LAT, lon=CENTER_LON, radius_km=radius_km)
+        seeded = 0
+        try:
+            await db.execute(text("SELECT setseed(0.42)"))
+            await db.execute(SEED_BUILDINGS, {"lat": CENTER_LAT, "lon": CENTER_LON})
+            for size in sorted(sizes):
+                await db.execute(SEED_ORGANIZATIONS, {"start": seeded, "stop": size})
+                await db.execute(SEED_ACTIVITIES)
+                seeded = size
+                await db.execute(text("ANALYZE organizations"))
+                await db.execute(text("ANALYZE organization_activities"))
+                total = await db.scalar(text("SELECT count(*) FROM organizations WHERE is_active"))
+
+                async def legacy_all():
+                    organizations = await organization_repo.get_all()
+                    body = await legacy_body(list[Organization], organizations)
+                    db.expunge_all()
+                    return body
+
+                async def legacy_radius():
+                    organizations = await organization_repo.get_by_radius(**coordinates.model_dump())
+                    body = await legacy_body(list[OrganizationWithDistance], organizations)
+                    db.expunge_all()
+                    return body
+
+                async def legacy_activities():
+                    return await legacy_body(list[Acivity], await activity_service.get_all_activities())
+
+                cases = [
+                    ("get_organizations", legacy_all, organization_service.get_all_organizations_json),
+                    (
+                        "get_organizations_by_radius",
+                        legacy_radius,
+                        lambda: organization_service.get_organizations_by_radius_json(coordinates),
+                    ),
+                    ("get_activities", legacy_activities, activity_service.get_all_activities_json),
+                ]
+                for name, legacy, rows in cases:
+                    legacy_ms = await measure(legacy, repeat)
+                    rows_ms = await measure(rows, repeat)
+                    print(
+                        f"{name:>28} {total:>13} {legacy_ms:>11.2f} {rows_ms:>9.2f} "
+                        f"{legacy_ms / max(rows_ms, 1e-3):>7.1f}x"
+                    )
+        finally:
+            await db.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--radius", type=float, default=100, help="Радиус поиска, км")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat, args.radius))
@@ -0,0 +1,58 @@
+"""
+Общие фикстуры тестов.
+
+Тесты без БД выполняются всегда. Тестам с БД нужен TEST_DATABASE_URL - URL PostgreSQL
+с примененными миграциями (alembic upgrade head); без него они пропускаются. Каждый тест
+выполняется во внешней транзакции, которая откатывается в конце: commit в коде приложения
+фиксирует только точку сохранения.
+"""
+
+import os
+
+# Обязательные настройки приложения, чтобы модули app импортировались без .env
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+os.environ.setdefault("POSTGRES_DB_NAME", "test")
+os.environ.setdefault("POSTGRES_USER_NAME", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB_URL", TEST_DATABASE_URL or "postgresql+asyncpg://test@localhost/test")
+os.environ.setdefault("API_KEY", "test")
+
+import pytest  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_connection(anyio_backend):
+    if TEST_DATABASE_URL is None:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            yield connection
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(db_connection) -> async_sessionmaker[AsyncSession]:
+    """Сессии на соединении теста: их commit и rollback работают с точками сохранения"""
+    return async_sessionmaker(
+        bind=db_connection,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+
+
+@pytest.fixture
+async def db_session(session_maker):
+    async with session_maker() as session:
+        yield session
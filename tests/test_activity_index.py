@@ -0,0 +1,61 @@
+from app.core.activity_index import ActivityPostingIndex
+
+
+def make_index() -> ActivityPostingIndex:
+    index = ActivityPostingIndex()
+    index.load([(5, 1), (1, 1), (3, 2), (1, 2), (4, 3)])
+    return index
+
+
+def test_load_builds_sorted_postings():
+    index = make_index()
+    assert index.ready
+    assert len(index) == 4
+    assert index.organizations([1]).tolist() == [1, 5]
+    assert index.organizations([2]).tolist() == [1, 3]
+    assert index.organizations([99]).tolist() == []
+
+
+def test_set_organization_replaces_activities():
+    index = make_index()
+    index.set_organization(1, [2, 3, 3])
+    assert index.organizations([1]).tolist() == [5]
+    assert index.organizations([2]).tolist() == [1, 3]
+    assert index.organizations([3]).tolist() == [1, 4]
+
+    index.set_organization(2, [1])
+    assert index.organizations([1]).tolist() == [2, 5]
+    assert len(index) == 5
+
+
+def test_remove_organization():
+    index = make_index()
+    index.remove_organization(1)
+    index.remove_organization(42)
+    assert index.organizations([1]).tolist() == [5]
+    assert index.organizations([2]).tolist() == [3]
+    assert len(index) == 3
+
+
+def test_union_is_cached_until_an_organization_changes():
+    index = make_index()
+    union = index.organizations([1, 2, 3])
+    assert union.tolist() == [1, 3, 4, 5]
+    assert index.organizations([3, 2, 1]) is union
+
+    index.set_organization(6, [2])
+    assert index.organizations([1, 2, 3]).tolist() == [1, 3, 4, 5, 6]
+
+    index.remove_organization(4)
+    assert index.organizations([1, 2, 3]).tolist() == [1, 3, 5, 6]
+
+
+def test_page_after_and_limit():
+    postings = make_index().organizations([1, 2, 3])
+    assert ActivityPostingIndex.page(postings) == [1, 3, 4, 5]
+    assert ActivityPostingIndex.page(postings, limit=2) == [1, 3]
+    assert ActivityPostingIndex.page(postings, after=3, limit=2) == [4, 5]
+    # Курсор может указывать на id, которого в списке нет
+    assert ActivityPostingIndex.page(postings, after=2, limit=1) == [3]
+    assert ActivityPostingIndex.page(postings, after=5, limit=2) == []
+    assert ActivityPostingIndex.page(postings, after=0) == [1, 3, 4, 5]
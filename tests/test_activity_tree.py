@@ -0,0 +1,135 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.core import BusinessException
+from app.models import Activity as ActivityModel
+from app.models import activity_closure
+from app.repositories import ActivityRepository, OrganizationRepository
+from app.schemas import ActivityCreate
+from app.services.activities import MAX_ACTIVITY_LEVEL, ActivityService
+from app.services.activity_tree import ActivityTreeCache
+
+pytestmark = pytest.mark.anyio
+
+
+def make_service(db) -> ActivityService:
+    return ActivityService(ActivityRepository(db=db), OrganizationRepository(db=db), ActivityTreeCache())
+
+
+async def test_snapshot_is_loaded_from_primary():
+    reads = []
+
+    async def get_all(primary: bool = False):
+        reads.append(primary)
+        return [{"id": 1, "name": "food", "parent_id": None, "level": 1}]
+
+    cache = ActivityTreeCache()
+    snapshot = await cache.get_snapshot(SimpleNamespace(get_all=get_all))
+    assert list(snapshot.nodes) == [1]
+    cache.bump()
+    await cache.get_snapshot(SimpleNamespace(get_all=get_all))
+    assert reads == [True, True]
+
+
+@pytest.fixture
+async def tree(db_session) -> dict[str, int]:
+    """Два корня: food -> meat -> beef и cars -> trucks"""
+    service = make_service(db_session)
+    ids: dict[str, int] = {}
+    for name, parent in [
+        ("food", None),
+        ("meat", "food"),
+        ("beef", "meat"),
+        ("cars", None),
+        ("trucks", "cars"),
+    ]:
+        activity = await service.create_activity(
+            ActivityCreate(name=f"test {name}", parent_id=ids.get(parent))
+        )
+        ids[name] = activity.id
+    return ids
+
+
+async def closure(db, ids: dict[str, int]) -> set[tuple[str, str, int]]:
+    """Строки замыкания между деятельностями теста, по именам"""
+    names = {activity_id: name for name, activity_id in ids.items()}
+    result = await db.execute(
+        select(activity_closure).where(activity_closure.c.descendant_id.in_(list(names)))
+    )
+    return {(names[row.ancestor_id], names[row.descendant_id], row.depth) for row in result}
+
+
+async def levels(db, ids: dict[str, int]) -> dict[str, int]:
+    names = {activity_id: name for name, activity_id in ids.items()}
+    result = await db.execute(
+        select(ActivityModel.id, ActivityModel.level).where(ActivityModel.id.in_(list(names)))
+    )
+    return {names[row.id]: row.level for row in result}
+
+
+SELF_ROWS = {(name, name, 0) for name in ["food", "meat", "beef", "cars", "trucks"]}
+
+
+async def test_created_tree_has_full_closure(db_session, tree):
+    assert await closure(db_session, tree) == SELF_ROWS | {
+        ("food", "meat", 1),
+        ("food", "beef", 2),
+        ("meat", "beef", 1),
+        ("cars", "trucks", 1),
+    }
+    assert await levels(db_session, tree) == {"food": 1, "meat": 2, "beef": 3, "cars": 1, "trucks": 2}
+
+
+async def test_reparent_moves_subtree_closure_and_levels(db_session, tree):
+    await make_service(db_session).update_activity(
+        tree["meat"], ActivityCreate(name="test meat", parent_id=tree["cars"])
+    )
+
+    assert await closure(db_session, tree) == SELF_ROWS | {
+        ("cars", "meat", 1),
+        ("cars", "beef", 2),
+        ("meat", "beef", 1),
+        ("cars", "trucks", 1),
+    }
+    assert await levels(db_session, tree) == {"food": 1, "meat": 2, "beef": 3, "cars": 1, "trucks": 2}
+
+
+async def test_moving_subtree_to_root_lifts_levels(db_session, tree):
+    await make_service(db_session).update_activity(tree["meat"], ActivityCreate(name="test meat"))
+
+    assert await closure(db_session, tree) == SELF_ROWS | {("meat", "beef", 1), ("cars", "trucks", 1)}
+    assert await levels(db_session, tree) == {"food": 1, "meat": 1, "beef": 2, "cars": 1, "trucks": 2}
+
+
+@pytest.mark.parametrize("new_parent", ["food", "meat", "beef"])
+async def test_moving_into_own_subtree_is_rejected(db_session, tree, new_parent):
+    before = await closure(db_session, tree)
+
+    with pytest.raises(BusinessException, match="own subtree"):
+        await make_service(db_session).update_activity(
+            tree["food"], ActivityCreate(name="test food", parent_id=tree[new_parent])
+        )
+
+    assert await closure(db_session, tree) == before
+
+
+async def test_moving_below_max_level_is_rejected(db_session, tree):
+    before = await closure(db_session, tree)
+
+    # meat с потомком под trucks (уровень 2) дал бы beef уровень 4
+    with pytest.raises(BusinessException, match=f"limited to {MAX_ACTIVITY_LEVEL} levels"):
+        await make_service(db_session).update_activity(
+            tree["meat"], ActivityCreate(name="test meat", parent_id=tree["trucks"])
+        )
+
+    assert await closure(db_session, tree) == before
+    assert await levels(db_session, tree) == {"food": 1, "meat": 2, "beef": 3, "cars": 1, "trucks": 2}
+
+
+async def test_creating_below_max_level_is_rejected(db_session, tree):
+    with pytest.raises(BusinessException, match=f"limited to {MAX_ACTIVITY_LEVEL} levels"):
+        await make_service(db_session).create_activity(
+            ActivityCreate(name="test veal", parent_id=tree["beef"])
+        )
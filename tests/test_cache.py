@@ -0,0 +1,158 @@
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import MemoryCache, RedisCache, build_cache, warn_if_process_local
+from app.core.config import Settings
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """Минимальная замена redis.asyncio.Redis с pipeline; время истечения ключей задается извне"""
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self.data: dict[str, tuple[float | None, bytes]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self.clock():
+            del self.data[key]
+            return None
+        return value
+
+    async def mget(self, *keys: str) -> list[bytes | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ex: int | None = None) -> None:
+        self.data[key] = (None if ex is None else self.clock() + ex, value)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        self.data[key] = (None, str(value).encode())
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.commands.clear()
+
+    def incr(self, key: str) -> "FakePipeline":
+        self.commands.append(self.client.incr(key))
+        return self
+
+    def delete(self, *keys: str) -> "FakePipeline":
+        self.commands.append(self.client.delete(*keys))
+        return self
+
+    async def execute(self) -> list:
+        return [await command for command in self.commands]
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, clock):
+    if request.param == "memory":
+        return MemoryCache(ttl_seconds=60)
+    return RedisCache(FakeRedis(clock), ttl_seconds=60)
+
+
+async def test_miss_then_hit(backend):
+    assert await backend.get("organization:1") is None
+    await backend.set("organization:1", b"{}", 0)
+    assert await backend.get("organization:1") == b"{}"
+
+
+async def test_delete_many_invalidates(backend):
+    await backend.set("organization:1", b"1", 0)
+    await backend.set("organization:2", b"2", 0)
+    await backend.delete_many(["organization:1", "organization:3"])
+    await backend.delete_many([])
+    assert await backend.get("organization:1") is None
+    assert await backend.get("organization:2") == b"2"
+
+
+async def test_set_after_invalidation_with_old_generation_is_dropped(backend):
+    # Промах берет поколение, запись сбрасывает ключ, затем приходит запоздавший set
+    await backend.set("organization:1", b"old", await backend.generation("organization:1"))
+    stale_generation = await backend.generation("organization:1")
+    await backend.delete_many(["organization:1"])
+    await backend.set("organization:1", b"old", stale_generation)
+    assert await backend.get("organization:1") is None
+
+    await backend.set("organization:1", b"new", await backend.generation("organization:1"))
+    assert await backend.get("organization:1") == b"new"
+
+
+async def test_entries_expire_after_ttl(backend, clock):
+    await backend.set("organization:1", b"{}", 0)
+    clock.now += 59
+    assert await backend.get("organization:1") == b"{}"
+    clock.now += 2
+    assert await backend.get("organization:1") is None
+
+
+async def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    await cache.set("a", b"a", 0)
+    await cache.set("b", b"b", 0)
+    await cache.get("a")
+    await cache.set("c", b"c", 0)
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"a"
+
+
+async def test_redis_invalidation_reaches_other_workers(clock):
+    client = FakeRedis(clock)
+    writer, reader = RedisCache(client), RedisCache(client)
+    await reader.set("organization:1", b"old", 0)
+    await writer.delete_many(["organization:1"])
+    assert await reader.get("organization:1") is None
+    assert list(client.data) == ["organization-service:generation:organization:1"]
+
+
+async def test_redis_keys_are_prefixed(clock):
+    client = FakeRedis(clock)
+    await RedisCache(client, prefix="test:").set("organization:1", b"{}", 0)
+    assert list(client.data) == ["test:organization:1"]
+
+
+def test_cache_is_disabled_by_default():
+    assert Settings.model_fields["CACHE_BACKEND"].default == "none"
+
+
+def test_memory_cache_warns_at_startup(caplog):
+    warn_if_process_local(build_cache(Settings(CACHE_BACKEND="none")))
+    assert not caplog.records
+    warn_if_process_local(build_cache(Settings(CACHE_BACKEND="memory")))
+    assert "CACHE_BACKEND=redis" in caplog.text
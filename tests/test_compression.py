@@ -0,0 +1,113 @@
+import gzip
+import zlib
+
+import pytest
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware
+
+pytestmark = pytest.mark.anyio
+
+BODY = b'{"name": "organization"}\n' * 100
+
+
+def make_app(chunks: list[bytes], content_type: bytes = b"application/json", encoding: bytes | None = None):
+    """ASGI-приложение, отдающее тело заданными порциями"""
+
+    async def app(scope, receive, send):
+        raw_headers = [(b"content-type", content_type)]
+        if encoding is not None:
+            raw_headers.append((b"content-encoding", encoding))
+        if len(chunks) == 1:
+            raw_headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": raw_headers})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+async def call(app, accept_encoding: str | None) -> tuple[dict[str, str], list[bytes]]:
+    """Прогоняет запрос через CompressionMiddleware, возвращает заголовки и порции тела"""
+    headers = [] if accept_encoding is None else [(b"accept-encoding", accept_encoding.encode())]
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await CompressionMiddleware(app, minimum_size=500)(scope, receive, send)
+    start, *bodies = messages
+    response_headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    return response_headers, [message["body"] for message in bodies]
+
+
+async def test_gzip_full_body():
+    headers, bodies = await call(make_app([BODY]), "gzip, deflate")
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["content-length"] == str(len(bodies[0]))
+    assert gzip.decompress(bodies[0]) == BODY
+
+
+async def test_gzip_stream_flushes_every_chunk():
+    chunks = [BODY, BODY, b""]
+    headers, bodies = await call(make_app(chunks), "gzip")
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Первая порция распаковывается целиком, не дожидаясь конца потока
+    assert decompressor.decompress(bodies[0]) == BODY
+    assert b"".join(decompressor.decompress(body) for body in bodies[1:]) == BODY
+    assert decompressor.eof
+
+
+async def test_small_body_is_not_compressed():
+    headers, bodies = await call(make_app([b"{}"]), "gzip")
+    assert "content-encoding" not in headers
+    assert "vary" not in headers
+    assert bodies == [b"{}"]
+
+
+async def test_identity_adds_vary_only():
+    headers, bodies = await call(make_app([BODY]), None)
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert bodies == [BODY]
+
+
+async def test_gzip_with_zero_quality_is_not_used():
+    headers, bodies = await call(make_app([BODY]), "gzip;q=0")
+    assert "content-encoding" not in headers
+    assert bodies == [BODY]
+
+
+@pytest.mark.parametrize(
+    "app",
+    [
+        make_app([BODY], encoding=b"gzip"),
+        make_app([BODY], content_type=b"application/gzip"),
+        make_app([BODY], content_type=b"text/event-stream"),
+    ],
+)
+async def test_encoded_and_excluded_responses_pass_through(app):
+    headers, bodies = await call(app, "gzip")
+    assert "vary" not in headers
+    assert bodies == [BODY]
+
+
+async def test_brotli_is_preferred_when_installed():
+    brotli = pytest.importorskip("brotli")
+    headers, bodies = await call(make_app([BODY, BODY, b""]), "gzip, br")
+    assert headers["content-encoding"] == "br"
+    assert brotli.decompress(b"".join(bodies)) == BODY * 2
+
+
+async def test_gzip_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    headers, bodies = await call(make_app([BODY]), "br, gzip")
+    assert headers["content-encoding"] == "gzip"
+    assert gzip.decompress(bodies[0]) == BODY
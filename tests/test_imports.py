@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Building as BuildingModel
+from app.models import Phone as PhoneModel
+from app.repositories import ImportRepository
+from app.services.activity_tree import ActivityTreeCache
+from app.services.imports import ImportService
+
+pytestmark = pytest.mark.anyio
+
+
+async def lines(records: list[dict]):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False)
+
+
+async def test_database_error_is_reported_only_for_its_row(db_session):
+    records = [
+        {"type": "building", "address": "Москва, Импортная 1", "latitude": 55.7, "longitude": 37.6},
+        {"type": "phone", "phone_number": "84951234567"},
+        # Проходит проверку схемы, но длиннее столбца phone_number (16 символов)
+        {"type": "phone", "phone_number": "+7 (495) 765-43-21"},
+        {"type": "phone", "phone_number": "84957654321"},
+    ]
+    service = ImportService(ImportRepository(db_session), ActivityTreeCache())
+
+    report = await service.import_lines(lines(records), "ndjson", None, batch_size=10)
+
+    assert report.inserted == 3
+    assert [(error.line, error.entity) for error in report.errors] == [(3, "phone")]
+    assert "too long" in report.errors[0].error
+    phone_numbers = await db_session.scalars(
+        select(PhoneModel.phone_number).where(
+            PhoneModel.phone_number.in_([record.get("phone_number") for record in records])
+        )
+    )
+    assert sorted(phone_numbers) == ["84951234567", "84957654321"]
+    assert await db_session.scalar(
+        select(BuildingModel.id).where(BuildingModel.address == records[0]["address"])
+    )
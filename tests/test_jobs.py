@@ -0,0 +1,167 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.core import BusinessException
+from app.models import Job as JobModel
+from app.repositories import JobRepository
+from app.services.jobs import JobQueue
+
+pytestmark = pytest.mark.anyio
+
+
+async def job_status(session_maker, job_id: int) -> JobModel:
+    async with session_maker() as db:
+        return await JobRepository(db=db).get_by_id(job_id)
+
+
+async def insert_running_job(db, started_at, heartbeat_at) -> int:
+    return await db.scalar(
+        insert(JobModel)
+        .values(
+            kind="test.lease", status="running", payload={}, started_at=started_at, heartbeat_at=heartbeat_at
+        )
+        .returning(JobModel.id)
+    )
+
+
+async def test_job_goes_from_queued_through_running_to_succeeded(session_maker):
+    seen = []
+
+    async def handler(db, payload):
+        seen.append(await db.scalar(select(JobModel.status).where(JobModel.id == job.id)))
+        return {"doubled": payload["value"] * 2}
+
+    queue = JobQueue(session_maker, workers=1)
+    queue.register("test.double", handler)
+    async with session_maker() as db:
+        job = await JobRepository(db=db).create("test.double", {"value": 21})
+    assert job.status == "queued"
+
+    await queue.run(job.id)
+
+    job = await job_status(session_maker, job.id)
+    assert seen == ["running"]
+    assert job.status == "succeeded"
+    assert job.result == {"doubled": 42}
+    assert job.started_at is not None and job.finished_at is not None
+
+
+@pytest.mark.parametrize(
+    ("error", "message"),
+    [
+        (BusinessException(detail="Activity is locked"), "Activity is locked"),
+        (RuntimeError("boom"), "RuntimeError: boom"),
+    ],
+)
+async def test_failed_job_keeps_error_and_rolls_back_its_writes(session_maker, error, message):
+    async def handler(db, payload):
+        await db.execute(insert(JobModel).values(kind="test.side-effect", status="queued", payload={}))
+        raise error
+
+    queue = JobQueue(session_maker, workers=1)
+    queue.register("test.fail", handler)
+    async with session_maker() as db:
+        job = await JobRepository(db=db).create("test.fail", {})
+
+    await queue.run(job.id)
+
+    job = await job_status(session_maker, job.id)
+    assert job.status == "failed"
+    assert job.error == message
+    async with session_maker() as db:
+        assert await db.scalar(select(func.count()).where(JobModel.kind == "test.side-effect")) == 0
+
+
+async def test_claimed_job_is_not_run_twice(session_maker):
+    runs = []
+
+    async def handler(db, payload):
+        runs.append(payload)
+        return None
+
+    queue = JobQueue(session_maker, workers=1)
+    queue.register("test.once", handler)
+    async with session_maker() as db:
+        job = await JobRepository(db=db).create("test.once", {})
+
+    await queue.run(job.id)
+    await queue.run(job.id)
+
+    assert len(runs) == 1
+
+
+async def test_start_requeues_running_jobs_with_expired_lease(session_maker):
+    async def handler(db, payload):
+        return {"ok": True}
+
+    async with session_maker() as db:
+        # now() внутри теста - время начала внешней транзакции
+        started_at = func.now() - timedelta(hours=1)
+        stale = await insert_running_job(db, started_at, heartbeat_at=func.now() - timedelta(minutes=10))
+        alive = await insert_running_job(db, started_at, heartbeat_at=func.now())
+        await db.commit()
+
+    queue = JobQueue(session_maker, workers=1, lease_seconds=120)
+    queue.register("test.lease", handler)
+    await queue.start()
+    try:
+        await queue.join()
+    finally:
+        await queue.stop()
+
+    assert (await job_status(session_maker, stale)).status == "succeeded"
+    assert (await job_status(session_maker, alive)).status == "running"
+
+
+async def test_recover_requeues_lease_expired_after_start(session_maker):
+    async def handler(db, payload):
+        return {"ok": True}
+
+    queue = JobQueue(session_maker, workers=1, lease_seconds=120)
+    queue.register("test.lease", handler)
+    await queue.start()
+    try:
+        async with session_maker() as db:
+            # Процесс упал уже после старта этого: задачу вернет только периодический recover
+            stale = await insert_running_job(
+                db, func.now() - timedelta(hours=1), heartbeat_at=func.now() - timedelta(minutes=10)
+            )
+            await db.commit()
+        await queue.recover()
+        await queue.join()
+    finally:
+        await queue.stop()
+
+    assert (await job_status(session_maker, stale)).status == "succeeded"
+
+
+async def test_recover_tops_up_queue_left_full_at_start(session_maker):
+    async def handler(db, payload):
+        return None
+
+    queue = JobQueue(session_maker, workers=1, max_size=1)
+    queue.register("test.top-up", handler)
+    async with session_maker() as db:
+        jobs = [await JobRepository(db=db).create("test.top-up", {}) for _ in range(2)]
+    await queue.start()
+    try:
+        await queue.join()
+        assert [(await job_status(session_maker, job.id)).status for job in jobs] == ["succeeded", "queued"]
+        await queue.recover()
+        await queue.join()
+    finally:
+        await queue.stop()
+
+    assert (await job_status(session_maker, jobs[1].id)).status == "succeeded"
+
+
+async def test_recover_does_not_queue_pending_job_twice(session_maker):
+    queue = JobQueue(session_maker, workers=0)
+    async with session_maker() as db:
+        job = await JobRepository(db=db).create("test.pending", {})
+    queue.put(job.id)
+    await queue.recover()
+    await queue.recover()
+    assert queue._queue.qsize() == 1
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.cache import MemoryCache, invalidate_organizations, organization_cache_key
+from app.services.organizations import OrganizationService
+
+pytestmark = pytest.mark.anyio
+
+PRIMARY, REPLICA = object(), object()
+
+
+def make_organization(name: str = "Рога и копыта") -> dict:
+    return {
+        "id": 1,
+        "name": name,
+        "activities": [{"id": 1, "name": "Еда", "parent_id": None, "level": 1}],
+        "building": {"id": 1, "address": "Москва, Ленина 1", "latitude": 55.75, "longitude": 37.61},
+    }
+
+
+class FakeRepository:
+    """Репозиторий с одной организацией: запоминает, с какой БД она прочитана"""
+
+    def __init__(self, organization: dict, read_db=REPLICA):
+        self.db = PRIMARY
+        self.read_db = read_db
+        self.organization = organization
+        self.reads: list[object] = []
+
+    async def get_by_id(self, organization_id: int, fieldset=None, primary: bool = False):
+        self.reads.append(self.db if primary else self.read_db)
+        return self.organization
+
+
+class FakeLoader:
+    def __init__(self, repository: FakeRepository):
+        self.repository = repository
+
+    async def load(self, organization_id: int):
+        return await self.repository.get_by_id(organization_id)
+
+
+def make_service(cache: MemoryCache | None, read_db=REPLICA) -> OrganizationService:
+    repository = FakeRepository(make_organization(), read_db)
+    loaders = SimpleNamespace(organizations=FakeLoader(repository))
+    return OrganizationService(repository, None, None, None, cache=cache, loaders=loaders)
+
+
+async def test_miss_reads_primary_and_fills_cache():
+    cache = MemoryCache()
+    service = make_service(cache, read_db=REPLICA)
+    payload = await service.get_organization_json(1)
+    assert "Рога и копыта" in payload.decode()
+    assert await cache.get(organization_cache_key(1)) == payload
+    assert service.organization_repo.reads == [PRIMARY]
+
+
+async def test_without_cache_reads_replica():
+    service = make_service(None, read_db=REPLICA)
+    await service.get_organization_json(1)
+    assert service.organization_repo.reads == [REPLICA]
+
+
+async def test_hit_skips_database_until_invalidated():
+    cache = MemoryCache()
+    service = make_service(cache)
+    payload = await service.get_organization_json(1)
+    assert await service.get_organization_json(1) == payload
+    assert len(service.organization_repo.reads) == 1
+
+    service.organization_repo.organization = make_organization("Копыта и рога")
+    await invalidate_organizations(cache, [1])
+    assert "Копыта и рога" in (await service.get_organization_json(1)).decode()
+    assert len(service.organization_repo.reads) == 2
+
+
+async def test_write_during_miss_keeps_stale_payload_out_of_cache():
+    cache = MemoryCache()
+    service = make_service(cache)
+    repository = service.organization_repo
+    read = repository.get_by_id
+
+    async def read_then_concurrent_write(organization_id: int, fieldset=None, primary: bool = False):
+        # Промах прочитал старые данные, и до его set запись успела закоммитить и сбросить ключ
+        organization = await read(organization_id, fieldset, primary)
+        repository.organization = make_organization("Копыта и рога")
+        await invalidate_organizations(cache, [organization_id])
+        return organization
+
+    repository.get_by_id = read_then_concurrent_write
+    assert "Рога и копыта" in (await service.get_organization_json(1)).decode()
+    assert await cache.get(organization_cache_key(1)) is None
+
+    repository.get_by_id = read
+    assert "Копыта и рога" in (await service.get_organization_json(1)).decode()
+    assert await cache.get(organization_cache_key(1)) is not None
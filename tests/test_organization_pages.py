@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.activity_index import ActivityPostingIndex
+from app.schemas import Pagination
+from app.services.organizations import OrganizationService
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeOrganizationRepository:
+    """get_by_ids как в OrganizationRepository: неактивные id молча пропускаются"""
+
+    db = read_db = None
+
+    def __init__(self, active_ids: set[int]):
+        self.active_ids = active_ids
+        self.requests: list[list[int]] = []
+
+    async def get_by_ids(self, organization_ids, fieldset=None):
+        self.requests.append(organization_ids)
+        return [SimpleNamespace(id=i) for i in reversed(organization_ids) if i in self.active_ids]
+
+
+def make_service(active_ids: set[int]) -> OrganizationService:
+    return OrganizationService(FakeOrganizationRepository(active_ids), None, None, None)
+
+
+def postings(*links: tuple[int, int]):
+    index = ActivityPostingIndex()
+    index.load(links)
+    return index.organizations([1])
+
+
+async def test_stale_posting_does_not_shorten_page():
+    service = make_service({1, 2, 4, 5, 6})
+    page = await service._get_page_by_postings(
+        postings(*[(i, 1) for i in range(1, 7)]), Pagination(limit=3, after=None), None
+    )
+    assert [organization.id for organization in page] == [1, 2, 4]
+    assert service.organization_repo.requests == [[1, 2, 3], [4]]
+
+
+async def test_stale_postings_until_the_end_give_last_page():
+    service = make_service({2})
+    page = await service._get_page_by_postings(
+        postings(*[(i, 1) for i in range(1, 5)]), Pagination(limit=2, after=1), None
+    )
+    assert [organization.id for organization in page] == [2]
+    assert service.organization_repo.requests == [[2, 3], [4]]
+
+
+async def test_without_pagination_all_active_are_returned():
+    service = make_service({1, 3})
+    page = await service._get_page_by_postings(postings((1, 1), (2, 1), (3, 1)), None, None)
+    assert [organization.id for organization in page] == [1, 3]
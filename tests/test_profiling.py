@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.profiling import _explain
+
+pytestmark = pytest.mark.anyio
+
+
+async def explain(db_connection, statement: str) -> list | str:
+    return await db_connection.run_sync(lambda connection: _explain(connection, statement, ()))
+
+
+async def test_explain_returns_plan(db_connection):
+    plan = await explain(db_connection, "SELECT 1")
+    assert plan[0]["Plan"]["Actual Rows"] == 1
+
+
+async def test_failed_explain_keeps_request_transaction_usable(db_connection):
+    await db_connection.execute(text("CREATE TEMPORARY TABLE profiled (id int)"))
+    await db_connection.execute(text("INSERT INTO profiled VALUES (1)"))
+    plan = await explain(db_connection, "SELECT 1 / 0")
+    assert plan.startswith("EXPLAIN failed:")
+    # Транзакция не прервана, и сделанное до EXPLAIN в ней не потеряно
+    assert await db_connection.scalar(text("SELECT count(*) FROM profiled")) == 1
@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, insert, select, update
+
+from app.core import BusinessException, NotFoundException
+from app.models import Building as BuildingModel
+from app.models import Organization as OrganizationModel
+from app.models import Phone as PhoneModel
+from app.repositories import BuildingRepository, OrganizationRepository
+from app.services import BuildingService, OrganizationService
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_building(db, address: str) -> int:
+    return await db.scalar(
+        insert(BuildingModel)
+        .values(address=address, latitude=55.75, longitude=37.61)
+        .returning(BuildingModel.id)
+    )
+
+
+async def add_organization(db, name: str, building_id: int, phones: list[str]) -> int:
+    organization_id = await db.scalar(
+        insert(OrganizationModel).values(name=name, building_id=building_id).returning(OrganizationModel.id)
+    )
+    for phone_number in phones:
+        await db.execute(
+            insert(PhoneModel).values(phone_number=phone_number, organization_id=organization_id)
+        )
+    return organization_id
+
+
+async def delete_earlier(db, model, *criteria) -> None:
+    """
+    Снимает запись так, будто это сделала более ранняя транзакция.
+
+    Все запросы теста идут в одной транзакции, и now() в них одинаков: без явной ранней метки
+    отдельное удаление нельзя было бы отличить от каскадного.
+    """
+    await db.execute(
+        update(model)
+        .where(model.is_active, *criteria)
+        .values(is_active=False, deleted_at=func.now() - timedelta(minutes=5))
+    )
+
+
+async def active_ids(db, model, *criteria) -> set[int]:
+    return set((await db.scalars(select(model.id).where(model.is_active, *criteria))).all())
+
+
+def building_service(db) -> BuildingService:
+    return BuildingService(BuildingRepository(db=db), OrganizationRepository(db=db))
+
+
+def organization_service(db) -> OrganizationService:
+    return OrganizationService(OrganizationRepository(db=db), BuildingRepository(db=db), None, None)
+
+
+@pytest.fixture
+async def building(db_session):
+    """Здание с двумя организациями и их телефонами, одна организация и один телефон сняты раньше"""
+    building_id = await add_building(db_session, "test: Soft delete street 1")
+    kept = await add_organization(db_session, "test: kept", building_id, ["+70000000001", "+70000000002"])
+    deleted_before = await add_organization(db_session, "test: deleted before", building_id, ["+70000000003"])
+    await delete_earlier(db_session, OrganizationModel, OrganizationModel.id == deleted_before)
+    await delete_earlier(db_session, PhoneModel, PhoneModel.organization_id == deleted_before)
+    phone_deleted_before = await db_session.scalar(
+        select(PhoneModel.id).where(PhoneModel.phone_number == "+70000000002")
+    )
+    await delete_earlier(db_session, PhoneModel, PhoneModel.id == phone_deleted_before)
+    await db_session.commit()
+    return {
+        "id": building_id,
+        "kept": kept,
+        "deleted_before": deleted_before,
+        "phone_deleted_before": phone_deleted_before,
+    }
+
+
+async def test_building_delete_cascades_to_organizations_and_phones(db_session, building):
+    assert await building_service(db_session).delete_building(building["id"])
+
+    in_building = OrganizationModel.building_id == building["id"]
+    assert await active_ids(db_session, BuildingModel, BuildingModel.id == building["id"]) == set()
+    assert await active_ids(db_session, OrganizationModel, in_building) == set()
+    phones = PhoneModel.organization_id.in_([building["kept"], building["deleted_before"]])
+    assert await active_ids(db_session, PhoneModel, phones) == set()
+
+
+async def test_building_restore_brings_back_exactly_what_was_deleted_with_it(db_session, building):
+    in_building = OrganizationModel.building_id == building["id"]
+    phones = PhoneModel.organization_id.in_([building["kept"], building["deleted_before"]])
+    organizations_before = await active_ids(db_session, OrganizationModel, in_building)
+    phones_before = await active_ids(db_session, PhoneModel, phones)
+
+    service = building_service(db_session)
+    await service.delete_building(building["id"])
+    restored = await service.restore_building(building["id"])
+
+    assert restored.id == building["id"]
+    assert organizations_before == {building["kept"]}
+    assert await active_ids(db_session, OrganizationModel, in_building) == organizations_before
+    assert await active_ids(db_session, PhoneModel, phones) == phones_before
+    assert building["phone_deleted_before"] not in phones_before
+
+
+async def test_phone_deleted_on_its_own_stays_deleted_after_organization_restore(db_session, building):
+    service = organization_service(db_session)
+    await service.delete_organization(building["kept"])
+    await service.restore_organization(building["kept"])
+
+    of_organization = PhoneModel.organization_id == building["kept"]
+    phones = await active_ids(db_session, PhoneModel, of_organization)
+    assert len(phones) == 1
+    assert building["phone_deleted_before"] not in phones
+
+
+async def test_organization_restore_in_deleted_building_is_a_conflict(db_session, building):
+    await building_service(db_session).delete_building(building["id"])
+
+    with pytest.raises(BusinessException) as error:
+        await organization_service(db_session).restore_organization(building["kept"])
+
+    assert error.value.status_code == 409
+    assert await active_ids(db_session, OrganizationModel, OrganizationModel.id == building["kept"]) == set()
+
+
+async def test_restore_of_active_building_is_not_found(db_session, building):
+    with pytest.raises(NotFoundException) as error:
+        await building_service(db_session).restore_building(building["id"])
+    assert error.value.status_code == 404
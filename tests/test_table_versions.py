@@ -0,0 +1,82 @@
+import os
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.dependencies.db import get_async_db
+from app.main import app
+from app.repositories import TableVersionRepository, bump_table_versions
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(session_maker):
+    async def get_test_db():
+        async with session_maker() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_test_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", headers={"X-API-Key": settings.API_KEY}
+    ) as client:
+        yield client
+    app.dependency_overrides.pop(get_async_db)
+
+
+async def test_etag_changes_after_write_and_if_none_match_gives_304(client, db_session):
+    response = await client.get("/building/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = await client.get("/building/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    building = {"address": "test: ETag street 1", "latitude": 55.75, "longitude": 37.61}
+    assert (await client.post("/building/", json=building)).status_code == 201
+
+    response = await client.get("/building/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+
+    # Свертка изменений не меняет версии, которые видят клиенты
+    await TableVersionRepository(db=db_session).compact()
+    response = await client.get("/building/", headers={"If-None-Match": new_etag})
+    assert response.status_code == 304
+
+
+async def test_versions_count_every_committed_change(db_session):
+    repository = TableVersionRepository(db=db_session)
+    (before,) = await repository.get_versions(["phones"])
+
+    await bump_table_versions(db_session, ["phones", "phones"])
+    await bump_table_versions(db_session, ["phones", "organizations"])
+    await db_session.commit()
+    (after,) = await repository.get_versions(["phones"])
+    assert after.version == before.version + 2
+
+    await repository.compact()
+    (compacted,) = await repository.get_versions(["phones"])
+    assert compacted.version == after.version
+
+
+async def test_concurrent_writers_do_not_wait_for_each_other(db_connection):
+    """Две открытые транзакции отмечают изменение одной таблицы; вторая не ждет фиксации первой"""
+    engine = create_async_engine(os.environ["TEST_DATABASE_URL"], poolclass=NullPool)
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            async with first.begin() as first_transaction, second.begin() as second_transaction:
+                await bump_table_versions(first, ["buildings"])
+                await second.execute(text("SET LOCAL lock_timeout = '1s'"))
+                await bump_table_versions(second, ["buildings"])
+                await first_transaction.rollback()
+                await second_transaction.rollback()
+    finally:
+        await engine.dispose()